@@ -0,0 +1,227 @@
+# benchmarks/pipeline_throughput.py
+"""End-to-end throughput of upload and analysis against the local fake OpenAI API.
+
+Starts src/fake_openai.py on a free port, points the openai client at it and
+runs the pipelined upload -> thread -> run -> poll -> messages flow for a set
+of generated PDFs, with the summary and syntheses overlapping it as stages of
+the analysis task graph (or, with --phased, synthesis after the analysis).
+With --late-files, more files are then added to the analyzed tender, updating
+the syntheses and summary. No network access or API key is needed. Run from
+the repository root:
+
+    python -m benchmarks.pipeline_throughput --files 20 \
+        --profile resources/simulation_profile.json
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Per-file result lists in the order the analysis returns them
+ACCUMULATED_RESULTS = (
+    "all_dates",
+    "all_requirements",
+    "all_folder_structures",
+    "all_client_infos",
+    "all_local_dates",
+)
+
+
+class Quiet:
+    """Stands in for the Streamlit progress, status and file list elements."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class UploadedFile(io.BytesIO):
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def make_pdf(lines):
+    """A one-page PDF showing the given lines of text."""
+    text = " ".join(f"({line}) Tj T*" for line in lines)
+    stream = f"BT /F1 10 Tf 14 TL 50 750 Td {text} ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [4 0 R] /Count 1 >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 3 0 R >> >> /Contents 5 0 R >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--profile", default='{"latency": {"default": 2.0}}')
+    parser.add_argument("--request-latency", type=float, default=0.02)
+    parser.add_argument("--engine", choices=("threads", "asyncio"), default="threads")
+    parser.add_argument("--extraction-mode", default="separate")
+    parser.add_argument(
+        "--late-files",
+        type=int,
+        default=0,
+        help="files added afterwards to the analyzed tender",
+    )
+    parser.add_argument(
+        "--phased",
+        action="store_true",
+        help="synthesize after the analysis, from scratch, instead of as graph stages",
+    )
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, os.path.join(ROOT, "src"))
+    state_dir = tempfile.mkdtemp(prefix="tenderai-bench-")
+    os.environ.update(
+        {
+            "OPENAI_API_KEY": "sk-fake",
+            "OPENAI_ASSISTANT_ID": "asst_fake",
+            "TENDERAI_RESPONSE_CACHE": "false",
+            "TENDERAI_FILE_REGISTRY_PATH": os.path.join(state_dir, "files.sqlite"),
+            "TENDERAI_JOB_STORE_PATH": os.path.join(state_dir, "jobs.sqlite"),
+            "TENDERAI_SIMULATION_PROFILE": "",
+        }
+    )
+
+    from fake_openai import start_server
+    from simulation import SimulationProfile
+
+    server, base_url = start_server(
+        profile=SimulationProfile.load(args.profile),
+        request_latency=args.request_latency,
+    )
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    import file_handler
+    import tender_analyzer
+    from document_store import DocumentStore
+
+    files = [
+        UploadedFile(
+            f"lot_{i}.pdf",
+            make_pdf([f"Lot {i}", f"Submission deadline: {i % 28 + 1:02d}.05.2025"]),
+        )
+        for i in range(args.files + args.late_files)
+    ]
+    documents = DocumentStore(files)
+    analyze = (
+        tender_analyzer.analyze_uploads
+        if args.engine == "threads"
+        else tender_analyzer.analyze_uploads_async
+    )
+    state = server.RequestHandlerClass.state
+
+    def synthesis_prompt_chars():
+        """Characters sent in prompts without attached files: syntheses and merges."""
+        return sum(
+            len(message["content"][0]["text"]["value"])
+            for thread in list(state.threads.values())
+            for message in thread["messages"]
+            if message["role"] == "user" and not message["attachments"]
+        )
+
+    def analyze_files(batch, previous_results):
+        """Analyze and synthesize a batch of files added to the tender.
+
+        Returns (file ids, names, results, runs, seconds, synthesis prompt chars).
+        """
+        runs_before = len(state.runs)
+        chars_before = synthesis_prompt_chars()
+        started = time.perf_counter()
+        result = analyze(
+            file_handler.iter_uploads(
+                batch,
+                simulation_mode=False,
+                known_files=(previous_results or {}).get("file_id_to_name"),
+            ),
+            Quiet(),
+            Quiet(),
+            Quiet(),
+            documents,
+            len(batch),
+            False,
+            extraction_mode=args.extraction_mode,
+            synthesize=not args.phased,
+            previous_results=None if args.phased else previous_results,
+        )
+        if asyncio.iscoroutine(result):
+            result = asyncio.run(result)
+        file_ids, file_id_to_name, failed_uploads, results = result
+        if failed_uploads:
+            print(f"failed uploads: {', '.join(failed_uploads)}")
+        if args.phased:
+            # Synthesis from scratch over every file analyzed so far
+            earlier = previous_results or {}
+            results = (
+                *results[:7],
+                tender_analyzer.synthesize_results(
+                    *(
+                        earlier.get(name, []) + results[i]
+                        for i, name in enumerate(ACCUMULATED_RESULTS[:4])
+                    ),
+                    earlier.get("file_ids", []) + file_ids,
+                    {**earlier.get("file_id_to_name", {}), **file_id_to_name},
+                    tender_analyzer.init_logger(),
+                    False,
+                    earlier.get("all_local_dates", []) + results[4],
+                ),
+            )
+        return (
+            file_ids,
+            file_id_to_name,
+            results,
+            len(state.runs) - runs_before,
+            time.perf_counter() - started,
+            synthesis_prompt_chars() - chars_before,
+        )
+
+    mode = f"{args.engine} engine{', phased' if args.phased else ''}"
+    file_ids, file_id_to_name, results, runs, seconds, chars = analyze_files(
+        files[: args.files], None
+    )
+    print(f"{len(file_ids)} files with {mode}: {runs} runs in {seconds:.2f}s")
+    print(f"runs per second: {runs / seconds:.2f}")
+    print(f"synthesis prompt characters: {chars}")
+
+    if args.late_files:
+        previous_results = {
+            "file_ids": file_ids,
+            "file_id_to_name": file_id_to_name,
+            **dict(zip(ACCUMULATED_RESULTS, results[:5])),
+            "summary_response": results[5],
+            **results[7],
+        }
+        late_ids, _, _, runs, seconds, chars = analyze_files(
+            files[args.files :], previous_results
+        )
+        print(f"{len(late_ids)} late files added: {runs} runs in {seconds:.2f}s")
+        print(f"synthesis prompt characters: {chars}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,27 @@
 import streamlit as st
-from config import CUSTOM_CSS, ASSISTANT_ID, TENDERAI_VERSION
-from file_handler import upload_files
+from config import (
+    CUSTOM_CSS,
+    ASSISTANT_ID,
+    TENDERAI_VERSION,
+    ANALYSIS_ENGINE,
+    PIPELINE_UPLOADS,
+    DOCUMENT_MEMORY_MB,
+)
+from document_store import DocumentStore, extraction_service
+from file_handler import cleanup_expired_files, iter_uploads, upload_files
 from tender_analyzer import (
     analyze_tender,
-    synthesize_results,
+    analyze_tender_async,
+    analyze_uploads,
+    analyze_uploads_async,
     BATCH_SIZE,
     MAX_CONCURRENT_REQUESTS,
+    job_store,
 )
 from ui import render_main_content
 from utils import load_image_as_base64
 import openai
-import logging
+import asyncio
 
 # Set page config
 st.set_page_config(page_title="INOX Tender AI", layout="centered")
@@ -96,6 +107,12 @@ if "is_analyzing" not in st.session_state:
     st.session_state.is_analyzing = False
 if "uploaded_files" not in st.session_state:
     st.session_state.uploaded_files = []
+if "document_store" not in st.session_state:
+    # Text of every uploaded document, extracted at most once per tender
+    st.session_state.document_store = DocumentStore(
+        max_memory_bytes=DOCUMENT_MEMORY_MB * 1024 * 1024,
+        extractor=extraction_service,
+    )
 if "uploaded_file_ids" not in st.session_state:
     st.session_state.uploaded_file_ids = []
 if "file_id_to_name" not in st.session_state:
@@ -106,6 +123,7 @@ if "analysis_results" not in st.session_state:
         "all_requirements": [],
         "all_folder_structures": [],
         "all_client_infos": [],
+        "all_local_dates": [],
         "summary_response": "",
         "progress_log_messages": [],
         "synthesized_dates": "",
@@ -125,6 +143,8 @@ if "new_files_to_process" not in st.session_state:
     st.session_state.new_files_to_process = []
 if "analysis_completed" not in st.session_state:
     st.session_state.analysis_completed = False
+if "resume_job_id" not in st.session_state:
+    st.session_state.resume_job_id = None
 
 # Create tabs with static labels
 tab1, tab2, tab3 = st.tabs(["Upload File", "Analysis", "Logs"])
@@ -137,6 +157,17 @@ with tab1:
         # Show notification if analysis is complete
         if st.session_state.analysis_completed:
             st.success("Analysis complete! Check the results in the Analysis tab.")
+        # Offer to pick up an analysis that was interrupted, e.g. by a restart
+        interrupted_job_id = st.query_params.get("job")
+        if interrupted_job_id and job_store is not None:
+            job = job_store.job(interrupted_job_id)
+            if job is not None and not job[1] and job_store.files(interrupted_job_id):
+                st.warning("An earlier analysis was interrupted before it finished.")
+                if st.button("Resume Analysis", use_container_width=True):
+                    st.session_state.resume_job_id = interrupted_job_id
+                    st.session_state.start_analysis = True
+                    st.session_state.is_analyzing = True
+                    st.rerun()
 
     st.header("📂 Upload Documents")
     uploaded_files_input = st.file_uploader(
@@ -170,6 +201,7 @@ if uploaded_files_input:
     ]
     if new_files:
         st.session_state.uploaded_files.extend(new_files)
+        st.session_state.document_store.add(new_files)
         st.success(f"{len(new_files)} new file(s) uploaded.")
     if duplicate_files:
         st.warning(f"Duplicate files ignored: {', '.join(duplicate_files)}")
@@ -178,6 +210,7 @@ if uploaded_files_input:
 # Handle clear
 if clear_button:
     st.session_state.uploaded_files = []
+    st.session_state.document_store.clear()
     st.session_state.uploaded_file_ids = []
     st.session_state.file_id_to_name = {}
     st.session_state.analysis_results = {
@@ -185,6 +218,7 @@ if clear_button:
         "all_requirements": [],
         "all_folder_structures": [],
         "all_client_infos": [],
+        "all_local_dates": [],
         "summary_response": "",
         "progress_log_messages": [],
         "synthesized_dates": "",
@@ -202,6 +236,7 @@ if clear_button:
     st.session_state.new_files_to_process = []
     st.session_state.uploader_key += 1
     st.session_state.analysis_completed = False
+    st.query_params.pop("job", None)
     st.rerun()
 
 # Tab 2: Analysis
@@ -217,32 +252,126 @@ with tab2:
             if st.session_state.start_analysis:
                 st.session_state.start_analysis = False
                 new_files_to_process = st.session_state.new_files_to_process
-                if new_files_to_process:
-                    new_file_ids, new_file_id_to_name = upload_files(
-                        new_files_to_process,
-                        simulation_mode=st.session_state.simulation_mode,
+                resume_job_id = st.session_state.resume_job_id
+                st.session_state.resume_job_id = None
+                if new_files_to_process or resume_job_id:
+                    simulation_mode = st.session_state.simulation_mode
+                    if resume_job_id:
+                        job_id = resume_job_id
+                        previous_results = job_store.job(job_id)[0]["previous_results"]
+                        # Back to the tender as it was when the job started
+                        st.session_state.uploaded_file_ids = list(
+                            previous_results["file_ids"]
+                        )
+                        st.session_state.file_id_to_name = dict(
+                            previous_results["file_id_to_name"]
+                        )
+                        st.session_state.analysis_results = {
+                            key: previous_results[key]
+                            for key in st.session_state.analysis_results
+                        }
+                    else:
+                        # The syntheses run inside the analysis, over earlier and new files
+                        previous_results = {
+                            "file_ids": list(st.session_state.uploaded_file_ids),
+                            "file_id_to_name": dict(st.session_state.file_id_to_name),
+                            **st.session_state.analysis_results,
+                        }
+                        # Checkpointed as it runs, so it can be resumed if interrupted
+                        job_id = None
+                        if job_store is not None:
+                            try:
+                                job_id = job_store.create(
+                                    {"previous_results": previous_results}
+                                )
+                            except Exception as e:
+                                st.warning(f"Progress will not be saved: {e}")
+                        if job_id is not None:
+                            st.query_params["job"] = job_id
+                    stage_options = dict(
+                        simulation_mode=simulation_mode,
+                        synthesize=True,
+                        previous_results=previous_results,
+                        job_id=job_id,
+                        resume=bool(resume_job_id),
                     )
-                    st.session_state.uploaded_file_ids.extend(new_file_ids)
-                    st.session_state.file_id_to_name.update(new_file_id_to_name)
+                    if PIPELINE_UPLOADS and not resume_job_id:
+                        # Each file is analyzed as soon as its own upload finishes
+                        if not simulation_mode:
+                            cleanup_expired_files()
+                        pipeline_args = (
+                            iter_uploads(
+                                new_files_to_process,
+                                simulation_mode,
+                                known_files=previous_results["file_id_to_name"],
+                            ),
+                            progress_bar,
+                            status_text,
+                            files_text,
+                            st.session_state.document_store,
+                            len(new_files_to_process),
+                        )
+                        if ANALYSIS_ENGINE == "asyncio":
+                            pipeline_output = asyncio.run(
+                                analyze_uploads_async(*pipeline_args, **stage_options)
+                            )
+                        else:
+                            pipeline_output = analyze_uploads(
+                                *pipeline_args, **stage_options
+                            )
+                        (
+                            new_file_ids,
+                            new_file_id_to_name,
+                            failed_uploads,
+                            analysis_output,
+                        ) = pipeline_output
+                        if failed_uploads:
+                            st.warning(f"Failed to upload: {', '.join(failed_uploads)}")
+                        st.session_state.uploaded_file_ids.extend(new_file_ids)
+                        st.session_state.file_id_to_name.update(new_file_id_to_name)
+                    else:
+                        if resume_job_id:
+                            # The files the job had uploaded before it stopped
+                            job_files = job_store.files(job_id)
+                            new_file_ids = [file_id for file_id, _ in job_files]
+                            new_file_id_to_name = dict(job_files)
+                        else:
+                            new_file_ids, new_file_id_to_name = upload_files(
+                                new_files_to_process,
+                                simulation_mode=simulation_mode,
+                                known_files=previous_results["file_id_to_name"],
+                            )
+                        st.session_state.uploaded_file_ids.extend(new_file_ids)
+                        st.session_state.file_id_to_name.update(new_file_id_to_name)
 
-                    total_files = len(new_file_ids)
+                        total_files = len(new_file_ids)
+                        analysis_args = (
+                            new_file_ids,
+                            new_file_id_to_name,
+                            progress_bar,
+                            status_text,
+                            files_text,
+                            st.session_state.document_store,
+                            total_files,
+                        )
+                        if ANALYSIS_ENGINE == "asyncio":
+                            analysis_output = asyncio.run(
+                                analyze_tender_async(*analysis_args, **stage_options)
+                            )
+                        else:
+                            analysis_output = analyze_tender(
+                                *analysis_args, **stage_options
+                            )
                     (
                         new_dates,
                         new_requirements,
                         new_folder_structures,
                         new_client_infos,
+                        new_local_dates,
                         new_summary_response,
                         new_progress_log_messages,
-                    ) = analyze_tender(
-                        new_file_ids,
-                        new_file_id_to_name,
-                        progress_bar,
-                        status_text,
-                        files_text,
-                        st.session_state.uploaded_files,
-                        total_files,
-                        simulation_mode=st.session_state.simulation_mode,
-                    )
+                        synthesized_results,
+                    ) = analysis_output
 
                     st.session_state.analysis_results["all_dates"].extend(new_dates)
                     st.session_state.analysis_results["all_requirements"].extend(
@@ -254,25 +383,22 @@ with tab2:
                     st.session_state.analysis_results["all_client_infos"].extend(
                         new_client_infos
                     )
+                    st.session_state.analysis_results["all_local_dates"].extend(
+                        new_local_dates
+                    )
                     st.session_state.analysis_results["summary_response"] = (
                         new_summary_response
                     )
                     st.session_state.analysis_results["progress_log_messages"].extend(
                         new_progress_log_messages
                     )
-
-                    logger = logging.getLogger("synthesis")
-                    synthesized_results = synthesize_results(
-                        st.session_state.analysis_results["all_dates"],
-                        st.session_state.analysis_results["all_requirements"],
-                        st.session_state.analysis_results["all_folder_structures"],
-                        st.session_state.analysis_results["all_client_infos"],
-                        st.session_state.uploaded_file_ids,
-                        st.session_state.file_id_to_name,
-                        logger,
-                        simulation_mode=st.session_state.simulation_mode,
-                    )
                     st.session_state.analysis_results.update(synthesized_results)
+                    if job_id is not None:
+                        try:
+                            job_store.finish(job_id)
+                        except Exception as e:
+                            st.warning(f"Could not mark the analysis as finished: {e}")
+                        st.query_params.pop("job", None)
 
                 st.session_state.is_analyzing = False
                 st.session_state.new_files_to_process = []
@@ -11,6 +11,53 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ASSISTANT_ID = os.getenv("OPENAI_ASSISTANT_ID")
 TENDERAI_VERSION = "1.0.0" 
 
+# Analysis engine: "threads" (thread pool per file) or "asyncio" (single event loop)
+ANALYSIS_ENGINE = os.getenv("TENDERAI_ANALYSIS_ENGINE", "threads").lower()
+# How run completion is detected: "adaptive" polling, "stream" (server-sent events) or "fixed" 1s polling
+RUN_COMPLETION_STRATEGY = os.getenv("TENDERAI_RUN_COMPLETION", "adaptive").lower()
+# Per-file extraction: "separate" (4 runs), "combined" (1 JSON run) or "parity" (both, compared in the logs)
+EXTRACTION_MODE = os.getenv("TENDERAI_EXTRACTION_MODE", "separate").lower()
+# Start analyzing each file as soon as its upload finishes instead of after all uploads
+PIPELINE_UPLOADS = os.getenv("TENDERAI_PIPELINE_UPLOADS", "true").lower() == "true"
+# Delay new runs until the x-ratelimit-* budgets have room for them
+RATE_LIMIT_ADMISSION = (
+    os.getenv("TENDERAI_RATE_LIMIT_ADMISSION", "true").lower() == "true"
+)
+
+# On-disk cache of assistant responses, keyed by file contents, prompt and assistant settings
+RESPONSE_CACHE_ENABLED = os.getenv("TENDERAI_RESPONSE_CACHE", "true").lower() == "true"
+RESPONSE_CACHE_PATH = os.getenv(
+    "TENDERAI_RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite")
+)
+RESPONSE_CACHE_MAX_MB = int(os.getenv("TENDERAI_RESPONSE_CACHE_MAX_MB", "200"))
+RESPONSE_CACHE_TTL_DAYS = float(os.getenv("TENDERAI_RESPONSE_CACHE_TTL_DAYS", "30"))
+
+# Uploaded files are reused by content hash and deleted once unused for FILE_RETENTION_DAYS
+FILE_REGISTRY_PATH = os.getenv(
+    "TENDERAI_FILE_REGISTRY_PATH", os.path.join(".cache", "files.sqlite")
+)
+FILE_RETENTION_DAYS = float(os.getenv("TENDERAI_FILE_RETENTION_DAYS", "7"))
+FILE_CLEANUP_INTERVAL_HOURS = float(
+    os.getenv("TENDERAI_FILE_CLEANUP_INTERVAL_HOURS", "24")
+)
+
+# Completed per-file and tender-level results of each analysis, so an interrupted one can resume
+JOB_STORE_ENABLED = os.getenv("TENDERAI_JOB_STORE", "true").lower() == "true"
+JOB_STORE_PATH = os.getenv(
+    "TENDERAI_JOB_STORE_PATH", os.path.join(".cache", "jobs.sqlite")
+)
+JOB_RETENTION_DAYS = float(os.getenv("TENDERAI_JOB_RETENTION_DAYS", "7"))
+
+# Simulation mode latency, error and rate-limit injection: inline JSON or a JSON file path
+SIMULATION_PROFILE = os.getenv("TENDERAI_SIMULATION_PROFILE", "")
+
+# Extracted document text kept in memory per tender before spilling to disk
+DOCUMENT_MEMORY_MB = int(os.getenv("TENDERAI_DOCUMENT_MEMORY_MB", "64"))
+# Processes for PDF/DOCX text extraction (0 extracts in the calling thread)
+EXTRACTION_PROCESSES = int(
+    os.getenv("TENDERAI_EXTRACTION_PROCESSES", str(os.cpu_count() or 1))
+)
+
 # Check if API key and assistant ID are required (not in simulation mode)
 if "simulation_mode" in st.session_state and st.session_state.simulation_mode:
     OPENAI_API_KEY = None
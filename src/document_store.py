@@ -0,0 +1,232 @@
+# document_store.py
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from config import EXTRACTION_PROCESSES
+from extraction import ExtractionService, is_supported, iter_pages
+from response_cache import sha256_of
+
+# Shared by every tender in the process; the pool starts on first use
+extraction_service = ExtractionService(EXTRACTION_PROCESSES)
+
+
+class DocumentStore:
+    """Per-tender store of extracted page text, so each document is parsed once.
+
+    Files are looked up by name and their text is keyed by content hash, so
+    renamed copies share one extraction. Recently used documents stay in
+    memory up to `max_memory_bytes`; older ones spill to JSON-lines files in
+    a temporary directory and are read back on demand. Parsing goes through
+    `extractor` (an ExtractionService) when given, else runs in the caller.
+    """
+
+    def __init__(
+        self,
+        files=(),
+        max_memory_bytes=64 * 1024 * 1024,
+        spill_dir=None,
+        extractor=None,
+    ):
+        self.max_memory_bytes = max_memory_bytes
+        self.extractor = extractor
+        self.spill_dir = spill_dir
+        self.parses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self._files = {}
+        self._hashes = {}
+        self._pages = OrderedDict()
+        self._sizes = {}
+        self._memory_bytes = 0
+        self._spilled = set()
+        self._temp_dir = None
+        self._lock = threading.Lock()
+        self._parse_locks = {}
+        self.add(files)
+
+    def add(self, files):
+        with self._lock:
+            for file in files:
+                self._files[file.name] = file
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self._hashes.clear()
+            self._pages.clear()
+            self._sizes.clear()
+            self._memory_bytes = 0
+            self._spilled.clear()
+            self._parse_locks.clear()
+            if self._temp_dir is not None:
+                self._temp_dir.cleanup()
+                self._temp_dir = None
+                self.spill_dir = None
+
+    def __contains__(self, file_name):
+        return file_name in self._files
+
+    def file(self, file_name):
+        return self._files.get(file_name)
+
+    def content_hash(self, file_name):
+        file = self._files.get(file_name)
+        if file is None:
+            return None
+        content_hash = self._hashes.get(file_name)
+        if content_hash is None:
+            content_hash = sha256_of(file.getbuffer())
+            self._hashes[file_name] = content_hash
+        return content_hash
+
+    def supports(self, file_name):
+        """True for stored PDF and DOCX files."""
+        return file_name in self._files and is_supported(file_name)
+
+    def iter_pages(self, file_name):
+        """Yield the page texts of a stored PDF or DOCX lazily.
+
+        A document larger than the memory budget is written through to its
+        spill file as it is extracted instead of being held in memory, so
+        streaming consumers keep a flat footprint however large it is.
+        """
+        if not self.supports(file_name):
+            return
+        content_hash = self.content_hash(file_name)
+        with self._lock:
+            pages = self._memory_pages(content_hash)
+            parse_lock = self._parse_locks.setdefault(content_hash, threading.Lock())
+        if pages is not None:
+            yield from pages
+            return
+        # Concurrent callers for the same document wait for a single parse
+        with parse_lock:
+            with self._lock:
+                pages = self._memory_pages(content_hash)
+                spilled = content_hash in self._spilled
+                if spilled:
+                    self.disk_hits += 1
+            if pages is not None:
+                yield from pages
+            elif spilled:
+                yield from self._keep_streamed(
+                    content_hash, self._read_spill(content_hash), parsed=False
+                )
+            else:
+                yield from self._keep_streamed(
+                    content_hash, self._extract(file_name), parsed=True
+                )
+
+    def pages(self, file_name):
+        """Page texts of a stored PDF or DOCX, or None for unknown or unsupported files."""
+        if not self.supports(file_name):
+            return None
+        return list(self.iter_pages(file_name))
+
+    def text(self, file_name):
+        pages = self.pages(file_name)
+        return None if pages is None else "\n".join(pages)
+
+    def estimate_tokens(self, file_name):
+        """Rough token count of a document (about four characters per token)."""
+        return sum(len(page) for page in self.iter_pages(file_name)) // 4
+
+    def _extract(self, file_name):
+        # A view of the upload's bytes, so large documents are never copied whole
+        with self._files[file_name].getbuffer() as data:
+            if self.extractor is not None:
+                yield from self.extractor.iter_pages(file_name, data)
+            else:
+                yield from iter_pages(file_name, data)
+
+    def _memory_pages(self, content_hash):
+        pages = self._pages.get(content_hash)
+        if pages is not None:
+            self._pages.move_to_end(content_hash)
+            self.memory_hits += 1
+        return pages
+
+    def _read_spill(self, content_hash):
+        with self._lock:
+            path = self._spill_path(content_hash)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def _keep_streamed(self, content_hash, pages, parsed):
+        """Pass pages through, then keep them in memory if they fit the budget.
+
+        Freshly parsed documents that do not fit are spilled page by page.
+        """
+        kept = []
+        size = 0
+        spill = None
+        try:
+            for page in pages:
+                yield page
+                if kept is not None:
+                    kept.append(page)
+                    size += len(page)
+                    if size > self.max_memory_bytes:
+                        if parsed:
+                            with self._lock:
+                                path = self._spill_path(content_hash)
+                            spill = open(path, "w", encoding="utf-8")
+                            for kept_page in kept:
+                                spill.write(json.dumps(kept_page) + "\n")
+                        kept = None
+                elif spill is not None:
+                    spill.write(json.dumps(page) + "\n")
+        except BaseException:
+            # Failed or abandoned part-way: keep nothing
+            if spill is not None:
+                spill.close()
+                os.remove(spill.name)
+            raise
+        with self._lock:
+            if parsed:
+                self.parses += 1
+            if spill is not None:
+                spill.close()
+                self._spilled.add(content_hash)
+            elif kept is not None:
+                self._keep(content_hash, kept)
+
+    def _keep(self, content_hash, pages):
+        size = sum(len(page) for page in pages)
+        self._pages[content_hash] = pages
+        self._sizes[content_hash] = size
+        self._memory_bytes += size
+        # Spill least recently used documents, always keeping the newest in memory
+        while self._memory_bytes > self.max_memory_bytes and len(self._pages) > 1:
+            old_hash, old_pages = self._pages.popitem(last=False)
+            self._memory_bytes -= self._sizes[old_hash]
+            if old_hash not in self._spilled:
+                with open(self._spill_path(old_hash), "w", encoding="utf-8") as f:
+                    for page in old_pages:
+                        f.write(json.dumps(page) + "\n")
+                self._spilled.add(old_hash)
+
+    def _spill_path(self, content_hash):
+        if self.spill_dir is None:
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="tenderai-docs-")
+            self.spill_dir = self._temp_dir.name
+        elif not os.path.exists(self.spill_dir):
+            os.makedirs(self.spill_dir)
+        return os.path.join(self.spill_dir, f"{content_hash}.json")
+
+    def snapshot(self):
+        with self._lock:
+            return self.parses, self.memory_hits, self.disk_hits
+
+    def report(self, since=(0, 0, 0)):
+        parses = self.parses - since[0]
+        memory_hits = self.memory_hits - since[1]
+        disk_hits = self.disk_hits - since[2]
+        return (
+            f"Document store: {parses} parsed, {memory_hits} served from memory, "
+            f"{disk_hits} from disk"
+        )
@@ -0,0 +1,336 @@
+# extraction.py
+# Kept free of Streamlit and config imports: worker processes import this module.
+import io
+import math
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+from docx import Document
+from lxml import etree
+from pypdf import PdfReader
+
+# Smallest page range handed to one extraction process
+MIN_PAGES_PER_TASK = 8
+# Largest page range extracted by one PDF reader, which bounds its object cache
+MAX_PAGES_PER_TASK = 64
+# Bytes copied into a worker's temporary file at a time
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_HEADER_FOOTER = re.compile(r"word/(header|footer)(\d*)\.xml")
+
+
+def is_supported(file_name):
+    return file_name.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable read-only stream over bytes or a memoryview, without copying them."""
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer).cast("B")
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        self._position = max(offset, 0)
+        return self._position
+
+    def read(self, size=-1):
+        stop = len(self._buffer)
+        if size is not None and size >= 0:
+            stop = min(self._position + size, stop)
+        data = self._buffer[self._position : stop].tobytes()
+        self._position += len(data)
+        return data
+
+    def readinto(self, target):
+        data = self.read(len(target))
+        target[: len(data)] = data
+        return len(data)
+
+
+def open_source(source):
+    """A file path as is, or a stream over the bytes or buffer of a document."""
+    return source if isinstance(source, str) else BufferReader(source)
+
+
+def extract_text_from_docx(file):
+    """Extract text from a .docx file."""
+    doc = Document(file)
+    full_text = []
+    for para in doc.paragraphs:
+        full_text.append(para.text)
+    return "\n".join(full_text)
+
+
+def docx_part_names(names):
+    """Header parts, word/document.xml, then footer parts, in numeric order."""
+    headers = []
+    footers = []
+    for name in names:
+        match = _DOCX_HEADER_FOOTER.fullmatch(name)
+        if match is not None:
+            kind, number = match.groups()
+            parts = headers if kind == "header" else footers
+            parts.append((int(number or 0), name))
+    return (
+        [name for _, name in sorted(headers)]
+        + ["word/document.xml"]
+        + [name for _, name in sorted(footers)]
+    )
+
+
+def paragraph_text(paragraph):
+    """Text of a w:p element, read the way python-docx reads Paragraph.text."""
+    text = []
+    for element in paragraph.iter(
+        W + "t", W + "tab", W + "ptab", W + "br", W + "cr", W + "noBreakHyphen"
+    ):
+        tag = element.tag
+        if tag == W + "t":
+            text.append(element.text or "")
+        elif tag in (W + "tab", W + "ptab"):
+            text.append("\t")
+        elif tag == W + "noBreakHyphen":
+            text.append("-")
+        elif (
+            tag == W + "cr" or element.get(W + "type", "textWrapping") == "textWrapping"
+        ):
+            text.append("\n")
+    return "".join(text)
+
+
+def iter_docx_lines(part):
+    """Yield one line per paragraph of a WordprocessingML part, streamed with iterparse.
+
+    Table rows come out as one line in document order, their cells joined by
+    " | " and the paragraphs of a cell by spaces; a nested table is inlined
+    into its cell. Parsed elements are released as soon as they are read.
+    """
+    # One [cells, cell paragraphs] entry per table row currently open
+    rows = []
+    for event, element in etree.iterparse(
+        part, events=("start", "end"), tag=(W + "p", W + "tc", W + "tr")
+    ):
+        tag = element.tag
+        if event == "start":
+            if tag == W + "tr":
+                rows.append([[], []])
+            elif tag == W + "tc":
+                rows[-1][1] = []
+            continue
+        if tag == W + "p":
+            line = paragraph_text(element)
+        elif tag == W + "tc":
+            cells, paragraphs = rows[-1]
+            cells.append(" ".join(paragraph for paragraph in paragraphs if paragraph))
+            continue
+        else:
+            cells, _ = rows.pop()
+            line = " | ".join(cells)
+        # Paragraphs nested in text boxes are cleared here and not read twice
+        element.clear()
+        if rows:
+            if line:
+                rows[-1][1].append(line)
+            continue
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+        yield line
+
+
+def iter_docx_parts(source):
+    """Yield the text of the headers, body and footers of a DOCX (path or buffer).
+
+    Empty header and footer parts, and repeats of one already yielded (first
+    page and even page variants often are), are skipped.
+    """
+    seen = set()
+    with zipfile.ZipFile(open_source(source)) as archive:
+        names = set(archive.namelist())
+        for name in docx_part_names(names):
+            if name not in names:
+                continue
+            with archive.open(name) as part:
+                text = "\n".join(iter_docx_lines(part))
+            if name != "word/document.xml":
+                if not text or text in seen:
+                    continue
+                seen.add(text)
+            yield text
+
+
+def extract_docx_text(source):
+    """Text of a DOCX including its tables, headers and footers."""
+    return "\n".join(iter_docx_parts(source))
+
+
+def extract_pages(file_name, data):
+    """Return the text of each page of a PDF, or of each part of a DOCX, or None."""
+    if not is_supported(file_name):
+        return None
+    return list(iter_pages(file_name, data))
+
+
+def iter_pages(file_name, data):
+    """Yield the text of each page of a PDF or DOCX in the calling thread.
+
+    `data` is a file path, bytes or a buffer such as an upload's getbuffer().
+    """
+    if file_name.lower().endswith(".pdf"):
+        yield from iter_pdf_pages(data)
+    elif file_name.lower().endswith(".docx"):
+        yield from iter_docx_parts(data)
+
+
+def open_pdf(source):
+    """Open a PDF from a file path or from its bytes or buffer."""
+    return PdfReader(open_source(source))
+
+
+def pdf_page_count(source):
+    return len(open_pdf(source).pages)
+
+
+def extract_pdf_range(source, start, stop):
+    """Text of pages [start, stop) of a PDF."""
+    pdf_reader = open_pdf(source)
+    return [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(source, start=0):
+    """Yield page texts lazily, opening a fresh reader for every page range."""
+    page_count = pdf_page_count(source)
+    for range_start in range(start, page_count, MAX_PAGES_PER_TASK):
+        range_stop = min(range_start + MAX_PAGES_PER_TASK, page_count)
+        yield from extract_pdf_range(source, range_start, range_stop)
+
+
+def page_ranges(
+    page_count,
+    processes,
+    min_pages=MIN_PAGES_PER_TASK,
+    max_pages=MAX_PAGES_PER_TASK,
+):
+    """Split pages into about two ranges per process, for balance across uneven pages."""
+    size = max(min_pages, math.ceil(page_count / max(processes * 2, 1)))
+    size = min(size, max(max_pages, min_pages))
+    return [
+        (start, min(start + size, page_count)) for start in range(0, page_count, size)
+    ]
+
+
+def spool(data, suffix):
+    """Write a document's bytes or buffer to a temporary file, a chunk at a time."""
+    view = memoryview(data).cast("B")
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        for start in range(0, len(view), SPOOL_CHUNK_BYTES):
+            f.write(view[start : start + SPOOL_CHUNK_BYTES])
+    return f.name
+
+
+class ExtractionService:
+    """Runs PDF and DOCX text extraction on a process pool.
+
+    Extraction is CPU-bound and would otherwise hold the GIL on the threads
+    that poll the API. PDFs are split into page ranges extracted in parallel
+    and yielded back in page order, with only a few ranges in flight so memory
+    stays flat however long the document is. With `processes=0`, or if the
+    pool cannot be used, extraction runs in the calling thread.
+    """
+
+    def __init__(self, processes):
+        self.processes = processes
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Spawned workers do not inherit the app's threads or locks
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def extract_pages(self, file_name, data):
+        if not is_supported(file_name):
+            return None
+        return list(self.iter_pages(file_name, data))
+
+    def iter_pages(self, file_name, data):
+        """Yield the text of each page in order."""
+        if self.processes < 1:
+            yield from iter_pages(file_name, data)
+        elif file_name.lower().endswith(".pdf"):
+            yield from self._iter_pdf_pages(data)
+        elif file_name.lower().endswith(".docx"):
+            path = spool(data, ".docx")
+            try:
+                pages = self._get_pool().submit(extract_pages, file_name, path)
+                yield from pages.result()
+            except BrokenProcessPool:
+                self.shutdown()
+                yield from iter_pages(file_name, path)
+            finally:
+                os.remove(path)
+
+    def _iter_pdf_pages(self, data):
+        # Workers read the PDF from a temporary file instead of each being sent a copy
+        path = spool(data, ".pdf")
+        done = 0
+        pending = deque()
+        try:
+            pool = self._get_pool()
+            ranges = iter(
+                page_ranges(pool.submit(pdf_page_count, path).result(), self.processes)
+            )
+            pending.extend(
+                pool.submit(extract_pdf_range, path, start, stop)
+                for start, stop in islice(ranges, self.processes * 2)
+            )
+            while pending:
+                pages = pending.popleft().result()
+                next_range = next(ranges, None)
+                if next_range is not None:
+                    pending.append(pool.submit(extract_pdf_range, path, *next_range))
+                done += len(pages)
+                yield from pages
+        except BrokenProcessPool:
+            self.shutdown()
+            yield from iter_pdf_pages(path, start=done)
+        finally:
+            # Left early: drop ranges nobody will read
+            for future in pending:
+                future.cancel()
+            os.remove(path)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,478 @@
+# fake_openai.py
+"""Local stand-in for the OpenAI Files, Assistants, Threads, Messages and Runs APIs.
+
+Serves the endpoints TenderAI calls, with run durations, failures and
+x-ratelimit-* budgets drawn from a SimulationProfile, so the whole upload ->
+thread -> run -> poll -> messages flow can be benchmarked offline. Point the
+app at it with OPENAI_BASE_URL:
+
+    python src/fake_openai.py --port 8765 --profile resources/simulation_profile.json
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run src/app.py
+"""
+
+import argparse
+import email.parser
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+
+from prompts import (
+    CLIENT_INFO_PROMPT,
+    COMBINED_EXTRACTION_PROMPT,
+    DATES_PROMPT,
+    FINAL_SUMMARY_PROMPT,
+    FOLDER_STRUCTURE_PROMPT,
+    MERGE_SUMMARIES_PROMPT,
+    REQUIREMENTS_PROMPT,
+    SUMMARY_PROMPT,
+    SYNTHESIZE_CLIENT_INFO_PROMPT,
+    SYNTHESIZE_DATES_PROMPT,
+    SYNTHESIZE_FOLDER_STRUCTURE_PROMPT,
+    SYNTHESIZE_REQUIREMENTS_PROMPT,
+)
+from simulation import SimulationProfile
+from utils import load_mock_response
+
+# Prompt templates and the mock response (and task kind) that answers them
+PROMPT_TYPES = [
+    (COMBINED_EXTRACTION_PROMPT, "Combined Extraction"),
+    (DATES_PROMPT, "Dates"),
+    (SYNTHESIZE_DATES_PROMPT, "Dates"),
+    (REQUIREMENTS_PROMPT, "Requirements"),
+    (SYNTHESIZE_REQUIREMENTS_PROMPT, "Requirements"),
+    (FOLDER_STRUCTURE_PROMPT, "Folder Structure"),
+    (SYNTHESIZE_FOLDER_STRUCTURE_PROMPT, "Folder Structure"),
+    (CLIENT_INFO_PROMPT, "Client Info"),
+    (SYNTHESIZE_CLIENT_INFO_PROMPT, "Client Info"),
+    (SUMMARY_PROMPT, "Tender Summary"),
+    (FINAL_SUMMARY_PROMPT, "Tender Summary"),
+    (MERGE_SUMMARIES_PROMPT, "Tender Summary"),
+]
+# Leading characters of a template compared with a prompt
+PROMPT_PREFIX_CHARS = 80
+
+_ROUTES = [
+    ("POST", r"/files", "create_file"),
+    ("GET", r"/files/(?P<file_id>[^/]+)", "retrieve_file"),
+    ("DELETE", r"/files/(?P<file_id>[^/]+)", "delete_file"),
+    ("GET", r"/assistants/(?P<assistant_id>[^/]+)", "retrieve_assistant"),
+    ("POST", r"/threads", "create_thread"),
+    ("POST", r"/threads/(?P<thread_id>[^/]+)/messages", "create_message"),
+    ("GET", r"/threads/(?P<thread_id>[^/]+)/messages", "list_messages"),
+    ("POST", r"/threads/(?P<thread_id>[^/]+)/runs", "create_run"),
+    ("GET", r"/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)", "retrieve_run"),
+]
+ROUTES = [
+    (method, re.compile(rf"(?:/v1)?{path}/?"), handler)
+    for method, path, handler in _ROUTES
+]
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "expired")
+
+
+def prompt_prefix(template):
+    """Start of a template up to its first placeholder, as prompts begin."""
+    head = template.split("{", 1)[0].strip()
+    return head[:PROMPT_PREFIX_CHARS]
+
+
+PROMPT_PREFIXES = [(prompt_prefix(template), kind) for template, kind in PROMPT_TYPES]
+
+
+def prompt_type(prompt):
+    """Task kind a prompt was built for, or "Unknown"."""
+    prompt = prompt.strip()
+    for prefix, kind in PROMPT_PREFIXES:
+        if prefix and prompt.startswith(prefix):
+            return kind
+    return "Unknown"
+
+
+class FakeOpenAIState:
+    """Objects held by the fake API, and the runs' simulated progress."""
+
+    def __init__(self, profile, model="gpt-4o-mini"):
+        self.profile = profile
+        self.model = model
+        self.files = {}
+        self.threads = {}
+        self.runs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def new_id(self, prefix):
+        return f"{prefix}_{next(self._ids):06d}"
+
+    def run_object(self, run_id):
+        """The run's current API object, finishing it once its duration has passed."""
+        with self._lock:
+            run = self.runs[run_id]
+            if run["status"] not in TERMINAL_STATUSES:
+                if time.monotonic() - run["started"] < run["duration"]:
+                    run["status"] = "in_progress"
+                else:
+                    self._finish(run)
+            return dict(run["object"], status=run["status"])
+
+    def _finish(self, run):
+        run["status"] = run["outcome"]
+        run["object"]["completed_at"] = int(time.time())
+        run["object"]["last_error"] = run["last_error"]
+        run["object"]["usage"] = run["usage"]
+        if run["status"] == "completed":
+            thread = self.threads[run["object"]["thread_id"]]
+            thread["messages"].append(
+                self.message_object(
+                    thread["id"],
+                    "assistant",
+                    run["answer"],
+                    annotations=run["annotations"],
+                    run_id=run["object"]["id"],
+                )
+            )
+
+    def message_object(self, thread_id, role, text, annotations=(), run_id=None):
+        return {
+            "id": self.new_id("msg"),
+            "object": "thread.message",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "role": role,
+            "content": [
+                {
+                    "type": "text",
+                    "text": {"value": text, "annotations": list(annotations)},
+                }
+            ],
+            "attachments": [],
+            "assistant_id": None,
+            "run_id": run_id,
+            "status": "completed",
+            "metadata": {},
+        }
+
+
+def answer_for(prompt, file_ids):
+    """Mock answer for a prompt, citing the first attached file outside JSON answers."""
+    kind = prompt_type(prompt)
+    text = load_mock_response(kind)
+    annotations = []
+    if file_ids and kind != "Combined Extraction":
+        marker = "【4:0†source】"
+        annotations.append(
+            {
+                "type": "file_citation",
+                "text": marker,
+                "start_index": len(text),
+                "end_index": len(text) + len(marker),
+                "file_citation": {"file_id": file_ids[0]},
+            }
+        )
+        text += marker
+    return kind, text, annotations
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Set on the server class built by make_server
+    state = None
+    request_latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def dispatch(self, method):
+        path = self.path.split("?", 1)[0]
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+        if self.request_latency:
+            time.sleep(self.request_latency)
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.fullmatch(path)
+            if route_method == method and match:
+                return getattr(self, handler)(**match.groupdict())
+        self.send_error_json(404, f"Unknown route {method} {path}", "not_found")
+
+    def json_body(self):
+        return json.loads(self.body or b"{}")
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in {**self.state.profile.headers(), **(headers or {})}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_json(self, status, message, code, headers=None):
+        self.send_json(
+            status,
+            {"error": {"message": message, "type": code, "code": code}},
+            headers,
+        )
+
+    # Files
+
+    def create_file(self):
+        content_type = self.headers.get("Content-Type", "")
+        form = email.parser.BytesParser().parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + self.body
+        )
+        fields = {}
+        for part in form.get_payload() if form.is_multipart() else ():
+            fields[part.get_param("name", header="content-disposition")] = part
+        upload = fields.get("file")
+        if upload is None:
+            return self.send_error_json(400, "Missing file", "invalid_request_error")
+        data = upload.get_payload(decode=True) or b""
+        file_object = {
+            "id": self.state.new_id("file"),
+            "object": "file",
+            "bytes": len(data),
+            "created_at": int(time.time()),
+            "filename": upload.get_filename(),
+            "purpose": fields["purpose"].get_payload() if "purpose" in fields else "",
+            "status": "processed",
+        }
+        self.state.files[file_object["id"]] = file_object
+        self.send_json(200, file_object)
+
+    def retrieve_file(self, file_id):
+        file_object = self.state.files.get(file_id)
+        if file_object is None:
+            return self.send_error_json(404, f"No such File object: {file_id}", "")
+        self.send_json(200, file_object)
+
+    def delete_file(self, file_id):
+        if self.state.files.pop(file_id, None) is None:
+            return self.send_error_json(404, f"No such File object: {file_id}", "")
+        self.send_json(200, {"id": file_id, "object": "file", "deleted": True})
+
+    # Assistants, threads and messages
+
+    def retrieve_assistant(self, assistant_id):
+        self.send_json(
+            200,
+            {
+                "id": assistant_id,
+                "object": "assistant",
+                "created_at": 0,
+                "name": "TenderAI (fake)",
+                "description": None,
+                "model": self.state.model,
+                "instructions": "",
+                "tools": [{"type": "file_search"}],
+                "metadata": {},
+                "temperature": 1.0,
+                "top_p": 1.0,
+                "response_format": "auto",
+            },
+        )
+
+    def create_thread(self):
+        thread = {
+            "id": self.state.new_id("thread"),
+            "object": "thread",
+            "created_at": int(time.time()),
+            "metadata": {},
+            "messages": [],
+        }
+        self.state.threads[thread["id"]] = thread
+        self.send_json(
+            200, {key: value for key, value in thread.items() if key != "messages"}
+        )
+
+    def create_message(self, thread_id):
+        thread = self.state.threads.get(thread_id)
+        if thread is None:
+            return self.send_error_json(404, f"No thread found with id {thread_id}", "")
+        body = self.json_body()
+        content = body.get("content", "")
+        if not isinstance(content, str):
+            content = "".join(block.get("text", "") for block in content)
+        message = self.state.message_object(
+            thread_id, body.get("role", "user"), content
+        )
+        message["attachments"] = body.get("attachments") or []
+        thread["messages"].append(message)
+        self.send_json(200, message)
+
+    def list_messages(self, thread_id):
+        thread = self.state.threads.get(thread_id)
+        if thread is None:
+            return self.send_error_json(404, f"No thread found with id {thread_id}", "")
+        data = list(reversed(thread["messages"]))
+        self.send_json(
+            200,
+            {
+                "object": "list",
+                "data": data,
+                "first_id": data[0]["id"] if data else None,
+                "last_id": data[-1]["id"] if data else None,
+                "has_more": False,
+            },
+        )
+
+    # Runs
+
+    def create_run(self, thread_id):
+        thread = self.state.threads.get(thread_id)
+        if thread is None:
+            return self.send_error_json(404, f"No thread found with id {thread_id}", "")
+        body = self.json_body()
+        prompt = ""
+        file_ids = []
+        for message in thread["messages"]:
+            if message["role"] == "user":
+                prompt = message["content"][0]["text"]["value"]
+                file_ids = [a["file_id"] for a in message["attachments"]]
+        kind, answer, annotations = answer_for(prompt, file_ids)
+        latency, error, planned, _ = self.state.profile.plan(kind)
+        if isinstance(error, openai.RateLimitError):
+            return self.send_error_json(
+                429,
+                str(error),
+                "rate_limit_exceeded",
+                {"retry-after-ms": error.response.headers["retry-after-ms"]},
+            )
+        run_object = {
+            "id": self.state.new_id("run"),
+            "object": "thread.run",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "assistant_id": body.get("assistant_id"),
+            "status": "queued",
+            "model": self.state.model,
+            "instructions": "",
+            "tools": body.get("tools") or [],
+            "metadata": {},
+            "last_error": None,
+            "usage": None,
+            "parallel_tool_calls": True,
+            "truncation_strategy": {"type": "auto", "last_messages": None},
+            "response_format": "auto",
+            "tool_choice": "auto",
+        }
+        # A run that would time out on the client expires on the server
+        outcome = "expired" if error is not None else planned.status
+        last_error = planned.last_error if planned is not None else None
+        tokens = self.state.profile.run_tokens(kind)
+        self.state.runs[run_object["id"]] = {
+            "object": run_object,
+            "status": "queued",
+            "outcome": outcome,
+            "started": time.monotonic(),
+            "duration": latency,
+            "answer": answer,
+            "annotations": annotations,
+            "last_error": (
+                {"code": last_error.code, "message": last_error.message}
+                if last_error is not None
+                else None
+            ),
+            "usage": {
+                "prompt_tokens": tokens - tokens // 4,
+                "completion_tokens": tokens // 4,
+                "total_tokens": tokens,
+            },
+        }
+        if body.get("stream"):
+            return self.stream_run(run_object["id"], latency)
+        self.send_json(200, self.state.run_object(run_object["id"]))
+
+    def retrieve_run(self, thread_id, run_id):
+        if run_id not in self.state.runs:
+            return self.send_error_json(404, f"No run found with id {run_id}", "")
+        self.send_json(200, self.state.run_object(run_id))
+
+    def stream_run(self, run_id, latency):
+        """Answer a streamed run with server-sent events until it finishes."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        for name, value in self.state.profile.headers().items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.close_connection = True
+        self.send_event("thread.run.created", self.state.run_object(run_id))
+        time.sleep(latency)
+        run = self.state.run_object(run_id)
+        self.send_event(f"thread.run.{run['status']}", run)
+        self.wfile.write(b"event: done\ndata: [DONE]\n\n")
+
+    def send_event(self, event, data):
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+        self.wfile.flush()
+
+
+def make_server(host="127.0.0.1", port=0, profile=None, request_latency=0.0):
+    """A fake API server; port 0 picks a free port (see server.server_address)."""
+    handler = type(
+        "ConfiguredFakeOpenAIHandler",
+        (FakeOpenAIHandler,),
+        {
+            "state": FakeOpenAIState(profile or SimulationProfile()),
+            "request_latency": request_latency,
+        },
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_server(**kwargs):
+    """Serve on a background thread; return (server, base_url)."""
+    server = make_server(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake OpenAI API for TenderAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--profile",
+        default="",
+        help="simulation profile: inline JSON or a JSON file path",
+    )
+    parser.add_argument(
+        "--request-latency",
+        type=float,
+        default=0.0,
+        help="seconds added to every request",
+    )
+    args = parser.parse_args()
+    server = make_server(
+        args.host,
+        args.port,
+        SimulationProfile.load(args.profile),
+        args.request_latency,
+    )
+    print(f"Fake OpenAI API on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,152 @@
 import streamlit as st
 import openai
 import os
-import tempfile
 import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import (
+    FILE_CLEANUP_INTERVAL_HOURS,
+    FILE_REGISTRY_PATH,
+    FILE_RETENTION_DAYS,
+)
+from file_registry import FileRegistry
+from response_cache import remember_file_hash, sha256_of
 
+# Re-check that a registered file still exists on OpenAI after this long
+FILE_VERIFY_INTERVAL_SECONDS = 3600
+# Number of files uploaded in parallel
+UPLOAD_CONCURRENCY = 8
 
-def upload_files(uploaded_files, simulation_mode):
-    uploaded_file_ids = []
+# Outcome of one file upload; duplicate_of names an earlier file with the same content
+UploadResult = namedtuple(
+    "UploadResult", ["index", "file", "file_id", "reused", "error", "duplicate_of"]
+)
+
+file_registry = FileRegistry(
+    FILE_REGISTRY_PATH, retention_seconds=FILE_RETENTION_DAYS * 24 * 3600
+)
+
+
+def find_reusable_file(content_hash):
+    """Return the OpenAI file ID already holding this content, if it is still live."""
+    entry = file_registry.lookup(content_hash)
+    if entry is None:
+        return None
+    file_id, verified_at = entry
+    if time.time() - verified_at > FILE_VERIFY_INTERVAL_SECONDS:
+        try:
+            openai.files.retrieve(file_id)
+        except openai.NotFoundError:
+            file_registry.forget(content_hash)
+            return None
+        except Exception:
+            # Cannot tell whether the file is still there: keep using it and check
+            # again next time, rather than orphan it behind a fresh copy
+            return file_id
+        file_registry.mark_verified(content_hash)
+    return file_id
+
+
+def cleanup_expired_files():
+    """Delete registered files unused for longer than the retention period.
+
+    Runs at most once per FILE_CLEANUP_INTERVAL_HOURS across sessions.
+    """
+    if not file_registry.cleanup_due(FILE_CLEANUP_INTERVAL_HOURS * 3600):
+        return
+    for content_hash, file_id in file_registry.expired():
+        try:
+            openai.files.delete(file_id)
+        except openai.NotFoundError:
+            pass
+        except Exception as e:
+            st.warning(f"Failed to delete expired file {file_id}: {str(e)}")
+            continue
+        file_registry.forget(content_hash)
+
+
+def format_file_size(size):
+    return (
+        f"{size / 1024:.1f}KB"
+        if size < 1024 * 1024
+        else f"{size / (1024 * 1024):.1f}MB"
+    )
+
+
+def upload_file_content(file, content_hash):
+    """Upload one file straight from its in-memory buffer; return (file_id, reused)."""
+    reused_file_id = find_reusable_file(content_hash)
+    if reused_file_id:
+        remember_file_hash(reused_file_id, content_hash)
+        return reused_file_id, True
+
+    file.seek(0)
+    uploaded_file = openai.files.create(file=(file.name, file), purpose="assistants")
+    remember_file_hash(uploaded_file.id, content_hash)
+    file_registry.register(content_hash, uploaded_file.id, file.name, file.size)
+    return uploaded_file.id, False
+
+
+def iter_uploads(
+    uploaded_files, simulation_mode, concurrency=UPLOAD_CONCURRENCY, known_files=None
+):
+    """Upload files concurrently, yielding an UploadResult as each one finishes.
+
+    Files with the same content as an earlier file in the list are yielded
+    with `duplicate_of` set and are not uploaded again. So are files that
+    turn out to reuse the file ID of one in `known_files` ({file_id: name}),
+    the files already in the tender.
+    """
+    known_files = known_files or {}
+    pending = []
+    first_by_hash = {}
+    for i, file in enumerate(uploaded_files):
+        file_extension = os.path.splitext(file.name)[1]
+        if file_extension not in [".pdf", ".docx"]:
+            yield UploadResult(
+                i, file, None, False, f"Unsupported file type: {file_extension}", None
+            )
+            continue
+        if simulation_mode:
+            # Mock file ID
+            yield UploadResult(i, file, f"mock_file_id_{i}", False, None, None)
+            continue
+        content_hash = sha256_of(file.getbuffer())
+        if content_hash in first_by_hash:
+            yield UploadResult(i, file, None, False, None, first_by_hash[content_hash])
+            continue
+        first_by_hash[content_hash] = file.name
+        pending.append((i, file, content_hash))
+
+    if not pending:
+        return
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="tender-upload"
+    ) as executor:
+        futures = {
+            executor.submit(upload_file_content, file, content_hash): (i, file)
+            for i, file, content_hash in pending
+        }
+        for future in as_completed(futures):
+            i, file = futures[future]
+            try:
+                file_id, reused = future.result()
+            except Exception as e:
+                yield UploadResult(i, file, None, False, str(e), None)
+            else:
+                if file_id in known_files:
+                    yield UploadResult(i, file, None, False, None, known_files[file_id])
+                else:
+                    yield UploadResult(i, file, file_id, reused, None, None)
+
+
+def upload_files(uploaded_files, simulation_mode, known_files=None):
     failed_uploads = []
     total_files = len(uploaded_files)
-    file_id_to_name = {}
+    uploaded_by_index = {}
+
+    if not simulation_mode:
+        cleanup_expired_files()
 
     # Use a single spinner for the entire upload process
     with st.spinner(""):
@@ -17,67 +154,39 @@ def upload_files(uploaded_files, simulation_mode):
         status_text = st.empty()
         # Progress bar for visual feedback
         progress_bar = st.progress(0)
+        status_text.text(f"Uploading {total_files} file(s)...")
 
-        for i, file in enumerate(uploaded_files):
-            # Update status text
-            file_size = (
-                f"{file.size / 1024:.1f}KB"
-                if file.size < 1024 * 1024
-                else f"{file.size / (1024 * 1024):.1f}MB"
-            )
-            status_text.text(
-                f"Uploading file {i+1} of {total_files}: {file.name} ({file_size})..."
-            )
-
-            # Update progress bar
-            progress_bar.progress((i + 1) / total_files)
-
-            file_extension = os.path.splitext(file.name)[1]
-            if file_extension not in [".pdf", ".docx"]:
-                st.error(f"Unsupported file type: {file_extension}")
+        # Progress is reported as each upload finishes, in completion order
+        uploads = iter_uploads(uploaded_files, simulation_mode, known_files=known_files)
+        for done, result in enumerate(uploads, 1):
+            file = result.file
+            if result.duplicate_of:
+                st.warning(
+                    f"{file.name} has the same content as {result.duplicate_of} and was skipped."
+                )
+            elif result.error:
+                st.error(f"Failed to upload file {file.name}: {result.error}")
                 failed_uploads.append(file.name)
-                continue
-
-            if simulation_mode:
-                # Mock file ID
-                mock_file_id = f"mock_file_id_{i}"
-                uploaded_file_ids.append(mock_file_id)
-                file_id_to_name[mock_file_id] = file.name
             else:
-                # Create temporary file
-                temp_file_path = None
-                try:
-                    with tempfile.NamedTemporaryFile(
-                        delete=False, suffix=file_extension
-                    ) as temp_file:
-                        temp_file.write(file.getvalue())
-                        temp_file_path = temp_file.name
-
-                    with open(temp_file_path, "rb") as f:
-                        uploaded_file = openai.files.create(
-                            file=f, purpose="assistants"
-                        )
-                        uploaded_file_ids.append(uploaded_file.id)
-                        file_id_to_name[uploaded_file.id] = file.name
-
-                except Exception as e:
-                    st.error(f"Failed to upload file {file.name}: {str(e)}")
-                    failed_uploads.append(file.name)
-                    continue
-                finally:
-                    # Clean up temporary file
-                    if temp_file_path and os.path.exists(temp_file_path):
-                        try:
-                            os.remove(temp_file_path)
-                        except Exception as e:
-                            st.warning(
-                                f"Failed to clean up temporary file {temp_file_path}: {str(e)}"
-                            )
+                uploaded_by_index[result.index] = (result.file_id, file.name)
+                status_text.text(
+                    f"Uploaded file {done} of {total_files}: {file.name} "
+                    f"({format_file_size(file.size)}{', reused' if result.reused else ''})"
+                )
+            progress_bar.progress(done / total_files)
 
         # Clear the status text and progress bar
         status_text.empty()
         progress_bar.empty()
 
+    # Keep the IDs in the order the files were given
+    uploaded_file_ids = []
+    file_id_to_name = {}
+    for i in sorted(uploaded_by_index):
+        file_id, file_name = uploaded_by_index[i]
+        uploaded_file_ids.append(file_id)
+        file_id_to_name[file_id] = file_name
+
     # Display summary of failed uploads, if any
     if failed_uploads:
         st.warning(
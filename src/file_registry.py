@@ -0,0 +1,93 @@
+# file_registry.py
+import os
+import sqlite3
+import threading
+import time
+
+
+class FileRegistry:
+    """Persistent map from the SHA-256 of a file's content to its OpenAI file ID.
+
+    Uploaded files are kept on the OpenAI side and reused by later analyses and
+    sessions. Files that have not been used for `retention_seconds` are handed
+    out by `expired()` so a periodic cleanup can delete them.
+    """
+
+    def __init__(self, path, retention_seconds):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "content_hash TEXT PRIMARY KEY, file_id TEXT NOT NULL, file_name TEXT, "
+            "size INTEGER, uploaded_at REAL NOT NULL, last_used_at REAL NOT NULL, "
+            "verified_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)"
+        )
+
+    def lookup(self, content_hash):
+        """Return (file_id, verified_at) for known content and mark it as used, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_id, verified_at FROM files WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE files SET last_used_at = ? WHERE content_hash = ?",
+                    (time.time(), content_hash),
+                )
+        return row
+
+    def register(self, content_hash, file_id, file_name, size):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, file_id, file_name, size, now, now, now),
+            )
+
+    def mark_verified(self, content_hash):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE files SET verified_at = ? WHERE content_hash = ?",
+                (time.time(), content_hash),
+            )
+
+    def forget(self, content_hash):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM files WHERE content_hash = ?", (content_hash,)
+            )
+
+    def expired(self):
+        """Return (content_hash, file_id) pairs unused for longer than the retention period."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            return self._conn.execute(
+                "SELECT content_hash, file_id FROM files WHERE last_used_at < ?",
+                (cutoff,),
+            ).fetchall()
+
+    def cleanup_due(self, interval_seconds):
+        """Return True (and record the run) if the last cleanup is older than the interval."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'last_cleanup'"
+            ).fetchone()
+            if row is not None and now - row[0] < interval_seconds:
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('last_cleanup', ?)", (now,)
+            )
+        return True
@@ -0,0 +1,155 @@
+# job_store.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+def fingerprint(value):
+    """Stable hash of a JSON-serializable value."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class JobStore:
+    """Checkpoints of analysis jobs, so an interrupted analysis can resume.
+
+    A job records the files uploaded for it, each completed (file, task)
+    result and each tender-level stage result as soon as they come in, along
+    with the `state` its caller needs to pick it up again. Values are stored
+    as JSON. Jobs not updated for `retention_seconds` are pruned whenever a
+    new one is created.
+    """
+
+    def __init__(self, path, retention_seconds):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, state TEXT NOT NULL, finished INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_files ("
+            "job_id TEXT NOT NULL, file_id TEXT NOT NULL, file_name TEXT NOT NULL, "
+            "uploaded_at REAL NOT NULL, PRIMARY KEY (job_id, file_id))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS task_results ("
+            "job_id TEXT NOT NULL, file_id TEXT NOT NULL, key TEXT NOT NULL, "
+            "result TEXT NOT NULL, PRIMARY KEY (job_id, file_id, key))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stage_results ("
+            "job_id TEXT NOT NULL, stage TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+            "result TEXT NOT NULL, PRIMARY KEY (job_id, stage))"
+        )
+
+    def create(self, state):
+        """Start a job with the given state; returns its ID."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._prune(now - self.retention_seconds)
+            self._conn.execute(
+                "INSERT INTO jobs VALUES (?, ?, 0, ?, ?)",
+                (job_id, json.dumps(state), now, now),
+            )
+        return job_id
+
+    def job(self, job_id):
+        """Return (state, finished) for a job, or None if it is unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, finished FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), bool(row[1])
+
+    def add_file(self, job_id, file_id, file_name):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO job_files VALUES (?, ?, ?, ?)",
+                (job_id, file_id, file_name, time.time()),
+            )
+            self._touch(job_id)
+
+    def files(self, job_id):
+        """The job's uploaded files as [(file_id, file_name)], in upload order."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT file_id, file_name FROM job_files WHERE job_id = ? "
+                "ORDER BY uploaded_at, rowid",
+                (job_id,),
+            ).fetchall()
+
+    def save_task(self, job_id, file_id, key, result):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO task_results VALUES (?, ?, ?, ?)",
+                (job_id, file_id, key, json.dumps(result)),
+            )
+            self._touch(job_id)
+
+    def task_results(self, job_id):
+        """The job's completed task results as {(file_id, key): result}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file_id, key, result FROM task_results WHERE job_id = ?",
+                (job_id,),
+            ).fetchall()
+        return {(file_id, key): json.loads(result) for file_id, key, result in rows}
+
+    def save_stage(self, job_id, stage, inputs, result):
+        """Save a stage result along with a fingerprint of the inputs it was computed from."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stage_results VALUES (?, ?, ?, ?)",
+                (job_id, stage, fingerprint(inputs), json.dumps(result)),
+            )
+            self._touch(job_id)
+
+    def stage_result(self, job_id, stage, inputs):
+        """A saved stage result computed from the same inputs, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM stage_results "
+                "WHERE job_id = ? AND stage = ? AND fingerprint = ?",
+                (job_id, stage, fingerprint(inputs)),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def finish(self, job_id):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET finished = 1, updated_at = ? WHERE job_id = ?",
+                (time.time(), job_id),
+            )
+
+    def _touch(self, job_id):
+        self._conn.execute(
+            "UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id)
+        )
+
+    def _prune(self, cutoff):
+        stale = [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT job_id FROM jobs WHERE updated_at < ?", (cutoff,)
+            )
+        ]
+        for table in ("task_results", "stage_results", "job_files", "jobs"):
+            self._conn.executemany(
+                f"DELETE FROM {table} WHERE job_id = ?", [(job_id,) for job_id in stale]
+            )
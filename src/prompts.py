@@ -91,6 +91,20 @@ Follow these guidelines:
 If no summary can be generated due to lack of relevant information, return exactly: NO_INFO_FOUND
 """
 
+## Prompt for merging a group of partial summaries into one, when there are too many for a single final prompt
+MERGE_SUMMARIES_PROMPT = """
+Merge the following partial summaries of one tender into a single partial summary:
+{partial_summaries}
+
+Follow these guidelines:
+1. **Preserve All Unique Information**: Include all unique details from each partial summary; do not shorten them into generalities.
+2. **Merge Similar Information Intelligently**: Combine overlapping details (e.g., dates) into a single entry, retaining the most specific information.
+3. **Resolve Conflicts Transparently**: If details conflict, include both and note the discrepancy (e.g., "[Conflict: Source A says X, Source B says Y]").
+4. **Maintain Structure**: Keep the sections of the partial summaries (Purpose, Main Deliverables, Scope and Scale, Timeline and Submission, Evaluation Criteria, Contractual Conditions, Additional Key Details).
+5. **Keep Citations**: Keep every source citation, combining them where appropriate (e.g., [file1, file2]).
+If none of the partial summaries contains relevant information, return exactly: NO_INFO_FOUND
+"""
+
 # Prompt for extracting dates from a single file
 DATES_PROMPT = """
 Extract all dates related to the tender process from "{file_name}", including deadlines, milestones, and key events. Tender-related dates often include:
@@ -123,6 +137,7 @@ Follow these guidelines:
 5. If there are conflicting dates for the same event, note the conflict (e.g., "30.04.2021 (file1), 01.05.2021 (file2)").
 6. Sort the table in reverse chronological order (most recent date first).
 7. If no dates are found or all entries are "NO_INFO_FOUND", return exactly: NO_INFO_FOUND
+8. Entries listed under "Pattern-matched dates (local scan)" were found by a regex scan of the file. Use them to fill gaps and confirm the other dates, and drop any whose event is not meaningful.
 
 Present the final table in markdown format.
 """
@@ -204,6 +219,52 @@ Follow these guidelines:
 Present the final list in markdown format with categories and requirements.
 """
 
+# Appended to a synthesis prompt that holds only newly added files, to update the earlier synthesis of the other files
+SYNTHESIS_UPDATE_PROMPT = """
+The data above comes from files that were added to a tender whose other files were already synthesized. The earlier synthesis is provided below and already cites its source files.
+
+Earlier synthesis:
+{earlier_synthesis}
+
+Merge the new data into the earlier synthesis following the guidelines above:
+1. Keep every entry of the earlier synthesis together with its source citations.
+2. Add what the new files contribute, citing them, and merge it with matching earlier entries.
+3. Note conflicts between the new files and the earlier synthesis.
+4. Return the complete updated result in the same format, not only the changes.
+"""
+
+# Combined per-file extraction prompts
+## JSON schema of the combined extraction; each value is what the matching single-task prompt returns
+COMBINED_EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "dates": {"type": "string"},
+        "requirements": {"type": "string"},
+        "folder_structure": {"type": "string"},
+        "client_info": {"type": "string"},
+    },
+    "required": ["dates", "requirements", "folder_structure", "client_info"],
+    "additionalProperties": False,
+}
+
+## Single run extracting dates, requirements, folder structure and client information from one file
+COMBINED_EXTRACTION_PROMPT = """
+Perform the four extraction tasks below on "{file_name}" and return all results as a single JSON object that matches this JSON schema:
+{schema}
+
+Each value must be the markdown text that its task asks for, formatted exactly as that task specifies. If a task finds nothing, its value must be exactly: NO_INFO_FOUND
+Return only the JSON object, without code fences or any other text.
+
+### Task "dates"
+{dates_prompt}
+### Task "requirements"
+{requirements_prompt}
+### Task "folder_structure"
+{folder_structure_prompt}
+### Task "client_info"
+{client_info_prompt}
+"""
+
 
 def format_prompt(prompt_template, **kwargs):
     """Format a prompt template with the given keyword arguments."""
@@ -0,0 +1,239 @@
+# rate_limiter.py
+import asyncio
+import re
+import threading
+import time
+
+from run_polling import task_kind
+
+# Hold-off after a rate-limit error that does not say how long to wait
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+# API calls made for every prompt run: thread, message, run and message list
+REQUESTS_PER_RUN = 4
+# Re-check interval while a bucket has no known refill rate
+MAX_WAIT_SECONDS = 5.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_TRY_AGAIN = re.compile(r"try again in (\d+(?:\.\d+)?)\s*(ms|s)\b", re.IGNORECASE)
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value):
+    """Parse an x-ratelimit-reset-* value such as "6m0s" or "120ms" into seconds."""
+    if not isinstance(value, str):
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_count(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(error):
+    """Seconds a 429 asks us to wait, from Retry-After headers or the message."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = parse_duration(headers.get("retry-after"))
+    if retry_after is not None:
+        return retry_after
+    return retry_after_from_message(str(error))
+
+
+def retry_after_from_message(message):
+    """Read "Please try again in 1.5s" style hints out of an error message."""
+    match = _TRY_AGAIN.search(message or "")
+    if match is None:
+        return None
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2).lower()]
+
+
+class TokenBucket:
+    """A bucket whose level is resynchronised from the server's rate-limit headers."""
+
+    def __init__(self):
+        self.limit = None
+        self.level = 0.0
+        self.rate = 0.0
+        self.updated_at = time.monotonic()
+
+    def sync(self, limit, remaining, reset_seconds, now):
+        self.limit = limit
+        self.level = float(remaining)
+        if reset_seconds and limit > remaining:
+            # The bucket is back to full after reset_seconds
+            self.rate = (limit - remaining) / reset_seconds
+        elif not self.rate:
+            # Limits are per minute
+            self.rate = limit / 60.0
+        self.updated_at = now
+
+    def refill(self, now):
+        if self.limit is None:
+            return
+        self.level = min(self.limit, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount, reserve):
+        """Seconds until `amount` can be taken while keeping `reserve` in the bucket."""
+        if self.limit is None:
+            return 0.0
+        amount = min(amount, max(self.limit - reserve, 0))
+        missing = amount + reserve - self.level
+        if missing <= 0:
+            return 0.0
+        if self.rate <= 0:
+            return MAX_WAIT_SECONDS
+        return missing / self.rate
+
+    def take(self, amount):
+        if self.limit is not None:
+            self.level -= amount
+
+
+class AdmissionController:
+    """Delays new runs until the request and token budgets have room for them.
+
+    Both buckets are kept in step with the x-ratelimit-* headers of every API
+    response; a 429 or a run failed on rate limits holds all admissions back
+    for its Retry-After. Token cost per run is estimated from the usage of
+    earlier runs of the same task kind. Until the first headers arrive, runs
+    are admitted freely.
+    """
+
+    def __init__(
+        self,
+        enabled=True,
+        headroom=0.05,
+        requests_per_run=REQUESTS_PER_RUN,
+        smoothing=0.3,
+    ):
+        self.enabled = enabled
+        self.headroom = headroom
+        self.requests_per_run = requests_per_run
+        self.smoothing = smoothing
+        self.requests = TokenBucket()
+        self.tokens = TokenBucket()
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.waited = 0.0
+        self._run_tokens = {}
+        self._lock = threading.Lock()
+
+    def update(self, rate_limit_headers):
+        """Resynchronise the buckets from extract_rate_limit_headers output."""
+        now = time.monotonic()
+        with self._lock:
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                limit = parse_count(rate_limit_headers.get(f"limit_{kind}"))
+                remaining = parse_count(rate_limit_headers.get(f"remaining_{kind}"))
+                if limit is None or remaining is None:
+                    continue
+                reset = parse_duration(rate_limit_headers.get(f"reset_{kind}"))
+                bucket.sync(limit, remaining, reset, now)
+
+    def hold_off(self, seconds=None):
+        """Admit nothing for `seconds` (e.g. a Retry-After)."""
+        if seconds is None:
+            seconds = DEFAULT_RETRY_AFTER_SECONDS
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def observe_run(self, task_name, run):
+        """Learn token usage from a finished run, and back off if it hit a rate limit."""
+        usage = getattr(run, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        if total_tokens:
+            kind = task_kind(task_name)
+            with self._lock:
+                previous = self._run_tokens.get(kind)
+                self._run_tokens[kind] = (
+                    total_tokens
+                    if previous is None
+                    else previous + self.smoothing * (total_tokens - previous)
+                )
+        last_error = getattr(run, "last_error", None)
+        if getattr(last_error, "code", None) == "rate_limit_exceeded":
+            self.hold_off(retry_after_from_message(last_error.message))
+
+    def expected_tokens(self, task_name):
+        return self._run_tokens.get(task_kind(task_name), 0)
+
+    def _try_admit(self, task_name):
+        """Reserve budget for one run and return 0, or return how long to wait."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            expected_tokens = self.expected_tokens(task_name)
+            wait = max(
+                self.requests.wait_time(
+                    self.requests_per_run, self.headroom * (self.requests.limit or 0)
+                ),
+                self.tokens.wait_time(
+                    expected_tokens, self.headroom * (self.tokens.limit or 0)
+                ),
+            )
+            if wait <= 0:
+                self.requests.take(self.requests_per_run)
+                self.tokens.take(expected_tokens)
+            return wait
+
+    def _record_wait(self, waited):
+        if waited:
+            with self._lock:
+                self.throttled += 1
+                self.waited += waited
+
+    def acquire(self, task_name):
+        """Block until a run for task_name fits in the current rate limits."""
+        if not self.enabled:
+            return
+        waited = 0.0
+        while True:
+            wait = self._try_admit(task_name)
+            if wait <= 0:
+                break
+            wait = min(wait, MAX_WAIT_SECONDS)
+            time.sleep(wait)
+            waited += wait
+        self._record_wait(waited)
+
+    async def acquire_async(self, task_name):
+        """Async version of acquire; waits on the event loop."""
+        if not self.enabled:
+            return
+        waited = 0.0
+        while True:
+            wait = self._try_admit(task_name)
+            if wait <= 0:
+                break
+            wait = min(wait, MAX_WAIT_SECONDS)
+            await asyncio.sleep(wait)
+            waited += wait
+        self._record_wait(waited)
+
+    def snapshot(self):
+        with self._lock:
+            return self.throttled, self.waited
+
+    def report(self, since=(0, 0.0)):
+        throttled = self.throttled - since[0]
+        waited = self.waited - since[1]
+        return f"Rate-limit admission: {throttled} runs delayed, {waited:.1f}s waiting for budget"
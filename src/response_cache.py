@@ -0,0 +1,125 @@
+# response_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Content hashes of uploaded files, keyed by OpenAI file ID
+_file_hashes = {}
+
+
+def remember_file_hash(file_id, content_hash):
+    """Record the SHA-256 of an uploaded file so prompts over it can be cached."""
+    _file_hashes[file_id] = content_hash
+
+
+def file_hash(file_id):
+    return _file_hashes.get(file_id)
+
+
+def sha256_of(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed SQLite cache of assistant responses.
+
+    Entries expire after `ttl_seconds` and the least recently used ones are
+    evicted once the stored responses exceed `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes, ttl_seconds):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, headers TEXT NOT NULL, "
+            "size INTEGER NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+        )
+
+    @staticmethod
+    def make_key(file_hashes, prompt, task_name, model, temperature):
+        """Hash everything that determines a response into a cache key."""
+        payload = json.dumps(
+            [list(file_hashes), prompt, task_name, model, temperature],
+            ensure_ascii=False,
+        )
+        return sha256_of(payload.encode("utf-8"))
+
+    def get(self, key):
+        """Return (response, rate_limit_headers) for a live entry, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, headers, created_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and now - row[2] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+        return row[0], json.loads(row[1])
+
+    def put(self, key, response, rate_limit_headers):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, json.dumps(rate_limit_headers), size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        self._conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def snapshot(self):
+        with self._lock:
+            return self.hits, self.misses
+
+    def report(self, since=(0, 0)):
+        hits = self.hits - since[0]
+        misses = self.misses - since[1]
+        lookups = hits + misses
+        hit_rate = hits / lookups * 100 if lookups else 0.0
+        return (
+            f"Response cache: {hits} hits, {misses} misses ({hit_rate:.0f}% hit rate)"
+        )
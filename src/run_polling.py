@@ -0,0 +1,197 @@
+# run_polling.py
+import asyncio
+import threading
+import time
+
+RUN_COMPLETION_STRATEGIES = ("adaptive", "stream", "fixed")
+TERMINAL_RUN_STATUSES = ("completed", "failed", "cancelled", "expired", "incomplete")
+
+FIXED_POLL_INTERVAL = 1.0
+
+
+def check_strategy(strategy):
+    """Raise ValueError unless `strategy` is one of RUN_COMPLETION_STRATEGIES."""
+    if strategy not in RUN_COMPLETION_STRATEGIES:
+        raise ValueError(
+            f"Unknown run completion strategy {strategy!r}, "
+            f"expected one of: {', '.join(RUN_COMPLETION_STRATEGIES)}"
+        )
+
+
+def task_kind(task_name):
+    """Group task names by prompt type, e.g. "Dates for a.pdf" -> "Dates"."""
+    return task_name.split(" for ")[0]
+
+
+class AdaptivePollSchedule:
+    """Poll intervals shaped by the observed durations of previous runs.
+
+    Runs of the same kind (dates, requirements, ...) take similar times, so the
+    first status call is delayed until shortly before the expected completion
+    and the following ones start short and back off geometrically.
+    """
+
+    def __init__(
+        self,
+        min_interval=0.1,
+        max_interval=2.0,
+        backoff=1.5,
+        smoothing=0.3,
+        lead_fraction=0.8,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.lead_fraction = lead_fraction
+        self._expected = {}
+        self._lock = threading.Lock()
+
+    def observe(self, kind, duration):
+        """Fold a finished run's duration into the moving average for its kind."""
+        with self._lock:
+            previous = self._expected.get(kind)
+            if previous is None:
+                self._expected[kind] = duration
+            else:
+                self._expected[kind] = (
+                    self.smoothing * duration + (1 - self.smoothing) * previous
+                )
+
+    def expected(self, kind):
+        with self._lock:
+            return self._expected.get(kind)
+
+    def intervals(self, kind):
+        """Yield the successive sleep durations for one run of the given kind."""
+        expected = self.expected(kind)
+        if expected is None:
+            interval = self.min_interval
+        else:
+            yield max(self.min_interval, expected * self.lead_fraction)
+            interval = max(self.min_interval, min(expected * 0.05, self.max_interval))
+        while True:
+            yield interval
+            interval = min(interval * self.backoff, self.max_interval)
+
+
+class RunCompletionStats:
+    """Counts runs and runs.retrieve status calls so the poll volume can be logged."""
+
+    def __init__(self):
+        self.runs = 0
+        self.status_calls = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, status_calls, wait_seconds):
+        with self._lock:
+            self.runs += 1
+            self.status_calls += status_calls
+            self.wait_seconds += wait_seconds
+
+    def snapshot(self):
+        with self._lock:
+            return self.runs, self.status_calls, self.wait_seconds
+
+    def report(self, since=(0, 0, 0.0)):
+        runs, status_calls, wait_seconds = self.snapshot()
+        runs -= since[0]
+        status_calls -= since[1]
+        wait_seconds -= since[2]
+        per_run = status_calls / runs if runs else 0.0
+        return (
+            f"Run completion: {runs} runs, {status_calls} status calls "
+            f"({per_run:.1f} per run), {wait_seconds:.1f}s waiting on runs"
+        )
+
+
+poll_schedule = AdaptivePollSchedule()
+completion_stats = RunCompletionStats()
+
+
+def _poll_intervals(strategy, kind):
+    if strategy == "fixed":
+        while True:
+            yield FIXED_POLL_INTERVAL
+    yield from poll_schedule.intervals(kind)
+
+
+def _log_completion(logger, task_name, strategy, run, status_calls, elapsed):
+    completion_stats.record(status_calls, elapsed)
+    if run.status == "completed":
+        poll_schedule.observe(task_kind(task_name), elapsed)
+    logger.info(
+        f"Run for {task_name} finished with status {run.status} after {elapsed:.2f}s "
+        f"({strategy}, {status_calls} status calls)"
+    )
+
+
+def execute_run(client, thread_id, assistant_id, task_name, logger, strategy):
+    """Start a run on the thread and block until it reaches a terminal status."""
+    check_strategy(strategy)
+    started = time.monotonic()
+    status_calls = 0
+    if strategy == "stream":
+        with client.beta.threads.runs.stream(
+            thread_id=thread_id,
+            assistant_id=assistant_id,
+            tools=[{"type": "file_search"}],
+        ) as stream:
+            stream.until_done()
+            run = stream.current_run
+        if run is None:
+            raise RuntimeError(f"Run stream for {task_name} ended without a run")
+    else:
+        run = client.beta.threads.runs.create(
+            thread_id=thread_id,
+            assistant_id=assistant_id,
+            tools=[{"type": "file_search"}],
+        )
+        for interval in _poll_intervals(strategy, task_kind(task_name)):
+            if run.status in TERMINAL_RUN_STATUSES:
+                break
+            time.sleep(interval)
+            run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+            status_calls += 1
+    _log_completion(
+        logger, task_name, strategy, run, status_calls, time.monotonic() - started
+    )
+    return run
+
+
+async def execute_run_async(
+    client, thread_id, assistant_id, task_name, logger, strategy
+):
+    """Async counterpart of execute_run for the AsyncOpenAI client."""
+    check_strategy(strategy)
+    started = time.monotonic()
+    status_calls = 0
+    if strategy == "stream":
+        async with client.beta.threads.runs.stream(
+            thread_id=thread_id,
+            assistant_id=assistant_id,
+            tools=[{"type": "file_search"}],
+        ) as stream:
+            await stream.until_done()
+            run = stream.current_run
+        if run is None:
+            raise RuntimeError(f"Run stream for {task_name} ended without a run")
+    else:
+        run = await client.beta.threads.runs.create(
+            thread_id=thread_id,
+            assistant_id=assistant_id,
+            tools=[{"type": "file_search"}],
+        )
+        for interval in _poll_intervals(strategy, task_kind(task_name)):
+            if run.status in TERMINAL_RUN_STATUSES:
+                break
+            await asyncio.sleep(interval)
+            run = await client.beta.threads.runs.retrieve(
+                thread_id=thread_id, run_id=run.id
+            )
+            status_calls += 1
+    _log_completion(
+        logger, task_name, strategy, run, status_calls, time.monotonic() - started
+    )
+    return run
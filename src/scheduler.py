@@ -0,0 +1,154 @@
+# scheduler.py
+import asyncio
+import functools
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# One (file x task) unit of work: a single prompt run against a single file
+WorkUnit = namedtuple(
+    "WorkUnit", ["file_id", "file_name", "key", "prompt", "task_name"]
+)
+
+_FEED_DONE = object()
+
+
+class TaskScheduler:
+    """Runs work units from a single queue with bounded concurrency.
+
+    Units from every file share the same queue, so a slow task only holds one
+    slot and the next unit starts as soon as any slot frees up. The unit source
+    may be lazy (e.g. fed while uploads are still finishing); it is consumed
+    independently of the result stream.
+    """
+
+    def __init__(self, concurrency):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+
+    def stream(self, units, worker):
+        """Run worker(unit) on a thread pool, yielding (unit, result, error) as each finishes."""
+        finished = queue.Queue()
+
+        def on_done(unit, future):
+            finished.put((unit, future))
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="tender-task"
+        ) as executor:
+
+            def feed():
+                submitted = 0
+                feed_error = None
+                try:
+                    for unit in units:
+                        future = executor.submit(worker, unit)
+                        future.add_done_callback(functools.partial(on_done, unit))
+                        submitted += 1
+                except Exception as e:
+                    feed_error = e
+                finally:
+                    finished.put((_FEED_DONE, (submitted, feed_error)))
+
+            feeder = threading.Thread(
+                target=feed, name="tender-task-feeder", daemon=True
+            )
+            feeder.start()
+
+            received = 0
+            expected = None
+            feed_error = None
+            while expected is None or received < expected:
+                unit, item = finished.get()
+                if unit is _FEED_DONE:
+                    expected, feed_error = item
+                    continue
+                received += 1
+                yield unit, *_future_outcome(item)
+            feeder.join()
+
+        if feed_error is not None:
+            raise feed_error
+
+    async def stream_async(self, units, worker):
+        """Async version of stream: worker is a coroutine function, units may be an async iterable."""
+        work = asyncio.Queue()
+        finished = asyncio.Queue()
+
+        async def feed():
+            submitted = 0
+            try:
+                if hasattr(units, "__aiter__"):
+                    async for unit in units:
+                        work.put_nowait(unit)
+                        submitted += 1
+                else:
+                    for unit in units:
+                        work.put_nowait(unit)
+                        submitted += 1
+            finally:
+                for _ in range(self.concurrency):
+                    work.put_nowait(_FEED_DONE)
+                finished.put_nowait((_FEED_DONE, submitted))
+
+        async def consume():
+            while True:
+                unit = await work.get()
+                if unit is _FEED_DONE:
+                    return
+                try:
+                    finished.put_nowait((unit, (await worker(unit), None)))
+                except Exception as e:
+                    finished.put_nowait((unit, (None, e)))
+
+        feeder = asyncio.create_task(feed())
+        consumers = [asyncio.create_task(consume()) for _ in range(self.concurrency)]
+        try:
+            received = 0
+            expected = None
+            while expected is None or received < expected:
+                unit, item = await finished.get()
+                if unit is _FEED_DONE:
+                    expected = item
+                    continue
+                received += 1
+                yield unit, *item
+            # Surfaces an exception raised by the unit source, if any
+            await feeder
+        finally:
+            for task in [feeder, *consumers]:
+                task.cancel()
+            await asyncio.gather(feeder, *consumers, return_exceptions=True)
+
+
+async def iterate_in_thread(iterable):
+    """Consume a blocking iterable on a helper thread, yielding its items on the event loop."""
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue()
+
+    def pump():
+        try:
+            for item in iterable:
+                loop.call_soon_threadsafe(items.put_nowait, (item, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(items.put_nowait, (_FEED_DONE, e))
+        else:
+            loop.call_soon_threadsafe(items.put_nowait, (_FEED_DONE, None))
+
+    threading.Thread(target=pump, name="tender-iter-pump", daemon=True).start()
+    while True:
+        item, error = await items.get()
+        if item is _FEED_DONE:
+            if error is not None:
+                raise error
+            return
+        yield item
+
+
+def _future_outcome(future):
+    error = future.exception()
+    if error is not None:
+        return None, error
+    return future.result(), None
@@ -0,0 +1,250 @@
+# simulation.py
+import json
+import math
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from rate_limiter import REQUESTS_PER_RUN
+from run_polling import task_kind
+
+# Tokens charged for a run whose kind has no "tokens_per_run" entry
+DEFAULT_TOKENS_PER_RUN = 2000
+
+
+def parse_latency(spec):
+    """Build a sampler from a latency spec.
+
+    A number is a fixed delay in seconds; otherwise a dict with a
+    "distribution" of "fixed" (seconds), "uniform" (low, high), "exponential"
+    (mean) or "lognormal" (median, sigma).
+    """
+    if spec is None:
+        return lambda rng: 0.0
+    if isinstance(spec, (int, float)):
+        return lambda rng: float(spec)
+    distribution = spec.get("distribution", "fixed")
+    if distribution == "fixed":
+        seconds = float(spec.get("seconds", 0.0))
+        return lambda rng: seconds
+    if distribution == "uniform":
+        low, high = float(spec["low"]), float(spec["high"])
+        return lambda rng: rng.uniform(low, high)
+    if distribution == "exponential":
+        mean = float(spec["mean"])
+        return lambda rng: rng.expovariate(1 / mean) if mean > 0 else 0.0
+    if distribution == "lognormal":
+        mu, sigma = math.log(float(spec["median"])), float(spec.get("sigma", 0.5))
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Unknown latency distribution: {distribution}")
+
+
+def format_reset(seconds):
+    """Format a reset time like the x-ratelimit-reset-* headers, e.g. "1m2.5s"."""
+    if seconds < 1:
+        return f"{int(seconds * 1000)}ms"
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)}m{seconds:g}s" if minutes else f"{seconds:g}s"
+
+
+class SimulatedLimit:
+    """A per-minute budget that refills continuously, like the API's limits."""
+
+    def __init__(self, per_minute):
+        self.limit = per_minute
+        self.level = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(
+            self.limit, self.level + (now - self.updated_at) * self.limit / 60.0
+        )
+        self.updated_at = now
+
+    def retry_after(self, amount):
+        """Seconds until `amount` fits, 0 if it already does."""
+        return max(amount - self.level, 0) * 60.0 / self.limit
+
+    def reset_seconds(self):
+        return (self.limit - self.level) * 60.0 / self.limit
+
+
+class SimulationProfile:
+    """Makes simulation-mode runs behave like API runs under load.
+
+    Each simulated run waits for a latency drawn from its task kind's
+    distribution ("default" covers kinds without one). It may be answered
+    with an injected RateLimitError or APITimeoutError, or end as a failed or
+    cancelled run, at the configured rates. With "requests_per_minute" or
+    "tokens_per_minute", runs draw from synthetic budgets that are reported
+    in x-ratelimit-* headers and answered with a 429 once exhausted.
+    """
+
+    def __init__(
+        self,
+        latency=None,
+        rate_limit_error_rate=0.0,
+        timeout_error_rate=0.0,
+        failed_run_rate=0.0,
+        cancelled_run_rate=0.0,
+        requests_per_minute=None,
+        tokens_per_minute=None,
+        tokens_per_run=None,
+        seed=None,
+    ):
+        latency = dict(latency or {})
+        self.default_latency = parse_latency(latency.pop("default", None))
+        self.latency = {kind: parse_latency(spec) for kind, spec in latency.items()}
+        self.rate_limit_error_rate = rate_limit_error_rate
+        self.timeout_error_rate = timeout_error_rate
+        self.failed_run_rate = failed_run_rate
+        self.cancelled_run_rate = cancelled_run_rate
+        self.requests = (
+            SimulatedLimit(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = SimulatedLimit(tokens_per_minute) if tokens_per_minute else None
+        self.tokens_per_run = dict(tokens_per_run or {})
+        self.runs = 0
+        self.errors = 0
+        self.unfinished = 0
+        self.latency_total = 0.0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, spec):
+        """Profile from inline JSON or a JSON file path, or None for an empty spec."""
+        if not spec:
+            return None
+        if os.path.exists(spec):
+            with open(spec, encoding="utf-8") as f:
+                return cls(**json.load(f))
+        return cls(**json.loads(spec))
+
+    def run_tokens(self, task_name):
+        return self.tokens_per_run.get(
+            task_kind(task_name),
+            self.tokens_per_run.get("default", DEFAULT_TOKENS_PER_RUN),
+        )
+
+    def plan(self, task_name):
+        """Draw the outcome of one run: (latency, error, run, headers).
+
+        `error` is an exception to raise instead of returning the run.
+        """
+        kind = task_kind(task_name)
+        tokens = self.run_tokens(task_name)
+        with self._lock:
+            self.runs += 1
+            latency = self.latency.get(kind, self.default_latency)(self._rng)
+            retry_after = self._take_budget(tokens)
+            draw = self._rng.random()
+        if retry_after is None and draw < self.rate_limit_error_rate:
+            retry_after = 1.0
+        if retry_after is not None:
+            return self._record(0.0, rate_limit_error(task_name, retry_after), None)
+        draw -= self.rate_limit_error_rate
+        if draw < self.timeout_error_rate:
+            return self._record(latency, timeout_error(), None)
+        draw -= self.timeout_error_rate
+        status = "completed"
+        last_error = None
+        if draw < self.failed_run_rate:
+            status = "failed"
+            last_error = SimpleNamespace(
+                code="server_error", message="Simulated run failure."
+            )
+        elif draw - self.failed_run_rate < self.cancelled_run_rate:
+            status = "cancelled"
+        run = SimpleNamespace(
+            status=status,
+            last_error=last_error,
+            usage=SimpleNamespace(total_tokens=tokens),
+        )
+        return self._record(latency, None, run)
+
+    def _record(self, latency, error, run):
+        with self._lock:
+            self.latency_total += latency
+            if error is not None:
+                self.errors += 1
+            elif run.status != "completed":
+                self.unfinished += 1
+        return latency, error, run, {} if run is None else self.headers()
+
+    def _take_budget(self, tokens):
+        """Charge one run to the synthetic budgets, or return the Retry-After."""
+        now = time.monotonic()
+        budgets = [
+            (limit, amount)
+            for limit, amount in (
+                (self.requests, REQUESTS_PER_RUN),
+                (self.tokens, tokens),
+            )
+            if limit is not None
+        ]
+        for limit, _ in budgets:
+            limit.refill(now)
+        retry_after = max(
+            (limit.retry_after(amount) for limit, amount in budgets), default=0.0
+        )
+        if retry_after > 0:
+            return retry_after
+        for limit, amount in budgets:
+            limit.level -= amount
+        return None
+
+    def headers(self):
+        """Synthetic x-ratelimit-* response headers for the current budgets."""
+        headers = {}
+        with self._lock:
+            for name, limit in (("requests", self.requests), ("tokens", self.tokens)):
+                if limit is None:
+                    continue
+                headers[f"x-ratelimit-limit-{name}"] = str(limit.limit)
+                headers[f"x-ratelimit-remaining-{name}"] = str(int(limit.level))
+                headers[f"x-ratelimit-reset-{name}"] = format_reset(
+                    limit.reset_seconds()
+                )
+        return headers
+
+    def snapshot(self):
+        with self._lock:
+            return self.runs, self.errors, self.unfinished, self.latency_total
+
+    def report(self, since=(0, 0, 0, 0.0)):
+        runs = self.runs - since[0]
+        errors = self.errors - since[1]
+        unfinished = self.unfinished - since[2]
+        latency = self.latency_total - since[3]
+        return (
+            f"Simulation profile: {runs} runs, {errors} API errors injected, "
+            f"{unfinished} failed or cancelled, {latency:.1f}s simulated latency"
+        )
+
+
+def _request():
+    return httpx.Request("POST", "https://api.openai.com/v1/threads/runs")
+
+
+def rate_limit_error(task_name, retry_after):
+    response = httpx.Response(
+        429,
+        request=_request(),
+        headers={"retry-after-ms": str(int(retry_after * 1000))},
+    )
+    return openai.RateLimitError(
+        f"Simulated rate limit for {task_name}. "
+        f"Please try again in {retry_after:.3f}s.",
+        response=response,
+        body=None,
+    )
+
+
+def timeout_error():
+    return openai.APITimeoutError(request=_request())
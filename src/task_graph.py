@@ -0,0 +1,190 @@
+# task_graph.py
+import threading
+import time
+from concurrent.futures import Future
+
+
+class Stage:
+    def __init__(self, name, function, after):
+        self.name = name
+        self.function = function
+        self.after = tuple(after)
+        self.waiting = set(after)
+        self.future = Future()
+        self.started_at = None
+        self.finished_at = None
+
+
+class TaskGraph:
+    """Runs named stages as soon as the stages they depend on have finished.
+
+    A stage with a function is started on the executor with the results of
+    its `after` stages as arguments. A stage without one is finished from the
+    outside with finish(), e.g. once the last per-file task of a kind is in.
+    A stage whose dependency failed fails with the same error without running.
+    Stage start and end times are kept for the critical path report.
+
+    A `checkpoint` with get(name, arguments) and put(name, arguments, result)
+    methods lets stages be answered from results saved by an earlier run.
+    A checkpoint that fails only costs the saved result, never the stage.
+    """
+
+    def __init__(self, executor, logger=None, checkpoint=None):
+        self.executor = executor
+        self.logger = logger
+        self.checkpoint = checkpoint
+        self.stages = {}
+        self.dependents = {}
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, name, function=None, after=()):
+        """Add a stage; it starts right away when everything in `after` is done."""
+        with self._lock:
+            if name in self.stages:
+                raise ValueError(f"Stage {name} already exists")
+            missing = [
+                dependency for dependency in after if dependency not in self.stages
+            ]
+            if missing:
+                raise ValueError(f"Stage {name} depends on unknown stages: {missing}")
+            stage = Stage(name, function, after)
+            self.stages[name] = stage
+            for dependency in after:
+                self.dependents.setdefault(dependency, []).append(stage)
+                if self.stages[dependency].finished_at is not None:
+                    stage.waiting.discard(dependency)
+            if function is None:
+                stage.started_at = time.monotonic()
+                return
+            ready = not stage.waiting
+        if ready:
+            self._start(stage)
+
+    def finish(self, name, result=None, error=None):
+        """Finish a stage that has no function of its own."""
+        self._finished(self.stages[name], result, error)
+
+    def done(self, name):
+        return self.stages[name].future.done()
+
+    def future(self, name):
+        """The stage's concurrent.futures.Future, e.g. for asyncio.wrap_future."""
+        return self.stages[name].future
+
+    def result(self, name, timeout=None):
+        """Wait for a stage and return its result, raising the error it failed with."""
+        return self.stages[name].future.result(timeout)
+
+    def _start(self, stage):
+        dependencies = [self.stages[name].future for name in stage.after]
+        error = next(
+            (future.exception() for future in dependencies if future.exception()),
+            None,
+        )
+        stage.started_at = time.monotonic()
+        if error is not None:
+            self._finished(stage, None, error)
+            return
+        if self.logger is not None:
+            self.logger.info(f"Stage {stage.name} started")
+        arguments = [future.result() for future in dependencies]
+        self.executor.submit(self._run, stage, arguments)
+
+    def _run(self, stage, arguments):
+        result = None
+        if self.checkpoint is not None:
+            try:
+                result = self.checkpoint.get(stage.name, arguments)
+            except Exception as e:
+                self._checkpoint_failed(stage, e)
+            if result is not None:
+                if self.logger is not None:
+                    self.logger.info(f"Stage {stage.name} restored from checkpoint")
+                self._finished(stage, result, None)
+                return
+        try:
+            result = stage.function(*arguments)
+        except Exception as e:
+            self._finished(stage, None, e)
+            return
+        if self.checkpoint is not None:
+            try:
+                self.checkpoint.put(stage.name, arguments, result)
+            except Exception as e:
+                self._checkpoint_failed(stage, e)
+        self._finished(stage, result, None)
+
+    def _checkpoint_failed(self, stage, error):
+        if self.logger is not None:
+            self.logger.warning(f"Checkpoint failed for stage {stage.name}: {error}")
+
+    def _finished(self, stage, result, error):
+        with self._lock:
+            if stage.finished_at is not None:
+                raise ValueError(f"Stage {stage.name} already finished")
+            stage.finished_at = time.monotonic()
+            ready = []
+            for dependent in self.dependents.get(stage.name, []):
+                dependent.waiting.discard(stage.name)
+                if dependent.function is not None and not dependent.waiting:
+                    ready.append(dependent)
+        if self.logger is not None:
+            elapsed = stage.finished_at - stage.started_at
+            if error is None:
+                self.logger.info(f"Stage {stage.name} finished in {elapsed:.2f}s")
+            else:
+                self.logger.warning(
+                    f"Stage {stage.name} failed after {elapsed:.2f}s: {error}"
+                )
+        # Dependents are only started once the result is visible to them
+        if error is None:
+            stage.future.set_result(result)
+        else:
+            stage.future.set_exception(error)
+        for dependent in ready:
+            self._start(dependent)
+
+    def describe(self):
+        """One line per stage, listing what it waits for."""
+        lines = ["Task graph:"]
+        for stage in self.stages.values():
+            after = ", ".join(stage.after) if stage.after else "-"
+            lines.append(f"  {stage.name} <- {after}")
+        return "\n".join(lines)
+
+    def critical_path(self):
+        """The chain of finished stages that determined the total time.
+
+        Starts from the stage that finished last and walks back through the
+        dependency that finished last. Returns [(name, seconds)], where the
+        seconds are what each stage added after its predecessor finished.
+        """
+        finished = [
+            stage for stage in self.stages.values() if stage.finished_at is not None
+        ]
+        if not finished:
+            return []
+        stage = max(finished, key=lambda stage: stage.finished_at)
+        path = []
+        while stage is not None:
+            previous = max(
+                (
+                    self.stages[name]
+                    for name in stage.after
+                    if self.stages[name].finished_at is not None
+                ),
+                key=lambda stage: stage.finished_at,
+                default=None,
+            )
+            since = previous.finished_at if previous else self.started_at
+            path.append((stage.name, max(stage.finished_at - since, 0.0)))
+            stage = previous
+        path.reverse()
+        return path
+
+    def report(self):
+        path = self.critical_path()
+        total = sum(seconds for _, seconds in path)
+        chain = " -> ".join(f"{name} ({seconds:.2f}s)" for name, seconds in path)
+        return f"Critical path: {total:.2f}s: {chain or 'no finished stages'}"
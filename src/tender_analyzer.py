@@ -1,17 +1,50 @@
 # tender_analyzer.py
 
 MAX_CONCURRENT_REQUESTS = 5
-MAX_THREAD_WORKERS = 4
+MAX_CONCURRENT_ASYNC_REQUESTS = 100
 BATCH_SIZE = 4
+# Estimated tokens of partial summaries merged by one prompt; more are merged as a tree
+SUMMARY_REDUCE_TOKENS = 24000
+# Files whose local date extraction can run at the same time
+LOCAL_DATES_WORKERS = 2
 
-import streamlit as st
 import openai
+import asyncio
+import bisect
+import difflib
+import json
+import queue
+import re
 import time
-from config import ASSISTANT_ID
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    ASSISTANT_ID,
+    EXTRACTION_MODE,
+    JOB_RETENTION_DAYS,
+    JOB_STORE_ENABLED,
+    JOB_STORE_PATH,
+    RATE_LIMIT_ADMISSION,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_MB,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL_DAYS,
+    RUN_COMPLETION_STRATEGY,
+    SIMULATION_PROFILE,
+)
+from job_store import JobStore
+from response_cache import ResponseCache, file_hash
 from utils import load_mock_response, replace_citations
-from pypdf import PdfReader
-from io import BytesIO
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from run_polling import (
+    check_strategy,
+    completion_stats,
+    execute_run,
+    execute_run_async,
+)
+from rate_limiter import AdmissionController, retry_after_seconds
+from scheduler import TaskScheduler, WorkUnit, iterate_in_thread
+from simulation import SimulationProfile
+from task_graph import TaskGraph
 import threading
 import logging
 import os
@@ -25,21 +58,29 @@ from tenacity import (
 )
 from prompts import (
     CLIENT_INFO_PROMPT,
+    COMBINED_EXTRACTION_PROMPT,
+    COMBINED_EXTRACTION_SCHEMA,
     DATES_PROMPT,
     REQUIREMENTS_PROMPT,
     FOLDER_STRUCTURE_PROMPT,
     SUMMARY_PROMPT,
     FINAL_SUMMARY_PROMPT,
+    MERGE_SUMMARIES_PROMPT,
     SYNTHESIZE_CLIENT_INFO_PROMPT,
     SYNTHESIZE_FOLDER_STRUCTURE_PROMPT,
     SYNTHESIZE_REQUIREMENTS_PROMPT,
     SYNTHESIZE_DATES_PROMPT,
+    SYNTHESIS_UPDATE_PROMPT,
     format_prompt,
 )
-from docx import Document
 
 semaphore = threading.Semaphore(MAX_CONCURRENT_REQUESTS)
 
+# asyncio primitives and clients are bound to the event loop that created them,
+# so the async engine keeps one client/semaphore pair per running loop
+_async_loop_resources = weakref.WeakKeyDictionary()
+_async_loop_semaphores = weakref.WeakKeyDictionary()
+
 # Validate ASSISTANT_ID at the start of the module
 if not isinstance(ASSISTANT_ID, str):
     raise ValueError(
@@ -47,6 +88,30 @@ if not isinstance(ASSISTANT_ID, str):
     )
 if not ASSISTANT_ID.strip():
     raise ValueError("ASSISTANT_ID cannot be empty or whitespace")
+# A mistyped TENDERAI_RUN_COMPLETION fails here rather than at the first run
+check_strategy(RUN_COMPLETION_STRATEGY)
+
+response_cache = (
+    ResponseCache(
+        RESPONSE_CACHE_PATH,
+        max_bytes=RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+        ttl_seconds=RESPONSE_CACHE_TTL_DAYS * 24 * 3600,
+    )
+    if RESPONSE_CACHE_ENABLED
+    else None
+)
+_assistant_fingerprint = None
+_assistant_fingerprint_lock = threading.Lock()
+# Shared by both engines so every run draws from the same rate-limit budget
+admission = AdmissionController(enabled=RATE_LIMIT_ADMISSION)
+# Latency and failures for simulation mode; None answers mocks instantly
+simulation_profile = SimulationProfile.load(SIMULATION_PROFILE)
+# Checkpoints of analysis jobs, for resuming them after an interruption
+job_store = (
+    JobStore(JOB_STORE_PATH, retention_seconds=JOB_RETENTION_DAYS * 24 * 3600)
+    if JOB_STORE_ENABLED
+    else None
+)
 
 # Create logs directory if it doesn't exist
 LOG_DIR = "logs"
@@ -99,22 +164,110 @@ def log_retry(logger):
     return after_retry
 
 
+# Errors @retry tries again; any other API error ends the prompt at once
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+)
+
+
+def retries_exhausted(retry_state):
+    """Turn the last retryable error into the prompt's result once @retry gives up."""
+    task_name, logger = retry_state.args[2:4]
+    return api_error_response(retry_state.outcome.exception(), task_name, logger)
+
+
+def assistant_fingerprint():
+    """Return the assistant's (model, temperature, top_p), fetched once per process."""
+    global _assistant_fingerprint
+    with _assistant_fingerprint_lock:
+        if _assistant_fingerprint is None:
+            assistant = openai.beta.assistants.retrieve(ASSISTANT_ID.strip())
+            _assistant_fingerprint = (
+                assistant.model,
+                assistant.temperature,
+                assistant.top_p,
+            )
+        return _assistant_fingerprint
+
+
+def response_cache_key(file_ids, prompt, task_name, logger):
+    """Cache key for a prompt run, or None when the response cannot be cached."""
+    if response_cache is None:
+        return None
+    try:
+        file_hashes = [file_hash(file_id) for file_id in file_ids]
+        if None in file_hashes:
+            return None
+        model, temperature, top_p = assistant_fingerprint()
+    except Exception as e:
+        logger.warning(f"Response cache disabled for {task_name}: {str(e)}")
+        return None
+    return ResponseCache.make_key(
+        file_hashes, prompt, task_name, model, (temperature, top_p)
+    )
+
+
+def cached_response(cache_key, task_name, logger):
+    """Return (response, {}) for a cached key, or None; a failing cache is a miss.
+
+    The rate-limit headers stored with the response are stale by now, so a
+    hit reports none and leaves the admission controller's view alone.
+    """
+    if cache_key is None:
+        return None
+    try:
+        cached = response_cache.get(cache_key)
+    except Exception as e:
+        logger.warning(f"Response cache lookup failed for {task_name}: {str(e)}")
+        return None
+    if cached is None:
+        return None
+    log_raw_response(logger, task_name, cached[0], source="Cache")
+    return cached[0], {}
+
+
+def cache_response(cache_key, response, rate_limit_headers, task_name, logger):
+    """Store a response under its key; a failing cache only loses the entry."""
+    if not response or cache_key is None:
+        return
+    try:
+        response_cache.put(cache_key, response, rate_limit_headers)
+    except Exception as e:
+        logger.warning(f"Response cache store failed for {task_name}: {str(e)}")
+
+
 @retry(
     stop=stop_after_attempt(5),
     wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type(
-        (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)
-    ),
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
     after=log_retry(logging.getLogger()),
+    retry_error_callback=retries_exhausted,
 )
 def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
+    # A cache hit returns before any thread, message or run is created
+    cache_key = (
+        None
+        if simulation_mode
+        else response_cache_key(file_ids, prompt, task_name, logger)
+    )
+    cached = cached_response(cache_key, task_name, logger)
+    if cached is not None:
+        return cached
+
     with semaphore:
         if simulation_mode:
+            if simulation_profile is not None:
+                return simulate_prompt(task_name, logger)
             response = load_mock_response(task_name)
             log_raw_response(logger, task_name, response, source="Mock")
             return response, {}
         else:
             try:
+                # Hold the run back until the rate limits have room for it
+                admission.acquire(task_name)
+
                 # Create a thread
                 thread = openai.beta.threads.create()
 
@@ -129,25 +282,20 @@ def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
                     ],
                 )
 
-                # Create a run
-                run = openai.beta.threads.runs.create(
-                    thread_id=thread.id,
-                    assistant_id=ASSISTANT_ID.strip(),
-                    tools=[{"type": "file_search"}],
+                # Run the assistant and wait for a terminal status
+                run = execute_run(
+                    openai,
+                    thread.id,
+                    ASSISTANT_ID.strip(),
+                    task_name,
+                    logger,
+                    RUN_COMPLETION_STRATEGY,
                 )
-
-                # Poll the run status
-                while True:
-                    run_status_response = openai.beta.threads.runs.retrieve(
-                        thread_id=thread.id, run_id=run.id
-                    )
-                    if run_status_response.status == "completed":
-                        break
-                    elif run_status_response.status in ["failed", "cancelled"]:
-                        error_msg = f"{task_name} failed with status: {run_status_response.status}"
-                        log_error(logger, error_msg)
-                        return error_msg, {}
-                    time.sleep(1)
+                admission.observe_run(task_name, run)
+                if run.status != "completed":
+                    error_msg = f"{task_name} failed with status: {run.status}"
+                    log_error(logger, error_msg)
+                    return error_msg, {}
 
                 # Retrieve messages with raw response to access headers
                 raw_response = openai.beta.threads.messages.with_raw_response.list(
@@ -161,58 +309,329 @@ def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
                 )  # Access headers from LegacyAPIResponse
 
                 # Extract the assistant's response
-                response = "\n".join(
-                    content.text.value
-                    for msg in messages_response.data
-                    if msg.role == "assistant"
-                    for content in msg.content
-                    if content.type == "text"
-                )
+                response = extract_assistant_text(messages_response)
                 log_raw_response(logger, task_name, response, source="AI")
 
                 # Extract rate limit headers
-                rate_limit_headers = {
-                    "remaining_requests": response_headers.get(
-                        "x-ratelimit-remaining-requests", "N/A"
-                    ),
-                    "limit_requests": response_headers.get(
-                        "x-ratelimit-limit-requests", "N/A"
-                    ),
-                    "reset_requests": response_headers.get(
-                        "x-ratelimit-reset-requests", "N/A"
-                    ),
-                    "remaining_tokens": response_headers.get(
-                        "x-ratelimit-remaining-tokens", "N/A"
-                    ),
-                    "limit_tokens": response_headers.get(
-                        "x-ratelimit-limit-tokens", "N/A"
-                    ),
-                    "reset_tokens": response_headers.get(
-                        "x-ratelimit-reset-tokens", "N/A"
-                    ),
-                }
+                rate_limit_headers = extract_rate_limit_headers(response_headers)
+                admission.update(rate_limit_headers)
                 logger.info(f"Rate limit info for {task_name}: {rate_limit_headers}")
 
+                cache_response(
+                    cache_key, response, rate_limit_headers, task_name, logger
+                )
+
                 return (
                     response if response else "No response generated."
                 ), rate_limit_headers
 
+            except RETRYABLE_ERRORS as e:
+                back_off(e)
+                raise
             except openai.APIError as e:
-                if isinstance(e, openai.RateLimitError):
-                    retry_after = getattr(e, "headers", {}).get("Retry-After", "N/A")
-                    error_msg = f"OpenAI API request exceeded rate limit in {task_name}: {str(e)}, Retry-After: {retry_after}s"
-                else:
-                    error_msg = (
-                        f"OpenAI API returned an API Error in {task_name}: {str(e)}"
-                    )
-                log_error(logger, error_msg)
-                return error_msg, {}
+                return api_error_response(e, task_name, logger)
             except Exception as e:
                 error_msg = f"Unexpected error in {task_name}: {str(e)}"
                 log_error(logger, error_msg)
                 return error_msg, {}
 
 
+def get_async_resources():
+    """Return the (AsyncOpenAI client, asyncio.Semaphore) pair for the running loop."""
+    loop = asyncio.get_running_loop()
+    resources = _async_loop_resources.get(loop)
+    if resources is None:
+        resources = (openai.AsyncOpenAI(), get_async_semaphore())
+        _async_loop_resources[loop] = resources
+    return resources
+
+
+def get_async_semaphore():
+    """The running loop's request semaphore, without creating an API client."""
+    loop = asyncio.get_running_loop()
+    async_semaphore = _async_loop_semaphores.get(loop)
+    if async_semaphore is None:
+        async_semaphore = asyncio.Semaphore(MAX_CONCURRENT_ASYNC_REQUESTS)
+        _async_loop_semaphores[loop] = async_semaphore
+    return async_semaphore
+
+
+def back_off(e):
+    """Admit no new runs for as long as a rate limit error asks."""
+    if isinstance(e, openai.RateLimitError):
+        admission.hold_off(retry_after_seconds(e))
+
+
+def api_error_response(e, task_name, logger):
+    """Log an API error and turn it into the (message, headers) result of a prompt."""
+    error_msg = format_api_error(e, task_name)
+    log_error(logger, error_msg)
+    return error_msg, {}
+
+
+def simulate_prompt(task_name, logger):
+    """Answer with the mock response after a run drawn from the simulation profile."""
+    try:
+        admission.acquire(task_name)
+        latency, error, run, headers = simulation_profile.plan(task_name)
+        time.sleep(latency)
+        return finish_simulated_run(task_name, logger, error, run, headers)
+    except RETRYABLE_ERRORS as e:
+        back_off(e)
+        raise
+    except openai.APIError as e:
+        return api_error_response(e, task_name, logger)
+
+
+async def simulate_prompt_async(task_name, logger):
+    async with get_async_semaphore():
+        try:
+            await admission.acquire_async(task_name)
+            latency, error, run, headers = simulation_profile.plan(task_name)
+            await asyncio.sleep(latency)
+            return finish_simulated_run(task_name, logger, error, run, headers)
+        except RETRYABLE_ERRORS as e:
+            back_off(e)
+            raise
+        except openai.APIError as e:
+            return api_error_response(e, task_name, logger)
+
+
+def finish_simulated_run(task_name, logger, error, run, headers):
+    """Treat a simulated run's outcome the way run_prompt treats a real one."""
+    if error is not None:
+        raise error
+    admission.observe_run(task_name, run)
+    if run.status != "completed":
+        error_msg = f"{task_name} failed with status: {run.status}"
+        log_error(logger, error_msg)
+        return error_msg, {}
+    response = load_mock_response(task_name)
+    log_raw_response(logger, task_name, response, source="Mock")
+    rate_limit_headers = extract_rate_limit_headers(headers)
+    admission.update(rate_limit_headers)
+    logger.info(f"Rate limit info for {task_name}: {rate_limit_headers}")
+    return response, rate_limit_headers
+
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    after=log_retry(logging.getLogger()),
+    retry_error_callback=retries_exhausted,
+)
+async def run_prompt_async(file_ids, prompt, task_name, logger, simulation_mode):
+    """Async counterpart of run_prompt: waits on the event loop instead of a thread."""
+    if simulation_mode:
+        if simulation_profile is not None:
+            return await simulate_prompt_async(task_name, logger)
+        response = load_mock_response(task_name)
+        log_raw_response(logger, task_name, response, source="Mock")
+        return response, {}
+
+    # The first key fetches the assistant settings over HTTP, so keys are built off the loop
+    cache_key = (
+        None
+        if response_cache is None
+        else await asyncio.to_thread(
+            response_cache_key, file_ids, prompt, task_name, logger
+        )
+    )
+    cached = cached_response(cache_key, task_name, logger)
+    if cached is not None:
+        return cached
+
+    client, async_semaphore = get_async_resources()
+    async with async_semaphore:
+        try:
+            await admission.acquire_async(task_name)
+
+            # Create a thread
+            thread = await client.beta.threads.create()
+
+            # Create a message in the thread
+            await client.beta.threads.messages.create(
+                thread_id=thread.id,
+                role="user",
+                content=prompt,
+                attachments=[
+                    {"file_id": fid, "tools": [{"type": "file_search"}]}
+                    for fid in file_ids
+                ],
+            )
+
+            # Run the assistant without blocking the event loop
+            run = await execute_run_async(
+                client,
+                thread.id,
+                ASSISTANT_ID.strip(),
+                task_name,
+                logger,
+                RUN_COMPLETION_STRATEGY,
+            )
+            admission.observe_run(task_name, run)
+            if run.status != "completed":
+                error_msg = f"{task_name} failed with status: {run.status}"
+                log_error(logger, error_msg)
+                return error_msg, {}
+
+            raw_response = await client.beta.threads.messages.with_raw_response.list(
+                thread_id=thread.id
+            )
+            messages_response = raw_response.parse()
+            response = extract_assistant_text(messages_response)
+            log_raw_response(logger, task_name, response, source="AI")
+
+            rate_limit_headers = extract_rate_limit_headers(raw_response.headers)
+            admission.update(rate_limit_headers)
+            logger.info(f"Rate limit info for {task_name}: {rate_limit_headers}")
+
+            cache_response(cache_key, response, rate_limit_headers, task_name, logger)
+
+            return (
+                response if response else "No response generated."
+            ), rate_limit_headers
+
+        except RETRYABLE_ERRORS as e:
+            back_off(e)
+            raise
+        except openai.APIError as e:
+            return api_error_response(e, task_name, logger)
+        except Exception as e:
+            error_msg = f"Unexpected error in {task_name}: {str(e)}"
+            log_error(logger, error_msg)
+            return error_msg, {}
+
+
+def extract_assistant_text(messages_response):
+    """Join the text blocks of all assistant messages in a thread."""
+    return "\n".join(
+        cite_annotations(content.text)
+        for msg in messages_response.data
+        if msg.role == "assistant"
+        for content in msg.content
+        if content.type == "text"
+    )
+
+
+def cite_annotations(text):
+    """Text of a message block with each file citation replaced by 【file_id】.
+
+    The Assistants API reports citations as annotations with offsets into
+    the block and the cited file's ID. They are spliced in while those
+    offsets are still valid, so later stages resolve a citation with a
+    lookup of its file ID instead of guessing from the marker text.
+    """
+    citations = sorted(
+        (annotation.start_index, annotation.end_index, annotation.file_citation.file_id)
+        for annotation in getattr(text, "annotations", None) or ()
+        if annotation.type == "file_citation"
+    )
+    if not citations:
+        return text.value
+    parts = []
+    position = 0
+    for start, end, file_id in citations:
+        if start < position:
+            continue
+        parts.append(text.value[position:start])
+        parts.append(f"【{file_id}】")
+        position = end
+    parts.append(text.value[position:])
+    return "".join(parts)
+
+
+def extract_rate_limit_headers(response_headers):
+    """Pick the x-ratelimit-* headers out of an API response."""
+    return {
+        "remaining_requests": response_headers.get(
+            "x-ratelimit-remaining-requests", "N/A"
+        ),
+        "limit_requests": response_headers.get("x-ratelimit-limit-requests", "N/A"),
+        "reset_requests": response_headers.get("x-ratelimit-reset-requests", "N/A"),
+        "remaining_tokens": response_headers.get("x-ratelimit-remaining-tokens", "N/A"),
+        "limit_tokens": response_headers.get("x-ratelimit-limit-tokens", "N/A"),
+        "reset_tokens": response_headers.get("x-ratelimit-reset-tokens", "N/A"),
+    }
+
+
+def format_api_error(e, task_name):
+    if isinstance(e, openai.RateLimitError):
+        retry_after = getattr(e, "headers", {}).get("Retry-After", "N/A")
+        return f"OpenAI API request exceeded rate limit in {task_name}: {str(e)}, Retry-After: {retry_after}s"
+    return f"OpenAI API returned an API Error in {task_name}: {str(e)}"
+
+
+def build_section_data(file_ids, file_id_to_name, entries):
+    """Format per-file results as the "File: <name>" blocks used by synthesis prompts."""
+    return "\n\n".join(
+        [
+            f"File: {file_id_to_name[file_id]}\n{entry}"
+            for file_id, entry in zip(file_ids, entries)
+            if entry.strip() and entry.strip() != "NO_INFO_FOUND"
+        ]
+    )
+
+
+def summary_reduce_groups(summaries, max_tokens=SUMMARY_REDUCE_TOKENS):
+    """Split partial summaries into consecutive groups to merge, each within max_tokens.
+
+    A group always takes at least two summaries, so every level of the tree
+    shrinks however large single summaries are.
+    """
+    groups = []
+    group_tokens = 0
+    for summary in summaries:
+        tokens = len(summary) // 4
+        if groups and (len(groups[-1]) < 2 or group_tokens + tokens <= max_tokens):
+            groups[-1].append(summary)
+            group_tokens += tokens
+        else:
+            groups.append([summary])
+            group_tokens = tokens
+    return groups
+
+
+def needs_reduce(summaries, max_tokens=SUMMARY_REDUCE_TOKENS):
+    return len(summaries) > 1 and sum(len(s) for s in summaries) // 4 > max_tokens
+
+
+def summary_synthesis_prompts(file_ids, file_id_to_name, all_dates, all_requirements):
+    """(prompt, task name) of the dates and requirements syntheses, None when empty."""
+    dates_data = build_section_data(file_ids, file_id_to_name, all_dates)
+    requirements_data = build_section_data(file_ids, file_id_to_name, all_requirements)
+    return [
+        (
+            (
+                format_prompt(SYNTHESIZE_DATES_PROMPT, dates_data=dates_data),
+                "Synthesize Dates for Summary",
+            )
+            if dates_data
+            else None
+        ),
+        (
+            (
+                format_prompt(
+                    SYNTHESIZE_REQUIREMENTS_PROMPT, requirements_data=requirements_data
+                ),
+                "Synthesize Requirements for Summary",
+            )
+            if requirements_data
+            else None
+        ),
+    ]
+
+
+def final_summary_prompt(summaries, synthesized_dates, synthesized_requirements):
+    return format_prompt(
+        FINAL_SUMMARY_PROMPT,
+        partial_summaries="\n\n".join(summaries),
+        synthesized_dates=synthesized_dates,
+        synthesized_requirements=synthesized_requirements,
+    )
+
+
 def generate_summary_in_batches(
     file_ids,
     file_id_to_name,
@@ -222,66 +641,71 @@ def generate_summary_in_batches(
     batch_size=10,
     simulation_mode=False,
 ):
-    summaries = []
-    for i in range(0, len(file_ids), batch_size):
-        batch_file_ids = file_ids[i : i + batch_size]
-        batch_summary, _ = run_prompt(
-            batch_file_ids,
-            SUMMARY_PROMPT,
-            "Tender Summary Batch",
-            logger,
-            simulation_mode,
-        )
-        summaries.append(batch_summary)
+    """Summarize a large tender as a parallel map-reduce.
+
+    The batch summaries run concurrently with the dates and requirements
+    syntheses. While the partial summaries are over SUMMARY_REDUCE_TOKENS,
+    they are merged in concurrent groups, one tree level at a time, so the
+    wall-clock time follows the depth of the tree rather than the number of
+    batches (up to the request concurrency limit).
+    """
+    with ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="tender-summary"
+    ) as executor:
+
+        def submit(batch_file_ids, prompt, task_name):
+            return executor.submit(
+                run_prompt, batch_file_ids, prompt, task_name, logger, simulation_mode
+            )
 
-    dates_data = "\n\n".join(
-        [
-            f"File: {file_id_to_name[file_id]}\n{dates}"
-            for file_id, dates in zip(file_ids, all_dates)
-            if dates.strip() and dates.strip() != "NO_INFO_FOUND"
+        syntheses = [
+            submit([], *synthesis) if synthesis else None
+            for synthesis in summary_synthesis_prompts(
+                file_ids, file_id_to_name, all_dates, all_requirements
+            )
         ]
-    )
-    synthesized_dates, _ = (
-        run_prompt(
-            [],
-            format_prompt(SYNTHESIZE_DATES_PROMPT, dates_data=dates_data),
-            "Synthesize Dates for Summary",
-            logger,
-            simulation_mode,
-        )
-        if dates_data
-        else ("NO_INFO_FOUND", {})
-    )
+        batches = [
+            submit(file_ids[i : i + batch_size], SUMMARY_PROMPT, "Tender Summary Batch")
+            for i in range(0, len(file_ids), batch_size)
+        ]
+        summaries = [batch.result()[0] for batch in batches]
 
-    requirements_data = "\n\n".join(
-        [
-            f"File: {file_id_to_name[file_id]}\n{reqs}"
-            for file_id, reqs in zip(file_ids, all_requirements)
-            if reqs.strip() and reqs.strip() != "NO_INFO_FOUND"
+        level = 0
+        while needs_reduce(summaries, SUMMARY_REDUCE_TOKENS):
+            level += 1
+            groups = summary_reduce_groups(summaries, SUMMARY_REDUCE_TOKENS)
+            logger.info(
+                f"Merging {len(summaries)} partial summaries in {len(groups)} groups "
+                f"(summary tree level {level})"
+            )
+            merges = [
+                (
+                    submit(
+                        [],
+                        format_prompt(
+                            MERGE_SUMMARIES_PROMPT,
+                            partial_summaries="\n\n".join(group),
+                        ),
+                        f"Tender Summary Merge {level}.{i + 1}",
+                    )
+                    if len(group) > 1
+                    else group[0]
+                )
+                for i, group in enumerate(groups)
+            ]
+            summaries = [
+                merge if isinstance(merge, str) else merge.result()[0]
+                for merge in merges
+            ]
+
+        synthesized_dates, synthesized_requirements = [
+            synthesis.result()[0] if synthesis else "NO_INFO_FOUND"
+            for synthesis in syntheses
         ]
-    )
-    synthesized_requirements, _ = (
-        run_prompt(
-            [],
-            format_prompt(
-                SYNTHESIZE_REQUIREMENTS_PROMPT, requirements_data=requirements_data
-            ),
-            "Synthesize Requirements for Summary",
-            logger,
-            simulation_mode,
-        )
-        if requirements_data
-        else ("NO_INFO_FOUND", {})
-    )
 
     final_summary, _ = run_prompt(
         [],
-        format_prompt(
-            FINAL_SUMMARY_PROMPT,
-            partial_summaries="\n\n".join(summaries),
-            synthesized_dates=synthesized_dates,
-            synthesized_requirements=synthesized_requirements,
-        ),
+        final_summary_prompt(summaries, synthesized_dates, synthesized_requirements),
         "Final Tender Summary",
         logger,
         simulation_mode,
@@ -289,310 +713,971 @@ def generate_summary_in_batches(
     return final_summary
 
 
-def extract_dates_fallback(file_content, file_name):
-    """Fallback date extraction using regex with improved sentence boundary detection."""
-    import re
-    import datetime
+async def generate_summary_in_batches_async(
+    file_ids,
+    file_id_to_name,
+    logger,
+    all_dates,
+    all_requirements,
+    batch_size=10,
+    simulation_mode=False,
+):
+    """Async counterpart of generate_summary_in_batches."""
 
-    date_patterns = [
-        (r"\d{2}\.\d{2}\.\d{4}(?:\s+at\s+\d{1,2}h)?", "DD.MM.YYYY"),
-        (r"\d{4}-\d{2}-\d{2}", "YYYY-MM-DD"),
-        (
-            r"\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}",
-            "D Month YYYY",
-        ),
-        (
-            r"(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}",
-            "Month YYYY",
-        ),
-        (r"\d{1,2}/\d{1,2}/\d{4}", "DD/MM/YYYY"),
+    def start(batch_file_ids, prompt, task_name):
+        return asyncio.ensure_future(
+            run_prompt_async(batch_file_ids, prompt, task_name, logger, simulation_mode)
+        )
+
+    syntheses = [
+        start([], *synthesis) if synthesis else None
+        for synthesis in summary_synthesis_prompts(
+            file_ids, file_id_to_name, all_dates, all_requirements
+        )
     ]
-    dates = []
-    matched_spans = []  # Track spans of matched dates to avoid duplicates
-    month_map = {
-        "january": "January",
-        "february": "February",
-        "march": "March",
-        "april": "April",
-        "may": "May",
-        "june": "June",
-        "july": "July",
-        "august": "August",
-        "september": "September",
-        "october": "October",
-        "november": "November",
-        "december": "December",
-    }
+    try:
+        batch_summaries = [
+            start(file_ids[i : i + batch_size], SUMMARY_PROMPT, "Tender Summary Batch")
+            for i in range(0, len(file_ids), batch_size)
+        ]
+        summaries = [summary for summary, _ in await asyncio.gather(*batch_summaries)]
 
-    def is_valid_date(date_str, pattern_type):
-        """Validate if a date string represents a real date."""
-        if pattern_type == "Month YYYY":
-            month, year = date_str.split()
-            year = int(year)
-            return 1000 <= year <= 9999
-        try:
-            if pattern_type in ["DD.MM.YYYY", "DD/MM/YYYY"]:
-                day, month, year = map(
-                    int, date_str.split(" at ")[0].replace(".", "/").split("/")
+        level = 0
+        while needs_reduce(summaries, SUMMARY_REDUCE_TOKENS):
+            level += 1
+            groups = summary_reduce_groups(summaries, SUMMARY_REDUCE_TOKENS)
+            logger.info(
+                f"Merging {len(summaries)} partial summaries in {len(groups)} groups "
+                f"(summary tree level {level})"
+            )
+            summaries = [
+                summary
+                for summary, _ in await asyncio.gather(
+                    *(
+                        (
+                            start(
+                                [],
+                                format_prompt(
+                                    MERGE_SUMMARIES_PROMPT,
+                                    partial_summaries="\n\n".join(group),
+                                ),
+                                f"Tender Summary Merge {level}.{i + 1}",
+                            )
+                            if len(group) > 1
+                            else passthrough(group[0])
+                        )
+                        for i, group in enumerate(groups)
+                    )
                 )
-                datetime.datetime(year, month, day)
-                return True
-            elif pattern_type == "YYYY-MM-DD":
-                year, month, day = map(int, date_str.split("-"))
-                datetime.datetime(year, month, day)
-                return True
-            elif pattern_type == "D Month YYYY":
-                parts = date_str.split()
-                day, month, year = parts[0], parts[1], parts[2]
-                day = int(day)
-                year = int(year)
-                month = month_map.get(month.lower(), month)
-                month_num = list(month_map.values()).index(month) + 1
-                datetime.datetime(year, month_num, day)
-                return True
-        except (ValueError, IndexError):
-            return False
-        return False
+            ]
 
-    for pattern, pattern_type in date_patterns:
-        for match in re.finditer(pattern, file_content, re.IGNORECASE):
-            start, end = match.start(), match.end()
-            if any(
-                m_start <= start < m_end or m_start < end <= m_end
-                for m_start, m_end in matched_spans
-            ):
-                continue
-
-            date = match.group()
-            is_valid = is_valid_date(date, pattern_type)
-            if not is_valid:
-                if pattern_type == "D Month YYYY":
-                    matched_spans.append((start, end))
-                continue
-
-            original_date = date
-            for month_lower, month_proper in month_map.items():
-                date = re.sub(
-                    rf"\b{month_lower}\b", month_proper, date, flags=re.IGNORECASE
-                )
-            matched_spans.append((start, end))
+        synthesized_dates, synthesized_requirements = [
+            (await synthesis)[0] if synthesis else "NO_INFO_FOUND"
+            for synthesis in syntheses
+        ]
+    finally:
+        # Failed part-way: do not leave the syntheses running unobserved
+        for synthesis in syntheses:
+            if synthesis is not None and not synthesis.done():
+                synthesis.cancel()
 
-            # Improved sentence boundary detection
-            sentence_start = file_content.rfind(".", 0, start)
-            if (
-                sentence_start == -1
-                or file_content[sentence_start:start].count("\n") > 0
-            ):
-                sentence_start = file_content.rfind("\n", 0, start)
-            if sentence_start == -1:
-                sentence_start = 0
-            else:
-                sentence_start += 1
+    final_summary, _ = await run_prompt_async(
+        [],
+        final_summary_prompt(summaries, synthesized_dates, synthesized_requirements),
+        "Final Tender Summary",
+        logger,
+        simulation_mode,
+    )
+    return final_summary
 
-            sentence_end = file_content.find(".", end)
-            if sentence_end == -1 or file_content[end:sentence_end].count("\n") > 0:
-                sentence_end = file_content.find("\n", end)
-            if sentence_end == -1:
-                sentence_end = len(file_content)
 
-            context = (
-                file_content[sentence_start:sentence_end].replace("\n", " ").strip()
+async def passthrough(summary):
+    """A summary that goes up a tree level without merging, as a run result."""
+    return summary, {}
+
+
+MONTH_NAMES = (
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+)
+_MONTHS = "|".join(MONTH_NAMES)
+# Tried in order; a match overlapping an earlier accepted one is skipped
+DATE_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), pattern_type)
+    for pattern, pattern_type in [
+        (r"\d{2}\.\d{2}\.\d{4}(?:\s+at\s+\d{1,2}h)?", "DD.MM.YYYY"),
+        (r"\d{4}-\d{2}-\d{2}", "YYYY-MM-DD"),
+        (rf"\d{{1,2}}\s+(?:{_MONTHS})\s+\d{{4}}", "D Month YYYY"),
+        (rf"(?:{_MONTHS})\s+\d{{4}}", "Month YYYY"),
+        (r"\d{1,2}/\d{1,2}/\d{4}", "DD/MM/YYYY"),
+    ]
+]
+MONTH_NUMBERS = {name.lower(): i for i, name in enumerate(MONTH_NAMES, 1)}
+PROPER_MONTHS = {name.lower(): name for name in MONTH_NAMES}
+MONTH_WORD = re.compile(rf"\b({_MONTHS})\b", re.IGNORECASE)
+SENTENCE_BOUNDARY = re.compile(r"[.\n]")
+EVENT_PUNCTUATION = re.compile(r"[.,!;\"'()[\]{}]+")
+WHITESPACE = re.compile(r"\s+")
+# Characters of text held at once when scanning a document for dates
+DATE_WINDOW_CHARS = 64 * 1024
+
+
+def is_valid_date(date_str, pattern_type):
+    """Validate if a date string represents a real date."""
+    if pattern_type == "Month YYYY":
+        month, year = date_str.split()
+        year = int(year)
+        return 1000 <= year <= 9999
+    try:
+        if pattern_type in ["DD.MM.YYYY", "DD/MM/YYYY"]:
+            day, month, year = map(
+                int, date_str.split(" at ")[0].replace(".", "/").split("/")
             )
+            datetime(year, month, day)
+            return True
+        elif pattern_type == "YYYY-MM-DD":
+            year, month, day = map(int, date_str.split("-"))
+            datetime(year, month, day)
+            return True
+        elif pattern_type == "D Month YYYY":
+            day, month, year = date_str.split()[:3]
+            datetime(int(year), MONTH_NUMBERS[month.lower()], int(day))
+            return True
+    except (ValueError, IndexError, KeyError):
+        return False
+    return False
+
+
+class SpanIndex:
+    """Union of accepted [start, end) match spans, kept as sorted disjoint intervals."""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def covers(self, position):
+        i = bisect.bisect_right(self.starts, position) - 1
+        return i >= 0 and position < self.ends[i]
+
+    def add(self, start, end):
+        # Merge with every interval it touches
+        lo = bisect.bisect_left(self.ends, start)
+        hi = bisect.bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+    def discard_before(self, position):
+        """Forget spans ending at or before position, which no later match can overlap."""
+        i = bisect.bisect_right(self.ends, position)
+        del self.starts[:i]
+        del self.ends[:i]
+
+
+class DateScanner:
+    """Incremental state of extract_dates_fallback.
+
+    Text can be scanned in consecutive windows at absolute offsets; results
+    stay grouped by pattern, in the order a single pass would produce them.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.matched_spans = SpanIndex()  # Spans of matched dates, to avoid duplicates
+        self.resume = [0] * len(DATE_PATTERNS)  # Where each pattern's search resumes
+        self.dates = [[] for _ in DATE_PATTERNS]
+
+    def scan(self, text, offset=0, limit=None):
+        """Scan text starting at absolute `offset`, up to matches starting at `limit`."""
+        self.matched_spans.discard_before(offset)
+        boundaries = None  # Offsets of every "." and newline, built on first use
+
+        for k, (pattern, pattern_type) in enumerate(DATE_PATTERNS):
+            for match in pattern.finditer(text, max(self.resume[k] - offset, 0)):
+                start, end = match.start() + offset, match.end() + offset
+                if limit is not None and start >= limit:
+                    # Left to the next window, which has the rest of its line
+                    break
+                self.resume[k] = end
+                if self.matched_spans.covers(start) or self.matched_spans.covers(
+                    end - 1
+                ):
+                    continue
+
+                date = match.group()
+                if not is_valid_date(date, pattern_type):
+                    if pattern_type == "D Month YYYY":
+                        self.matched_spans.add(start, end)
+                    continue
+
+                original_date = date
+                date = MONTH_WORD.sub(lambda m: PROPER_MONTHS[m.group(1).lower()], date)
+                self.matched_spans.add(start, end)
+
+                # The sentence runs from the last "." or newline before the date
+                # to the first one after it
+                if boundaries is None:
+                    boundaries = [m.start() for m in SENTENCE_BOUNDARY.finditer(text)]
+                i = bisect.bisect_left(boundaries, match.start())
+                sentence_start = boundaries[i - 1] + 1 if i > 0 else 0
+                i = bisect.bisect_left(boundaries, match.end())
+                sentence_end = boundaries[i] if i < len(boundaries) else len(text)
+
+                context = text[sentence_start:sentence_end].replace("\n", " ").strip()
+
+                # Clean up the context by removing only the matched date
+                event = context.replace(original_date, "").strip()
+                # Normalize spaces and remove punctuation
+                event = EVENT_PUNCTUATION.sub(" ", event).strip()
+                event = WHITESPACE.sub(" ", event).strip()
+                if event:
+                    self.dates[k].append(f"- {date}, {event}, Source: {self.file_name}")
+
+    def result(self):
+        dates = [line for pattern_dates in self.dates for line in pattern_dates]
+        return "\n".join(dates) if dates else "NO_INFO_FOUND"
 
-            # Clean up the context by removing only the matched date
-            event = context.replace(original_date, "").strip()
-            # Normalize spaces and remove punctuation
-            event = re.sub(r"[.,!;\"'()[\]{}]+", " ", event).strip()
-            event = re.sub(r"\s+", " ", event).strip()
-            if event:
-                dates.append(f"- {date}, {event}, Source: {file_name}")
 
-    return "\n".join(dates) if dates else "NO_INFO_FOUND"
+def extract_dates_fallback(file_content, file_name):
+    """Fallback date extraction using regex with improved sentence boundary detection."""
+    scanner = DateScanner(file_name)
+    scanner.scan(file_content)
+    return scanner.result()
+
+
+def iter_lines(pages):
+    """Yield the lines of "\n".join(pages), each with its newline, one page at a time."""
+    pending = ""
+    for i, page in enumerate(pages):
+        lines = (pending + ("\n" if i else "") + page).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    yield pending
+
+
+def extract_dates_from_pages(pages, file_name, window_chars=DATE_WINDOW_CHARS):
+    """extract_dates_fallback over "\n".join(pages), holding only a window of lines.
+
+    Each window starts with the previous window's last line, so a date that
+    wraps onto the next line or page keeps its match and sentence context;
+    matches starting in a window's last line are left to the next window.
+    Dates spanning more than one line break may be missed.
+    """
+    scanner = DateScanner(file_name)
+    offset = 0
+    lines = []
+    size = 0
+    for line in iter_lines(pages):
+        lines.append(line)
+        size += len(line)
+        if size >= window_chars and len(lines) > 1:
+            window = "".join(lines)
+            carry = lines[-1]
+            limit = offset + len(window) - len(carry)
+            scanner.scan(window, offset, limit)
+            offset = limit
+            lines = [carry]
+            size = len(carry)
+    scanner.scan("".join(lines), offset)
+    return scanner.result()
+
+
+def extract_local_dates(documents, file_name, logger):
+    """Run the regex date extraction over a stored document, or return None."""
+    if not documents.supports(file_name):
+        return None
+    try:
+        # Streamed page by page, the document is never held as one string
+        return extract_dates_from_pages(documents.iter_pages(file_name), file_name)
+    except Exception as e:
+        log_error(logger, f"Local date extraction failed for {file_name}: {str(e)}")
+        return None
+
+
+def merge_local_dates(all_dates, all_local_dates):
+    """Append each file's pattern-matched dates to its AI dates for synthesis."""
+    merged = []
+    for dates, local_dates in zip(all_dates, all_local_dates):
+        if local_dates and local_dates != "NO_INFO_FOUND" and local_dates not in dates:
+            header = "Pattern-matched dates (local scan):"
+            if dates.strip() and dates.strip() != "NO_INFO_FOUND":
+                dates = f"{dates}\n{header}\n{local_dates}"
+            else:
+                dates = f"{header}\n{local_dates}"
+        merged.append(dates)
+    return merged
 
 
-def extract_text_from_docx(file):
-    """Extract text from a .docx file."""
-    doc = Document(file)
-    full_text = []
-    for para in doc.paragraphs:
-        full_text.append(para.text)
-    return "\n".join(full_text)
+FILE_TASK_KEYS = ("dates", "requirements", "folder_structure", "client_info")
+COMBINED_TASK_KEY = "combined"
 
 
-def analyze_file_batch(
-    batch_file_ids,
-    file_id_to_name,
-    progress_log_messages,
-    lock,
-    uploaded_files,
-    batch_number,
-    total_batches,
-    total_files,
-    files_text,
-    logger,
-    update_progress,
-    simulation_mode,
-):
-    batch_results = []
-    batch_start = (batch_number - 1) * len(batch_file_ids) + 1
-    batch_end = min(batch_start + len(batch_file_ids) - 1, total_files)
-    batch_files = [file_id_to_name[file_id] for file_id in batch_file_ids]
-    files_text.markdown(
-        f"**Files being analyzed:** {', '.join(batch_files)} ({batch_start}-{batch_end} of {total_files})"
-    )
+def file_task_keys(extraction_mode):
+    """Result keys each file produces under the given extraction mode."""
+    keys = [] if extraction_mode == "combined" else list(FILE_TASK_KEYS)
+    if extraction_mode in ("combined", "parity"):
+        keys.append(COMBINED_TASK_KEY)
+    return keys
 
-    for file_id in batch_file_ids:
-        file_name = file_id_to_name[file_id]
-        logger.info(f"Starting analysis for {file_name}")
 
-        with lock:
-            progress_log_messages.append(f"Analyzing {file_name}...")
-
-        def analyze_task(file_id, prompt, task_name, simulation_mode):
-            try:
-                response, rate_limit_headers = run_prompt(
-                    [file_id], prompt, task_name, logger, simulation_mode
-                )
-                # Log rate limit headers for monitoring
-                try:
-                    remaining_requests = rate_limit_headers.get(
-                        "remaining_requests", "N/A"
-                    )
-                    remaining_tokens = rate_limit_headers.get("remaining_tokens", "N/A")
-                    if remaining_requests != "N/A":
-                        remaining_requests = int(remaining_requests)
-                        if remaining_requests < 50:
-                            warning_msg = f"Low remaining requests: {remaining_requests} for {task_name}"
-                            logger.warning(warning_msg)
-                            with lock:
-                                progress_log_messages.append(warning_msg)
-                    if remaining_tokens != "N/A":
-                        remaining_tokens = int(remaining_tokens)
-                        if remaining_tokens < 10000:
-                            warning_msg = f"Low remaining tokens: {remaining_tokens} for {task_name}"
-                            logger.warning(warning_msg)
-                            with lock:
-                                progress_log_messages.append(warning_msg)
-                except (ValueError, TypeError):
-                    logger.warning(
-                        f"Could not parse rate limit headers for {task_name}: {rate_limit_headers}"
-                    )
-                return response
-            except Exception as e:
-                error_msg = f"Error analyzing {task_name} in {file_name}: {str(e)}"
-                log_error(logger, error_msg)
-                return error_msg
-
-        with ThreadPoolExecutor(max_workers=MAX_THREAD_WORKERS) as executor:
-            futures = {
-                "dates": executor.submit(
-                    analyze_task,
-                    file_id,
+def build_file_tasks(file_id, file_name, extraction_mode="separate"):
+    """Return the per-file prompts keyed by result name: {key: (prompt, task_name)}."""
+    tasks = {}
+    if extraction_mode != "combined":
+        tasks.update(
+            {
+                "dates": (
                     format_prompt(DATES_PROMPT, file_name=file_name),
                     f"Dates for {file_name}",
-                    simulation_mode,
                 ),
-                "requirements": executor.submit(
-                    analyze_task,
-                    file_id,
+                "requirements": (
                     REQUIREMENTS_PROMPT,
                     f"Requirements for {file_name}",
-                    simulation_mode,
                 ),
-                "folder_structure": executor.submit(
-                    analyze_task,
-                    file_id,
+                "folder_structure": (
                     format_prompt(FOLDER_STRUCTURE_PROMPT, file_name=file_name),
                     f"Folder Structure for {file_name}",
-                    simulation_mode,
                 ),
-                "client_info": executor.submit(
-                    analyze_task,
-                    file_id,
+                "client_info": (
                     format_prompt(CLIENT_INFO_PROMPT, file_name=file_name),
                     f"Client Info for {file_name}",
-                    simulation_mode,
                 ),
             }
+        )
+    if extraction_mode in ("combined", "parity"):
+        tasks[COMBINED_TASK_KEY] = (
+            format_prompt(
+                COMBINED_EXTRACTION_PROMPT,
+                file_name=file_name,
+                schema=json.dumps(COMBINED_EXTRACTION_SCHEMA, indent=2),
+                dates_prompt=format_prompt(DATES_PROMPT, file_name=file_name),
+                requirements_prompt=REQUIREMENTS_PROMPT,
+                folder_structure_prompt=format_prompt(
+                    FOLDER_STRUCTURE_PROMPT, file_name=file_name
+                ),
+                client_info_prompt=format_prompt(
+                    CLIENT_INFO_PROMPT, file_name=file_name
+                ),
+            ),
+            f"Combined Extraction for {file_name}",
+        )
+    return tasks
+
+
+def split_combined_response(response):
+    """Split a combined extraction response into the four per-task results.
+
+    Raises ValueError when the response does not hold a JSON object with every
+    section of COMBINED_EXTRACTION_SCHEMA.
+    """
+    start = response.find("{")
+    end = response.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("no JSON object in the combined extraction response")
+    data = json.loads(response[start : end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("combined extraction response is not a JSON object")
+
+    results = {}
+    for key in FILE_TASK_KEYS:
+        value = data.get(key)
+        if value is None:
+            raise ValueError(f"combined extraction response has no '{key}' section")
+        if isinstance(value, list):
+            value = "\n".join(str(item) for item in value)
+        value = str(value).strip()
+        results[key] = value if value else "NO_INFO_FOUND"
+    return results
+
+
+def compare_extractions(combined, separate):
+    """Compare combined and four-prompt results: {key: (similarity, same NO_INFO_FOUND outcome)}."""
+    comparison = {}
+    for key in FILE_TASK_KEYS:
+        combined_text = combined.get(key, "").strip()
+        separate_text = separate.get(key, "").strip()
+        similarity = difflib.SequenceMatcher(None, combined_text, separate_text).ratio()
+        same_outcome = ("NO_INFO_FOUND" in combined_text) == (
+            "NO_INFO_FOUND" in separate_text
+        )
+        comparison[key] = (similarity, same_outcome)
+    return comparison
 
-            results = {
-                "dates": "",
-                "requirements": "",
-                "folder_structure": "",
-                "client_info": "",
-            }
-            for future in as_completed(futures.values()):
-                task_name = [k for k, v in futures.items() if v == future][0]
-                try:
-                    results[task_name] = future.result()
-                    update_progress(
-                        f"Completed {task_name.capitalize()} for {file_name}",
-                        increment=True,
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"Task {task_name} for {file_name} failed after retries: {e}"
-                    )
-                    results[task_name] = f"Error: {e}"
-
-        dates_response = results["dates"]
-        requirements_response = results["requirements"]
-        folder_structure_response = results["folder_structure"]
-        client_info_response = results["client_info"]
-        dates_source = "AI"
-
-        if "NO_INFO_FOUND" in dates_response:
-            for file in uploaded_files:
-                if file.name == file_name:
-                    if file.name.lower().endswith(".pdf"):
-                        pdf_reader = PdfReader(BytesIO(file.getvalue()))
-                        file_content = "\n".join(
-                            page.extract_text() or "" for page in pdf_reader.pages
-                        )
-                        dates_response = extract_dates_fallback(file_content, file_name)
-                        dates_source = "Fallback"
-                    elif file.name.lower().endswith(".docx"):
-                        file_content = extract_text_from_docx(BytesIO(file.getvalue()))
-                        dates_response = extract_dates_fallback(file_content, file_name)
-                        dates_source = "Fallback"
-                    break
-            if (
-                dates_source == "Fallback"
-                and dates_response
-                and dates_response != "NO_INFO_FOUND"
-            ):
-                dates_response += " [fallback]"
 
-        dates_response = replace_citations(dates_response, file_id_to_name)
-        requirements_response = replace_citations(
-            requirements_response, file_id_to_name
+def log_extraction_parity(logger, file_name, combined, separate):
+    comparison = compare_extractions(combined, separate)
+    details = ", ".join(
+        f"{key}={similarity:.2f}"
+        + ("" if same_outcome else " (NO_INFO_FOUND mismatch)")
+        for key, (similarity, same_outcome) in comparison.items()
+    )
+    if all(same_outcome for _, same_outcome in comparison.values()):
+        logger.info(f"Extraction parity for {file_name}: {details}")
+    else:
+        logger.warning(f"Extraction parity for {file_name}: {details}")
+
+
+def resolve_file_results(results, file_name, logger):
+    """Reduce a file's collected unit results to the four per-task results."""
+    if COMBINED_TASK_KEY not in results:
+        return results
+    combined = results.pop(COMBINED_TASK_KEY)
+    if all(key in results for key in FILE_TASK_KEYS):
+        # Parity mode keeps the four-prompt results and only compares the combined run
+        if isinstance(combined, dict):
+            log_extraction_parity(logger, file_name, combined, results)
+        else:
+            logger.warning(f"Extraction parity for {file_name} skipped: {combined}")
+        return results
+    if isinstance(combined, dict):
+        return combined
+    return {key: combined for key in FILE_TASK_KEYS}
+
+
+def check_rate_limits(
+    rate_limit_headers, task_name, logger, progress_log_messages, lock
+):
+    """Log a warning when the rate limit headers show low remaining capacity."""
+    try:
+        remaining_requests = rate_limit_headers.get("remaining_requests", "N/A")
+        remaining_tokens = rate_limit_headers.get("remaining_tokens", "N/A")
+        if remaining_requests != "N/A":
+            remaining_requests = int(remaining_requests)
+            if remaining_requests < 50:
+                warning_msg = (
+                    f"Low remaining requests: {remaining_requests} for {task_name}"
+                )
+                logger.warning(warning_msg)
+                with lock:
+                    progress_log_messages.append(warning_msg)
+        if remaining_tokens != "N/A":
+            remaining_tokens = int(remaining_tokens)
+            if remaining_tokens < 10000:
+                warning_msg = (
+                    f"Low remaining tokens: {remaining_tokens} for {task_name}"
+                )
+                logger.warning(warning_msg)
+                with lock:
+                    progress_log_messages.append(warning_msg)
+    except (ValueError, TypeError):
+        logger.warning(
+            f"Could not parse rate limit headers for {task_name}: {rate_limit_headers}"
         )
-        folder_structure_response = replace_citations(
-            folder_structure_response, file_id_to_name
+
+
+def finalize_task_result(
+    key, response, file_name, file_id_to_name, local_dates, logger
+):
+    """Apply the date fallback and citation cleanup to one per-file task result.
+
+    `local_dates` is the file's extract_local_dates output; it only matters
+    for the "dates" key.
+    """
+    source = "AI"
+    if key == "dates" and "NO_INFO_FOUND" in response and local_dates is not None:
+        response = local_dates
+        source = "Fallback"
+        if response and response != "NO_INFO_FOUND":
+            response += " [fallback]"
+    response = replace_citations(response, file_id_to_name)
+    title = key.replace("_", " ").title()
+    log_raw_response(logger, f"{title} for {file_name}", response, source=source)
+    return response
+
+
+def finalize_file_results(file_id, results, file_id_to_name, local_dates, logger):
+    """Apply the date fallback and citation cleanup to one file's task results.
+
+    `local_dates` is the file's extract_local_dates output, computed while the
+    AI tasks were running.
+    """
+    file_name = file_id_to_name[file_id]
+    finalized = tuple(
+        finalize_task_result(
+            key, results[key], file_name, file_id_to_name, local_dates, logger
         )
-        client_info_response = replace_citations(client_info_response, file_id_to_name)
+        for key in FILE_TASK_KEYS
+    )
+    logger.info(f"Completed analysis for {file_name}")
+    return finalized
+
+
+def build_work_units(file_ids, file_id_to_name, extraction_mode="separate"):
+    """Expand files into (file x task) work units for the scheduler."""
+    return [
+        WorkUnit(file_id, file_id_to_name[file_id], key, prompt, task_name)
+        for file_id in file_ids
+        for key, (prompt, task_name) in build_file_tasks(
+            file_id, file_id_to_name[file_id], extraction_mode
+        ).items()
+    ]
 
-        log_raw_response(
-            logger, f"Dates for {file_name}", dates_response, source=dates_source
+
+def collect_task_result(unit, response, error, pending_results, expected_keys, logger):
+    """Store one finished unit; return the file's results once all its tasks are in."""
+    if error is not None:
+        logger.error(
+            f"Task {unit.key} for {unit.file_name} failed after retries: {error}"
         )
-        log_raw_response(logger, f"Requirements for {file_name}", requirements_response)
-        log_raw_response(
-            logger, f"Folder Structure for {file_name}", folder_structure_response
+        response = f"Error: {error}"
+    results = pending_results.setdefault(unit.file_id, {})
+    results[unit.key] = response
+    if not all(key in results for key in expected_keys):
+        return None
+    return resolve_file_results(
+        pending_results.pop(unit.file_id), unit.file_name, logger
+    )
+
+
+# Units whose finalization needs the file's local dates (for the date fallback)
+LOCAL_DATES_KEYS = ("dates", COMBINED_TASK_KEY)
+# Tender-level stages run next to the per-file tasks
+STAGE_WORKERS = 6
+
+
+class LocalDatesWait:
+    """Holds back the units that need their file's local dates until its scan is in.
+
+    A file's dates unit, and the unit that completes the file (which may
+    finalize its dates), wait here in arrival order while the file's scan is
+    still running, instead of blocking the loop that consumes the results;
+    other units and files go straight through to analysis.task_done. Units
+    are finalized on the consuming loop or in the scan's done callback, and
+    finished() hands the completed files back to the loop.
+    """
+
+    def __init__(self, analysis):
+        self.analysis = analysis
+        self.waiting = {}
+        self.watched = set()
+        self._finished = queue.SimpleQueue()
+        self._lock = threading.Lock()
+
+    def scan_started(self, file_id, future):
+        """Register a file's local dates future, before it is visible to its units."""
+        with self._lock:
+            watch = self._watch(file_id)
+        if watch:
+            future.add_done_callback(lambda future: self._scanned(file_id, future))
+
+    def add(self, unit, response, error, results, local_dates):
+        """Finalize a finished unit, once `local_dates` (the scan future) is done if needed."""
+        if unit.key not in LOCAL_DATES_KEYS and results is None:
+            self._finalize(unit, response, error, results, None)
+            return
+        with self._lock:
+            waiting = self.waiting.get(unit.file_id)
+            # A scan that was never registered is waited for all the same
+            watch = (
+                waiting is None and not local_dates.done() and self._watch(unit.file_id)
+            )
+            if watch:
+                waiting = self.waiting[unit.file_id]
+            if waiting is not None:
+                waiting.append((unit, response, error, results))
+            else:
+                self._finalize(unit, response, error, results, local_dates.result())
+        if watch:
+            local_dates.add_done_callback(
+                lambda future: self._scanned(unit.file_id, future)
+            )
+
+    def _watch(self, file_id):
+        """Start holding back a file's units; False if its scan is already watched."""
+        if file_id in self.watched:
+            return False
+        self.watched.add(file_id)
+        self.waiting[file_id] = []
+        return True
+
+    def finished(self):
+        """(unit, file results) for each file completed since the last call."""
+        files = []
+        while True:
+            try:
+                unit, finalized, error = self._finished.get_nowait()
+            except queue.Empty:
+                return files
+            if error is not None:
+                raise error
+            if finalized is not None:
+                files.append((unit, finalized))
+
+    def _scanned(self, file_id, future):
+        with self._lock:
+            for unit, response, error, results in self.waiting.pop(file_id):
+                self._finalize(unit, response, error, results, future.result())
+
+    def _finalize(self, unit, response, error, results, local_dates):
+        try:
+            finalized = self.analysis.task_done(
+                unit, response, error, results, local_dates
+            )
+        except Exception as e:
+            self._finished.put((unit, None, e))
+        else:
+            self._finished.put((unit, finalized, None))
+
+
+def is_failed_result(unit, response):
+    """Whether a unit's response is one of run_prompt's error messages."""
+    if isinstance(response, dict):
+        # A combined extraction that fell back to the four prompts
+        tasks = build_file_tasks(unit.file_id, unit.file_name)
+        return any(
+            is_error_response(response[key], task_name)
+            for key, (_, task_name) in tasks.items()
+            if key in response
         )
-        log_raw_response(logger, f"Client Info for {file_name}", client_info_response)
+    return is_error_response(response, unit.task_name)
 
-        logger.info(f"Completed analysis for {file_name}")
 
-        batch_results.append(
-            (
-                dates_response,
-                requirements_response,
-                folder_structure_response,
-                client_info_response,
+def is_failed_stage_result(name, result):
+    """Whether a tender-level stage result is an error message."""
+    if name == "summary":
+        return result.startswith("Error generating summary") or any(
+            is_error_response(result, task_name)
+            for task_name in ("Tender Summary", "Tender Summary Update")
+        )
+    return is_error_response(result, synthesis_task_name(name[len("synthesize_") :]))
+
+
+class AnalysisCheckpoint:
+    """Saves the progress of an analysis run to a job in the job store.
+
+    Uploaded files, completed (file, task) results and tender-level stage
+    results are saved as they come in. With `resume`, the ones the job
+    already holds are answered from it instead of being run again; error
+    responses are never saved, so resuming retries them. Also serves as the
+    TaskGraph checkpoint of the run's stages.
+
+    Like the response cache, a job store that fails (e.g. "database is
+    locked") is logged and treated as empty, so it never stops the analysis.
+    """
+
+    def __init__(self, store, job_id, resume, logger):
+        self.store = store
+        self.job_id = job_id
+        self.resume = resume
+        self.logger = logger
+        self.saved_tasks = {}
+        if resume:
+            try:
+                self.saved_tasks = store.task_results(job_id)
+            except Exception as e:
+                logger.warning(f"Job store read failed for job {job_id}: {str(e)}")
+        self.restored = 0
+        self.files = set()
+        self._lock = threading.Lock()
+        if resume:
+            logger.info(
+                f"Resuming job {job_id} with {len(self.saved_tasks)} completed tasks"
             )
+
+    def saved_task(self, unit):
+        response = self.saved_tasks.get((unit.file_id, unit.key))
+        if response is not None:
+            with self._lock:
+                self.restored += 1
+        return response
+
+    def task_done(self, unit, response):
+        if (unit.file_id, unit.key) in self.saved_tasks or is_failed_result(
+            unit, response
+        ):
+            return
+        try:
+            self.store.save_task(self.job_id, unit.file_id, unit.key, response)
+        except Exception as e:
+            self.logger.warning(f"Job store save failed for {unit.task_name}: {str(e)}")
+
+    def file_uploaded(self, file_id, file_name):
+        with self._lock:
+            if file_id in self.files:
+                return
+            self.files.add(file_id)
+        try:
+            self.store.add_file(self.job_id, file_id, file_name)
+        except Exception as e:
+            self.logger.warning(f"Job store save failed for {file_name}: {str(e)}")
+
+    def get(self, name, arguments):
+        if not self.resume:
+            return None
+        try:
+            return self.store.stage_result(self.job_id, name, arguments)
+        except Exception as e:
+            self.logger.warning(f"Job store read failed for {name}: {str(e)}")
+            return None
+
+    def put(self, name, arguments, result):
+        if is_failed_stage_result(name, result):
+            return
+        try:
+            self.store.save_stage(self.job_id, name, arguments, result)
+        except Exception as e:
+            self.logger.warning(f"Job store save failed for {name}: {str(e)}")
+
+    def report(self):
+        return f"Job {self.job_id}: {self.restored} tasks restored from checkpoints"
+
+
+class AnalysisGraph:
+    """One analysis run as a TaskGraph of tender-level stages.
+
+    Every per-file task kind ("dates", "requirements", ...) is a stage that
+    finishes with the last task of its kind once all uploads are in, so the
+    summary and the syntheses that only need some kinds start while the other
+    kinds are still running. With `synthesize`, the tender-level syntheses
+    join the graph, built on `previous_results` from earlier runs if given;
+    a summary in those is updated with this run's files instead of replaced.
+    The `loop` of the asyncio engine runs the summary as a coroutine.
+    """
+
+    def __init__(
+        self,
+        executor,
+        uploaded_file_ids,
+        file_id_to_name,
+        logger,
+        simulation_mode,
+        synthesize=False,
+        previous_results=None,
+        loop=None,
+        checkpoint=None,
+    ):
+        self.uploaded_file_ids = uploaded_file_ids
+        self.file_id_to_name = file_id_to_name
+        self.logger = logger
+        self.simulation_mode = simulation_mode
+        self.synthesize = synthesize
+        self.earlier_summary = earlier_summary(previous_results)
+        self.loop = loop
+        self.finalized = {}
+        self.local_dates = {}
+        self.uploads_finished = False
+        self._lock = threading.Lock()
+        self.checkpoint = checkpoint
+        self.graph = TaskGraph(executor, logger, checkpoint)
+        self.graph.add("uploads")
+        for key in ("local_dates", *FILE_TASK_KEYS):
+            self.graph.add(key, after=("uploads",))
+        if synthesize:
+            add_synthesis_stages(
+                self.graph,
+                uploaded_file_ids,
+                file_id_to_name,
+                logger,
+                simulation_mode,
+                previous_results,
+            )
+
+    async def track_uploads(self, units):
+        """Pass `units` through, finishing the "uploads" stage once they run out."""
+        if hasattr(units, "__aiter__"):
+            async for unit in units:
+                self.unit_queued(unit)
+                yield unit
+        else:
+            for unit in units:
+                self.unit_queued(unit)
+                yield unit
+        self.uploads_done()
+
+    def track_uploads_sync(self, units):
+        for unit in units:
+            self.unit_queued(unit)
+            yield unit
+        self.uploads_done()
+
+    def unit_queued(self, unit):
+        # A file's first unit is queued as soon as its upload is done
+        if self.checkpoint is not None:
+            self.checkpoint.file_uploaded(unit.file_id, unit.file_name)
+
+    def uploads_done(self):
+        with self._lock:
+            self.uploads_finished = True
+            self.graph.finish("uploads", list(self.uploaded_file_ids))
+            # Batched summaries also synthesize the dates and requirements
+            after = ("uploads",)
+            if len(self.uploaded_file_ids) > 10:
+                after += ("dates", "requirements")
+            self.graph.add("summary", self.summarize, after)
+            for key in FILE_TASK_KEYS:
+                self._check_stage(key)
+
+    def task_done(self, unit, response, error, results, local_dates):
+        """Finalize one finished unit; return the file's results once all its tasks are in.
+
+        `results` is what collect_task_result returned for the unit.
+        """
+        file_id_to_name = dict(self.file_id_to_name)
+        with self._lock:
+            finalized = self.finalized.setdefault(unit.file_id, {})
+            if unit.key in FILE_TASK_KEYS:
+                if error is not None:
+                    response = f"Error: {error}"
+                self._finalize(unit, unit.key, response, file_id_to_name, local_dates)
+            if results is None:
+                return None
+            for key in FILE_TASK_KEYS:
+                if key not in finalized:
+                    self._finalize(
+                        unit, key, results[key], file_id_to_name, local_dates
+                    )
+        self.logger.info(f"Completed analysis for {unit.file_name}")
+        return tuple(finalized[key] for key in FILE_TASK_KEYS)
+
+    def _finalize(self, unit, key, response, file_id_to_name, local_dates):
+        self.finalized[unit.file_id][key] = finalize_task_result(
+            key, response, unit.file_name, file_id_to_name, local_dates, self.logger
+        )
+        if key == "dates":
+            self.local_dates[unit.file_id] = local_dates or "NO_INFO_FOUND"
+        self._check_stage(key)
+
+    def _check_stage(self, key):
+        """Finish the stage of a task kind once every uploaded file has its result."""
+        if not self.uploads_finished or self.graph.done(key):
+            return
+        if not all(
+            key in self.finalized.get(file_id, {}) for file_id in self.uploaded_file_ids
+        ):
+            return
+        if key == "dates":
+            self.graph.finish(
+                "local_dates",
+                [self.local_dates[file_id] for file_id in self.uploaded_file_ids],
+            )
+        self.graph.finish(
+            key, [self.finalized[file_id][key] for file_id in self.uploaded_file_ids]
+        )
+
+    def summarize(self, _, all_dates=None, all_requirements=None):
+        if self.loop is not None:
+            return asyncio.run_coroutine_threadsafe(
+                self.summarize_async(all_dates, all_requirements), self.loop
+            ).result()
+        try:
+            if all_dates is not None:
+                summary_response = generate_summary_in_batches(
+                    self.uploaded_file_ids,
+                    self.file_id_to_name,
+                    self.logger,
+                    all_dates,
+                    all_requirements,
+                    BATCH_SIZE,
+                    self.simulation_mode,
+                )
+            else:
+                summary_response, _ = run_prompt(
+                    self.uploaded_file_ids,
+                    SUMMARY_PROMPT,
+                    "Tender Summary",
+                    self.logger,
+                    self.simulation_mode,
+                )
+            update_prompt = self.summary_update_prompt(summary_response)
+            if update_prompt is not None:
+                summary_response, _ = run_prompt(
+                    [],
+                    update_prompt,
+                    "Tender Summary Update",
+                    self.logger,
+                    self.simulation_mode,
+                )
+            elif self.earlier_summary and summary_response.strip() == "NO_INFO_FOUND":
+                summary_response = self.earlier_summary
+        except Exception as e:
+            summary_response = f"Error generating summary: {str(e)}"
+            log_error(self.logger, summary_response)
+        return replace_citations(summary_response, self.file_id_to_name)
+
+    async def summarize_async(self, all_dates, all_requirements):
+        try:
+            if all_dates is not None:
+                summary_response = await generate_summary_in_batches_async(
+                    self.uploaded_file_ids,
+                    self.file_id_to_name,
+                    self.logger,
+                    all_dates,
+                    all_requirements,
+                    BATCH_SIZE,
+                    self.simulation_mode,
+                )
+            else:
+                summary_response, _ = await run_prompt_async(
+                    self.uploaded_file_ids,
+                    SUMMARY_PROMPT,
+                    "Tender Summary",
+                    self.logger,
+                    self.simulation_mode,
+                )
+            update_prompt = self.summary_update_prompt(summary_response)
+            if update_prompt is not None:
+                summary_response, _ = await run_prompt_async(
+                    [],
+                    update_prompt,
+                    "Tender Summary Update",
+                    self.logger,
+                    self.simulation_mode,
+                )
+            elif self.earlier_summary and summary_response.strip() == "NO_INFO_FOUND":
+                summary_response = self.earlier_summary
+        except Exception as e:
+            summary_response = f"Error generating summary: {str(e)}"
+            log_error(self.logger, summary_response)
+        return replace_citations(summary_response, self.file_id_to_name)
+
+    def summary_update_prompt(self, summary_response):
+        """The prompt merging this run's summary into the earlier runs' one.
+
+        None when there is no earlier summary, or nothing usable to add to it.
+        """
+        if self.earlier_summary is None or (
+            summary_response.strip() == "NO_INFO_FOUND"
+            or is_error_response(summary_response, "Tender Summary")
+        ):
+            return None
+        return format_prompt(
+            MERGE_SUMMARIES_PROMPT,
+            partial_summaries=f"{self.earlier_summary}\n\n{summary_response}",
+        )
+
+    def results(self):
+        """(summary, synthesized results or None), waiting for both."""
+        synthesized = synthesis_results(self.graph) if self.synthesize else None
+        return self.graph.result("summary"), synthesized
+
+    async def results_async(self):
+        names = ["summary"]
+        if self.synthesize:
+            names += [f"synthesize_{key}" for key in FILE_TASK_KEYS]
+        await asyncio.gather(
+            *(asyncio.wrap_future(self.graph.future(name)) for name in names),
+            return_exceptions=True,
         )
+        return self.results()
 
-    return batch_results
+    def log_report(self):
+        self.logger.info(self.graph.describe())
+        self.logger.info(self.graph.report())
+        if self.checkpoint is not None:
+            self.logger.info(self.checkpoint.report())
 
 
 def analyze_tender(
@@ -601,24 +1686,177 @@ def analyze_tender(
     progress_bar,
     status_text,
     files_text,
-    uploaded_files,
+    documents,
+    total_files,
+    simulation_mode,
+    concurrency=MAX_CONCURRENT_REQUESTS,
+    extraction_mode=EXTRACTION_MODE,
+    synthesize=False,
+    previous_results=None,
+    job_id=None,
+    resume=False,
+):
+    logger = init_logger()
+    file_names = [file_id_to_name[file_id] for file_id in uploaded_file_ids]
+    logger.info(f"Starting analysis for {total_files} files: {', '.join(file_names)}")
+
+    units = build_work_units(uploaded_file_ids, file_id_to_name, extraction_mode)
+    return run_analysis(
+        units,
+        len(units),
+        uploaded_file_ids,
+        file_id_to_name,
+        progress_bar,
+        status_text,
+        files_text,
+        documents,
+        total_files,
+        simulation_mode,
+        logger,
+        concurrency,
+        extraction_mode,
+        synthesize,
+        previous_results,
+        job_id,
+        resume,
+    )
+
+
+def analyze_uploads(
+    upload_results,
+    progress_bar,
+    status_text,
+    files_text,
+    documents,
     total_files,
     simulation_mode,
+    concurrency=MAX_CONCURRENT_REQUESTS,
+    extraction_mode=EXTRACTION_MODE,
+    synthesize=False,
+    previous_results=None,
+    job_id=None,
+    resume=False,
 ):
+    """Analyze each file as soon as its upload finishes.
+
+    `upload_results` yields file_handler.UploadResult items in completion order;
+    a file's work units enter the scheduler queue while the other uploads are
+    still running. Returns (uploaded_file_ids, file_id_to_name, failed_uploads,
+    analysis results as returned by analyze_tender).
+    """
     logger = init_logger()
-    batch_size = BATCH_SIZE
-    total_batches = (len(uploaded_file_ids) + batch_size - 1) // batch_size
-    total_tasks = len(uploaded_file_ids) * 4 + 1  # 4 tasks per file + summary
+    logger.info(f"Starting pipelined upload and analysis for {total_files} files")
+
+    uploaded_file_ids = []
+    file_id_to_name = {}
+    failed_uploads = []
+    units = upload_work_units(
+        upload_results,
+        uploaded_file_ids,
+        file_id_to_name,
+        failed_uploads,
+        extraction_mode,
+        logger,
+    )
+    results = run_analysis(
+        units,
+        total_files * len(file_task_keys(extraction_mode)),
+        uploaded_file_ids,
+        file_id_to_name,
+        progress_bar,
+        status_text,
+        files_text,
+        documents,
+        total_files,
+        simulation_mode,
+        logger,
+        concurrency,
+        extraction_mode,
+        synthesize,
+        previous_results,
+        job_id,
+        resume,
+    )
+    return uploaded_file_ids, file_id_to_name, failed_uploads, results
+
+
+def upload_work_units(
+    upload_results,
+    uploaded_file_ids,
+    file_id_to_name,
+    failed_uploads,
+    extraction_mode,
+    logger,
+):
+    """Yield each file's work units as its upload finishes.
+
+    Fills in uploaded_file_ids, file_id_to_name and failed_uploads along the
+    way; once the uploads are exhausted uploaded_file_ids is put back in the
+    order the files were given.
+    """
+    file_ids_by_index = {}
+    for result in upload_results:
+        file_name = result.file.name
+        if result.duplicate_of:
+            logger.warning(
+                f"{file_name} has the same content as {result.duplicate_of} and was skipped"
+            )
+            continue
+        if result.error:
+            log_error(logger, f"Failed to upload file {file_name}: {result.error}")
+            failed_uploads.append(file_name)
+            continue
+        logger.info(
+            f"Uploaded {file_name}{' (reused)' if result.reused else ''}, queueing its tasks"
+        )
+        file_ids_by_index[result.index] = result.file_id
+        uploaded_file_ids.append(result.file_id)
+        file_id_to_name[result.file_id] = file_name
+        yield from build_work_units([result.file_id], file_id_to_name, extraction_mode)
+    uploaded_file_ids[:] = [file_ids_by_index[i] for i in sorted(file_ids_by_index)]
+
+
+def run_analysis(
+    units,
+    total_units,
+    uploaded_file_ids,
+    file_id_to_name,
+    progress_bar,
+    status_text,
+    files_text,
+    documents,
+    total_files,
+    simulation_mode,
+    logger,
+    concurrency=MAX_CONCURRENT_REQUESTS,
+    extraction_mode=EXTRACTION_MODE,
+    synthesize=False,
+    previous_results=None,
+    job_id=None,
+    resume=False,
+):
+    """Run the work units through the scheduler, with the summary and, if
+    `synthesize`, the syntheses as AnalysisGraph stages alongside them.
+
+    `units` may be lazy and still filling uploaded_file_ids and file_id_to_name
+    while the first results come in; both are complete once it is exhausted.
+    Returns the per-file result lists, the summary, the progress log messages
+    and the synthesize_results dict (None without `synthesize`).
+
+    With a `job_id`, every completed unit and stage result is saved to the job
+    store as it comes in; with `resume` as well, the ones the job already
+    holds are taken from it, so only the unfinished work runs again.
+    """
     current_task = 0
     progress_log_messages = []
-    all_dates = []
-    all_requirements = []
-    all_folder_structures = []
-    all_client_infos = []
     lock = threading.Lock()
-
-    file_names = [file_id_to_name[file_id] for file_id in uploaded_file_ids]
-    logger.info(f"Starting analysis for {total_files} files: {', '.join(file_names)}")
+    run_stats_start = completion_stats.snapshot()
+    cache_stats_start = response_cache.snapshot() if response_cache else (0, 0)
+    admission_stats_start = admission.snapshot()
+    document_stats_start = documents.snapshot()
+    simulation_stats_start = (
+        simulation_profile.snapshot() if simulation_profile else (0, 0, 0, 0.0)
+    )
 
     def update_progress(message, increment=True):
         nonlocal current_task
@@ -631,78 +1869,438 @@ def analyze_tender(
             msg = f"[{time.strftime('%H:%M:%S')}] {message}"
             progress_log_messages.append(msg)
 
-    for i in range(0, len(uploaded_file_ids), batch_size):
-        batch_number = i // batch_size + 1
-        batch_file_ids = uploaded_file_ids[i : i + batch_size]
-        batch_start = i + 1
-        batch_end = min(i + batch_size, total_files)
-        update_progress(
-            f"Starting analysis for files {batch_start}-{batch_end} of {total_files} (Batch {batch_number}/{total_batches})",
-            increment=False,
+    checkpoint = (
+        AnalysisCheckpoint(job_store, job_id, resume, logger)
+        if job_id is not None and job_store is not None
+        else None
+    )
+    local_dates = {}
+    local_dates_executor = ThreadPoolExecutor(
+        max_workers=LOCAL_DATES_WORKERS, thread_name_prefix="tender-local-dates"
+    )
+
+    def start_local_dates(unit):
+        # Runs alongside the file's AI tasks, so the date fallback never waits on a parse
+        with lock:
+            if unit.file_id in local_dates:
+                return
+            future = local_dates_executor.submit(
+                extract_local_dates, documents, unit.file_name, logger
+            )
+            # Registered before other units of the file can see the future
+            local_dates_wait.scan_started(unit.file_id, future)
+            local_dates[unit.file_id] = future
+
+    def analyze_task(unit):
+        start_local_dates(unit)
+        saved = checkpoint.saved_task(unit) if checkpoint is not None else None
+        if saved is not None:
+            return saved
+        response, rate_limit_headers = run_prompt(
+            [unit.file_id], unit.prompt, unit.task_name, logger, simulation_mode
         )
+        # Log rate limit headers for monitoring
+        check_rate_limits(
+            rate_limit_headers, unit.task_name, logger, progress_log_messages, lock
+        )
+        if unit.key != COMBINED_TASK_KEY:
+            return response
+        try:
+            return split_combined_response(response)
+        except ValueError as e:
+            if extraction_mode != "combined":
+                raise
+            logger.warning(
+                f"Could not parse combined extraction for {unit.file_name} ({e}), running the four prompts instead"
+            )
+            return {
+                key: analyze_task(
+                    WorkUnit(unit.file_id, unit.file_name, key, prompt, task_name)
+                )
+                for key, (prompt, task_name) in build_file_tasks(
+                    unit.file_id, unit.file_name
+                ).items()
+            }
+
+    def show_finished_files():
+        for unit, finalized in local_dates_wait.finished():
+            file_results[unit.file_id] = finalized
+            files_text.markdown(
+                f"**Files analyzed:** {len(file_results)} of {total_files} (last: {unit.file_name})"
+            )
+
+    expected_keys = file_task_keys(extraction_mode)
+    total_tasks = total_units + 1  # per-file tasks + summary
+    update_progress(
+        f"Starting analysis for {total_files} files ({total_units} tasks, {concurrency} at a time)",
+        increment=False,
+    )
 
-        batch_results = analyze_file_batch(
-            batch_file_ids,
+    # All (file x task) units share one queue; results stream back as they finish.
+    # The summary and syntheses start on the stage executor once their inputs are in
+    pending_results = {}
+    file_results = {}
+    scheduler = TaskScheduler(concurrency)
+    with local_dates_executor, ThreadPoolExecutor(
+        max_workers=STAGE_WORKERS, thread_name_prefix="tender-stage"
+    ) as stage_executor:
+        analysis = AnalysisGraph(
+            stage_executor,
+            uploaded_file_ids,
             file_id_to_name,
-            progress_log_messages,
-            lock,
-            uploaded_files,
-            batch_number,
-            total_batches,
-            total_files,
-            files_text,
             logger,
-            update_progress,
             simulation_mode,
+            synthesize,
+            previous_results,
+            checkpoint=checkpoint,
         )
-        for dates, requirements, folder_structure, client_info in batch_results:
-            all_dates.append(dates)
-            all_requirements.append(requirements)
-            all_folder_structures.append(folder_structure)
-            all_client_infos.append(client_info)
-
-    update_progress("Generating tender summary...", increment=True)
-    try:
-        if len(uploaded_file_ids) > 10:
-            summary_response = generate_summary_in_batches(
-                uploaded_file_ids,
-                file_id_to_name,
-                logger,
-                all_dates,
-                all_requirements,
-                BATCH_SIZE,
-                simulation_mode,
+        local_dates_wait = LocalDatesWait(analysis)
+        for unit, response, error in scheduler.stream(
+            analysis.track_uploads_sync(units), analyze_task
+        ):
+            if error is None:
+                if checkpoint is not None:
+                    checkpoint.task_done(unit, response)
+                update_progress(
+                    f"Completed {unit.key.capitalize()} for {unit.file_name}",
+                    increment=True,
+                )
+            results = collect_task_result(
+                unit, response, error, pending_results, expected_keys, logger
             )
-        else:
-            summary_response, _ = run_prompt(
-                uploaded_file_ids,
-                SUMMARY_PROMPT,
-                "Tender Summary",
-                logger,
-                simulation_mode,
+            local_dates_wait.add(
+                unit, response, error, results, local_dates[unit.file_id]
             )
-    except Exception as e:
-        error_msg = f"Error generating summary: {str(e)}"
-        log_error(logger, error_msg)
-        summary_response = error_msg
-    summary_response = replace_citations(summary_response, file_id_to_name)
+            show_finished_files()
+
+        update_progress("Generating tender summary...", increment=True)
+        summary_response, synthesized_results = analysis.results()
+    # The scans are all in once their executor has shut down
+    show_finished_files()
+
+    all_local_dates = [
+        local_dates[file_id].result() or "NO_INFO_FOUND"
+        for file_id in uploaded_file_ids
+    ]
+
+    all_dates = [file_results[file_id][0] for file_id in uploaded_file_ids]
+    all_requirements = [file_results[file_id][1] for file_id in uploaded_file_ids]
+    all_folder_structures = [file_results[file_id][2] for file_id in uploaded_file_ids]
+    all_client_infos = [file_results[file_id][3] for file_id in uploaded_file_ids]
+
+    analysis.log_report()
     update_progress("Analysis complete", increment=True)
+    logger.info(completion_stats.report(since=run_stats_start))
+    if response_cache is not None:
+        logger.info(response_cache.report(since=cache_stats_start))
+    logger.info(admission.report(since=admission_stats_start))
+    logger.info(documents.report(since=document_stats_start))
+    if simulation_mode and simulation_profile is not None:
+        logger.info(simulation_profile.report(since=simulation_stats_start))
 
-    if "Error" not in summary_response:
-        for file_id in uploaded_file_ids:
-            try:
-                openai.files.delete(file_id)
-            except Exception as e:
-                st.warning(f"Failed to delete file {file_id}: {str(e)}")
-                log_error(logger, f"Failed to delete file {file_id}: {str(e)}")
+    return (
+        all_dates,
+        all_requirements,
+        all_folder_structures,
+        all_client_infos,
+        all_local_dates,
+        summary_response,
+        progress_log_messages,
+        synthesized_results,
+    )
+
+
+async def analyze_tender_async(
+    uploaded_file_ids,
+    file_id_to_name,
+    progress_bar,
+    status_text,
+    files_text,
+    documents,
+    total_files,
+    simulation_mode,
+    concurrency=MAX_CONCURRENT_ASYNC_REQUESTS,
+    extraction_mode=EXTRACTION_MODE,
+    synthesize=False,
+    previous_results=None,
+    job_id=None,
+    resume=False,
+):
+    """Asyncio engine for analyze_tender.
+
+    Every (file, task) unit runs as a coroutine on one event loop instead of a
+    thread each, pulled from the scheduler queue by `concurrency` consumers.
+    Returns the same tuple as analyze_tender.
+    """
+    logger = init_logger()
+    file_names = [file_id_to_name[file_id] for file_id in uploaded_file_ids]
+    logger.info(
+        f"Starting async analysis for {total_files} files: {', '.join(file_names)}"
+    )
+
+    units = build_work_units(uploaded_file_ids, file_id_to_name, extraction_mode)
+    return await run_analysis_async(
+        units,
+        len(units),
+        uploaded_file_ids,
+        file_id_to_name,
+        progress_bar,
+        status_text,
+        files_text,
+        documents,
+        total_files,
+        simulation_mode,
+        logger,
+        concurrency,
+        extraction_mode,
+        synthesize,
+        previous_results,
+        job_id,
+        resume,
+    )
+
+
+async def analyze_uploads_async(
+    upload_results,
+    progress_bar,
+    status_text,
+    files_text,
+    documents,
+    total_files,
+    simulation_mode,
+    concurrency=MAX_CONCURRENT_ASYNC_REQUESTS,
+    extraction_mode=EXTRACTION_MODE,
+    synthesize=False,
+    previous_results=None,
+    job_id=None,
+    resume=False,
+):
+    """Asyncio engine for analyze_uploads; returns the same tuple.
+
+    The uploads keep running on their own threads and are handed to the
+    event loop as they finish.
+    """
+    logger = init_logger()
+    logger.info(f"Starting pipelined async upload and analysis for {total_files} files")
+
+    uploaded_file_ids = []
+    file_id_to_name = {}
+    failed_uploads = []
+    units = upload_work_units(
+        upload_results,
+        uploaded_file_ids,
+        file_id_to_name,
+        failed_uploads,
+        extraction_mode,
+        logger,
+    )
+    results = await run_analysis_async(
+        iterate_in_thread(units),
+        total_files * len(file_task_keys(extraction_mode)),
+        uploaded_file_ids,
+        file_id_to_name,
+        progress_bar,
+        status_text,
+        files_text,
+        documents,
+        total_files,
+        simulation_mode,
+        logger,
+        concurrency,
+        extraction_mode,
+        synthesize,
+        previous_results,
+        job_id,
+        resume,
+    )
+    return uploaded_file_ids, file_id_to_name, failed_uploads, results
+
+
+async def run_analysis_async(
+    units,
+    total_units,
+    uploaded_file_ids,
+    file_id_to_name,
+    progress_bar,
+    status_text,
+    files_text,
+    documents,
+    total_files,
+    simulation_mode,
+    logger,
+    concurrency=MAX_CONCURRENT_ASYNC_REQUESTS,
+    extraction_mode=EXTRACTION_MODE,
+    synthesize=False,
+    previous_results=None,
+    job_id=None,
+    resume=False,
+):
+    """Async version of run_analysis; `units` may be an async iterable."""
+    current_task = 0
+    progress_log_messages = []
+    # Everything below runs on the loop thread; the lock only satisfies check_rate_limits
+    lock = threading.Lock()
+
+    run_stats_start = completion_stats.snapshot()
+    cache_stats_start = response_cache.snapshot() if response_cache else (0, 0)
+    admission_stats_start = admission.snapshot()
+    document_stats_start = documents.snapshot()
+    simulation_stats_start = (
+        simulation_profile.snapshot() if simulation_profile else (0, 0, 0, 0.0)
+    )
+
+    def update_progress(message, increment=True):
+        nonlocal current_task
+        if increment:
+            current_task += 1
+        progress = min(current_task / total_tasks, 1.0)
+        progress_bar.progress(progress)
+        status_text.text(message)
+        msg = f"[{time.strftime('%H:%M:%S')}] {message}"
+        progress_log_messages.append(msg)
+
+    checkpoint = (
+        AnalysisCheckpoint(job_store, job_id, resume, logger)
+        if job_id is not None and job_store is not None
+        else None
+    )
+    local_dates = {}
+    local_dates_executor = ThreadPoolExecutor(
+        max_workers=LOCAL_DATES_WORKERS, thread_name_prefix="tender-local-dates"
+    )
+
+    def start_local_dates(unit):
+        # Runs alongside the file's AI tasks, so the date fallback never waits on a parse
+        if unit.file_id not in local_dates:
+            local_dates[unit.file_id] = asyncio.wrap_future(
+                local_dates_executor.submit(
+                    extract_local_dates, documents, unit.file_name, logger
+                )
+            )
+            local_dates_wait.scan_started(unit.file_id, local_dates[unit.file_id])
+
+    async def analyze_task(unit):
+        start_local_dates(unit)
+        saved = checkpoint.saved_task(unit) if checkpoint is not None else None
+        if saved is not None:
+            return saved
+        response, rate_limit_headers = await run_prompt_async(
+            [unit.file_id], unit.prompt, unit.task_name, logger, simulation_mode
+        )
+        check_rate_limits(
+            rate_limit_headers, unit.task_name, logger, progress_log_messages, lock
+        )
+        if unit.key != COMBINED_TASK_KEY:
+            return response
+        try:
+            return split_combined_response(response)
+        except ValueError as e:
+            if extraction_mode != "combined":
+                raise
+            logger.warning(
+                f"Could not parse combined extraction for {unit.file_name} ({e}), running the four prompts instead"
+            )
+            tasks = build_file_tasks(unit.file_id, unit.file_name)
+            responses = await asyncio.gather(
+                *(
+                    analyze_task(
+                        WorkUnit(unit.file_id, unit.file_name, key, prompt, task_name)
+                    )
+                    for key, (prompt, task_name) in tasks.items()
+                )
+            )
+            return dict(zip(tasks, responses))
+
+    def show_finished_files():
+        for unit, finalized in local_dates_wait.finished():
+            file_results[unit.file_id] = finalized
+            files_text.markdown(
+                f"**Files analyzed:** {len(file_results)} of {total_files} (last: {unit.file_name})"
+            )
+
+    expected_keys = file_task_keys(extraction_mode)
+    total_tasks = total_units + 1  # per-file tasks + summary
+    update_progress(
+        f"Starting analysis for {total_files} files ({total_units} tasks, {concurrency} at a time)",
+        increment=False,
+    )
+
+    pending_results = {}
+    file_results = {}
+    scheduler = TaskScheduler(concurrency)
+    stage_executor = ThreadPoolExecutor(
+        max_workers=STAGE_WORKERS, thread_name_prefix="tender-stage"
+    )
+    analysis = AnalysisGraph(
+        stage_executor,
+        uploaded_file_ids,
+        file_id_to_name,
+        logger,
+        simulation_mode,
+        synthesize,
+        previous_results,
+        loop=asyncio.get_running_loop(),
+        checkpoint=checkpoint,
+    )
+    local_dates_wait = LocalDatesWait(analysis)
+    try:
+        with local_dates_executor:
+            async for unit, response, error in scheduler.stream_async(
+                analysis.track_uploads(units), analyze_task
+            ):
+                if error is None:
+                    if checkpoint is not None:
+                        checkpoint.task_done(unit, response)
+                    update_progress(
+                        f"Completed {unit.key.capitalize()} for {unit.file_name}",
+                        increment=True,
+                    )
+                results = collect_task_result(
+                    unit, response, error, pending_results, expected_keys, logger
+                )
+                local_dates_wait.add(
+                    unit, response, error, results, local_dates[unit.file_id]
+                )
+                show_finished_files()
+            # The wait's done callbacks run before anything awaiting the scans
+            await asyncio.gather(*local_dates.values())
+            show_finished_files()
+
+        update_progress("Generating tender summary...", increment=True)
+        summary_response, synthesized_results = await analysis.results_async()
+    finally:
+        # The summary stage may be waiting on this loop, so never block it here
+        stage_executor.shutdown(wait=False)
+
+    all_local_dates = [
+        local_dates[file_id].result() or "NO_INFO_FOUND"
+        for file_id in uploaded_file_ids
+    ]
+
+    all_dates = [file_results[file_id][0] for file_id in uploaded_file_ids]
+    all_requirements = [file_results[file_id][1] for file_id in uploaded_file_ids]
+    all_folder_structures = [file_results[file_id][2] for file_id in uploaded_file_ids]
+    all_client_infos = [file_results[file_id][3] for file_id in uploaded_file_ids]
+
+    analysis.log_report()
+    update_progress("Analysis complete", increment=True)
+    logger.info(completion_stats.report(since=run_stats_start))
+    if response_cache is not None:
+        logger.info(response_cache.report(since=cache_stats_start))
+    logger.info(admission.report(since=admission_stats_start))
+    logger.info(documents.report(since=document_stats_start))
+    if simulation_mode and simulation_profile is not None:
+        logger.info(simulation_profile.report(since=simulation_stats_start))
 
     return (
         all_dates,
         all_requirements,
         all_folder_structures,
         all_client_infos,
+        all_local_dates,
         summary_response,
         progress_log_messages,
+        synthesized_results,
     )
 
 
@@ -715,94 +2313,195 @@ def synthesize_results(
     file_id_to_name,
     logger,
     simulation_mode,
+    all_local_dates=None,
+    previous_results=None,
 ):
-    # Synthesize dates
-    dates_data = "\n\n".join(
-        [
-            f"File: {file_id_to_name[file_id]}\n{dates}"
-            for file_id, dates in zip(uploaded_file_ids, all_dates)
-            if dates.strip() and dates.strip() != "NO_INFO_FOUND"
-        ]
-    )
-    if dates_data:
-        synthesized_dates, _ = run_prompt(
-            [],
-            format_prompt(SYNTHESIZE_DATES_PROMPT, dates_data=dates_data),
-            "Synthesize Dates",
+    """Combine the per-file results into the tender-level sections.
+
+    The syntheses run as the same small dependency graph the analysis uses:
+    dates, requirements and client info start together, and the folder
+    structure, which builds on the synthesized requirements, starts as soon
+    as those are done.
+    """
+    with ThreadPoolExecutor(
+        max_workers=4, thread_name_prefix="tender-synthesis"
+    ) as executor:
+        graph = TaskGraph(executor)
+        for key, entries in (
+            ("dates", all_dates),
+            ("local_dates", all_local_dates),
+            ("requirements", all_requirements),
+            ("folder_structure", all_folder_structures),
+            ("client_info", all_client_infos),
+        ):
+            graph.add(key)
+            graph.finish(key, entries)
+        add_synthesis_stages(
+            graph,
+            uploaded_file_ids,
+            file_id_to_name,
             logger,
             simulation_mode,
+            previous_results,
         )
-    else:
-        synthesized_dates = "NO_INFO_FOUND"
+        return synthesis_results(graph)
 
-    # Synthesize requirements
-    requirements_data = "\n\n".join(
-        [
-            f"File: {file_id_to_name[file_id]}\n{reqs}"
-            for file_id, reqs in zip(uploaded_file_ids, all_requirements)
-            if reqs.strip() and reqs.strip() != "NO_INFO_FOUND"
-        ]
+
+def earlier_summary(previous_results):
+    """The earlier runs' tender summary to update, or None if there is none or it failed."""
+    summary = (previous_results or {}).get("summary_response", "")
+    if (
+        summary.strip() in ("", "NO_INFO_FOUND")
+        or summary.startswith("Error generating summary")
+        or is_error_response(summary, "Tender Summary")
+    ):
+        return None
+    return summary
+
+
+# Per-file result lists of a section, as kept in the app's analysis results
+SECTION_RESULT_KEYS = {
+    "dates": "all_dates",
+    "requirements": "all_requirements",
+    "folder_structure": "all_folder_structures",
+    "client_info": "all_client_infos",
+}
+
+
+def synthesis_task_name(key):
+    return f"Synthesize {key.replace('_', ' ').title()}"
+
+
+def is_error_response(response, task_name):
+    """Whether `response` is one of run_prompt's error messages for task_name."""
+    first_line = response.split("\n", 1)[0]
+    return (
+        first_line.startswith(f"{task_name} failed with status:")
+        or f" in {task_name}: " in first_line
     )
-    if requirements_data:
-        synthesized_requirements, _ = run_prompt(
-            [],
-            format_prompt(
-                SYNTHESIZE_REQUIREMENTS_PROMPT, requirements_data=requirements_data
-            ),
-            "Synthesize Requirements",
-            logger,
-            simulation_mode,
+
+
+def earlier_synthesis(previous_results, key):
+    """The earlier runs' synthesis of a section to build on, or None.
+
+    None when there is none or it failed, in which case the section is
+    synthesized again from all files.
+    """
+    synthesized = (previous_results or {}).get(f"synthesized_{key}", "")
+    if not synthesized.strip() or is_error_response(
+        synthesized, synthesis_task_name(key)
+    ):
+        return None
+    return synthesized
+
+
+def add_synthesis_stages(
+    graph,
+    uploaded_file_ids,
+    file_id_to_name,
+    logger,
+    simulation_mode,
+    previous_results=None,
+):
+    """Add the tender-level syntheses to a graph.
+
+    They build on the stages "dates", "local_dates" (None to skip the merge),
+    "requirements", "folder_structure" and "client_info", whose results are
+    per-file lists in the order of uploaded_file_ids.
+
+    `previous_results` holds the "file_ids", "file_id_to_name", per-file lists
+    ("all_dates", ...) and syntheses ("synthesized_dates", ...) of earlier runs
+    on the same tender. A section with an earlier synthesis is updated with
+    only this run's files, so adding a file costs one file's worth of input;
+    one without is synthesized from the earlier and new files together.
+    """
+    previous = previous_results or {}
+    earlier = {key: earlier_synthesis(previous, key) for key in FILE_TASK_KEYS}
+
+    def section_data(key, entries, all_local_dates=None):
+        file_ids = list(uploaded_file_ids)
+        names = dict(file_id_to_name)
+        if earlier[key] is None:
+            # Earlier runs' files come first, like in the app's accumulated results
+            file_ids = previous.get("file_ids", []) + file_ids
+            names = {**previous.get("file_id_to_name", {}), **names}
+            entries = previous.get(SECTION_RESULT_KEYS[key], []) + entries
+            if all_local_dates is not None:
+                all_local_dates = previous.get("all_local_dates", []) + all_local_dates
+        if all_local_dates is not None:
+            # The locally pattern-matched dates go alongside the AI ones
+            entries = merge_local_dates(entries, all_local_dates)
+        return build_section_data(file_ids, names, entries)
+
+    def synthesize(key, template, **fields):
+        prompt = format_prompt(template, **fields)
+        if earlier[key] not in (None, "NO_INFO_FOUND"):
+            prompt += format_prompt(
+                SYNTHESIS_UPDATE_PROMPT, earlier_synthesis=earlier[key]
+            )
+        response, _ = run_prompt(
+            [], prompt, synthesis_task_name(key), logger, simulation_mode
+        )
+        return response
+
+    def synthesize_dates(all_dates, all_local_dates):
+        dates_data = section_data("dates", all_dates, all_local_dates)
+        if not dates_data:
+            return earlier["dates"] or "NO_INFO_FOUND"
+        return synthesize("dates", SYNTHESIZE_DATES_PROMPT, dates_data=dates_data)
+
+    def synthesize_requirements(all_requirements):
+        requirements_data = section_data("requirements", all_requirements)
+        if not requirements_data:
+            return earlier["requirements"] or "NO_INFO_FOUND"
+        return synthesize(
+            "requirements",
+            SYNTHESIZE_REQUIREMENTS_PROMPT,
+            requirements_data=requirements_data,
         )
-    else:
-        synthesized_requirements = "NO_INFO_FOUND"
 
-    # Synthesize folder structures
-    folder_structure_data = "\n\n".join(
-        [
-            f"File: {file_id_to_name[file_id]}\n{struct}"
-            for file_id, struct in zip(uploaded_file_ids, all_folder_structures)
-            if struct.strip() and struct.strip() != "NO_INFO_FOUND"
-        ]
-    )
-    if folder_structure_data or synthesized_requirements != "NO_INFO_FOUND":
-        synthesized_folder_structure, _ = run_prompt(
-            [],
-            format_prompt(
-                SYNTHESIZE_FOLDER_STRUCTURE_PROMPT,
-                folder_structure_data=folder_structure_data,
-                requirements_data=synthesized_requirements,
-            ),
-            "Synthesize Folder Structure",
-            logger,
-            simulation_mode,
+    def synthesize_client_info(all_client_infos):
+        client_info_data = section_data("client_info", all_client_infos)
+        if not client_info_data:
+            return earlier["client_info"] or "NO_INFO_FOUND"
+        return synthesize(
+            "client_info",
+            SYNTHESIZE_CLIENT_INFO_PROMPT,
+            client_info_data=client_info_data,
         )
-    else:
-        synthesized_folder_structure = "NO_INFO_FOUND"
 
-    # Synthesize client information
-    client_info_data = "\n\n".join(
-        [
-            f"File: {file_id_to_name[file_id]}\n{client_info}"
-            for file_id, client_info in zip(uploaded_file_ids, all_client_infos)
-            if client_info.strip() and client_info.strip() != "NO_INFO_FOUND"
-        ]
-    )
-    if client_info_data:
-        synthesized_client_info, _ = run_prompt(
-            [],
-            format_prompt(
-                SYNTHESIZE_CLIENT_INFO_PROMPT, client_info_data=client_info_data
-            ),
-            "Synthesize Client Info",
-            logger,
-            simulation_mode,
+    def synthesize_folder_structure(all_folder_structures, synthesized_requirements):
+        folder_structure_data = section_data("folder_structure", all_folder_structures)
+        if not folder_structure_data:
+            # Nothing new to merge when the requirements it builds on did not change either
+            if earlier["folder_structure"] is not None and (
+                synthesized_requirements == previous.get("synthesized_requirements")
+            ):
+                return earlier["folder_structure"]
+            if synthesized_requirements == "NO_INFO_FOUND" and earlier[
+                "folder_structure"
+            ] in (None, "NO_INFO_FOUND"):
+                return "NO_INFO_FOUND"
+        return synthesize(
+            "folder_structure",
+            SYNTHESIZE_FOLDER_STRUCTURE_PROMPT,
+            folder_structure_data=folder_structure_data,
+            requirements_data=synthesized_requirements,
         )
-    else:
-        synthesized_client_info = "NO_INFO_FOUND"
 
+    graph.add("synthesize_dates", synthesize_dates, ("dates", "local_dates"))
+    graph.add("synthesize_requirements", synthesize_requirements, ("requirements",))
+    graph.add("synthesize_client_info", synthesize_client_info, ("client_info",))
+    graph.add(
+        "synthesize_folder_structure",
+        synthesize_folder_structure,
+        ("folder_structure", "synthesize_requirements"),
+    )
+
+
+def synthesis_results(graph):
+    """The synthesize_results dict, waiting for each synthesis stage."""
     return {
-        "synthesized_dates": synthesized_dates,
-        "synthesized_requirements": synthesized_requirements,
-        "synthesized_folder_structure": synthesized_folder_structure,
-        "synthesized_client_info": synthesized_client_info,
+        f"synthesized_{key}": graph.result(f"synthesize_{key}")
+        for key in FILE_TASK_KEYS
     }
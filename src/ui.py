@@ -17,6 +17,7 @@ def render_per_file_section(data_list, file_ids, file_id_to_name, section_title)
         file_name = file_id_to_name[file_id]
         content = data_list[i] if i < len(data_list) else ""
         if content.strip() and content.strip() != "NO_INFO_FOUND":
+            # A file's section only names that file
             content = replace_citations(
                 content, file_id_to_name, intended_file_name=file_name
             )
@@ -60,7 +61,6 @@ def render_main_content(
     st.subheader("📝 Tender Summary")
     with st.expander("View Tender Summary", expanded=True):
         if summary_response.strip() and summary_response.strip() != "NO_INFO_FOUND":
-            summary_response = replace_citations(summary_response, file_id_to_name)
             st.markdown(summary_response, unsafe_allow_html=False)
         else:
             st.markdown("No summary generated from the provided files.")
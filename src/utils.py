@@ -1,6 +1,10 @@
 # utils.py
 import base64
+import functools
+import json
+import os
 import re
+import threading
 import streamlit as st
 
 
@@ -16,128 +20,260 @@ def load_image_as_base64(image_path):
         return None
 
 
-def load_mock_response(prompt_type):
-    try:
-        with open("resources/mock_response.md", "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # Step 1: Split into top-level sections based on # headings
-        top_level_sections = {}
-        current_top_section = None
-        current_top_content = []
-        for line in content.splitlines():
-            if line.startswith("# "):
-                if current_top_section:
-                    top_level_sections[current_top_section] = "\n".join(
-                        current_top_content
-                    ).strip()
-                current_top_section = line[2:].strip()
-                current_top_content = []
-            else:
-                current_top_content.append(line)
-        if current_top_section:
-            top_level_sections[current_top_section] = "\n".join(
-                current_top_content
-            ).strip()
-
-        # Step 2: Split top-level sections into subsections based on ## headings
-        sections = {}
-        for top_section, top_content in top_level_sections.items():
-            current_subsection = top_section  # Default to top-level section title
-            current_subcontent = []
-            for line in top_content.splitlines():
-                if line.startswith("## "):
-                    if current_subsection and current_subcontent:
-                        sections[current_subsection] = "\n".join(
-                            current_subcontent
-                        ).strip()
-                    current_subsection = line[
-                        2:
-                    ].strip()  # Changed from line[3:] to line[2:] to include the full heading text
-                    current_subcontent = []
-                else:
-                    current_subcontent.append(line)
-            if current_subsection and current_subcontent:
-                sections[current_subsection] = "\n".join(current_subcontent).strip()
-
-        # Step 3: Map prompt_type to the appropriate section
-        prompt_type_lower = prompt_type.lower()
-        if "client info" in prompt_type_lower:
-            return sections.get("👤 Client Information", "No client information found.")
-        elif "summary" in prompt_type_lower:
-            return sections.get("📝 Tender Summary", "No summary found.")
-        elif "dates" in prompt_type_lower or "timeline" in prompt_type_lower:
-            return sections.get(
-                "📅 All Important Dates and Milestones", "No dates found."
-            )
-        elif "requirements" in prompt_type_lower:
-            # Map to "Combined Requirements from Tender Documents" instead of "🔧 All Technical Requirements"
-            return sections.get(
-                "Combined Requirements from Tender Documents", "No requirements found."
-            )
-        elif "folder structure" in prompt_type_lower:
-            return sections.get(
-                "Unified Folder Structure",  # Adjusted to match the ## heading
-                "No folder structure found.",
-            )
-        elif "additional key details" in prompt_type_lower:
-            tender_summary = sections.get("📝 Tender Summary", "")
-            if not tender_summary:
-                return "No additional details found."
-            # Extract "Additional Key Details" from "📝 Tender Summary"
-            lines = tender_summary.splitlines()
-            additional_details = []
-            in_additional_details = False
-            for line in lines:
-                if line.startswith("#### Additional Key Details"):
-                    in_additional_details = True
-                elif line.startswith("#### ") and in_additional_details:
-                    in_additional_details = False
-                elif in_additional_details and line.strip():
-                    additional_details.append(line)
-            return (
-                "\n".join(additional_details).strip()
-                if additional_details
-                else "No additional details found."
-            )
+MOCK_RESPONSE_PATH = "resources/mock_response.md"
+
+
+def parse_mock_sections(content):
+    """Split the mock response markdown into sections keyed by heading."""
+    # Step 1: Split into top-level sections based on # headings
+    top_level_sections = {}
+    current_top_section = None
+    current_top_content = []
+    for line in content.splitlines():
+        if line.startswith("# "):
+            if current_top_section:
+                top_level_sections[current_top_section] = "\n".join(
+                    current_top_content
+                ).strip()
+            current_top_section = line[2:].strip()
+            current_top_content = []
         else:
-            return "No response generated for prompt type: " + prompt_type
+            current_top_content.append(line)
+    if current_top_section:
+        top_level_sections[current_top_section] = "\n".join(current_top_content).strip()
+
+    # Step 2: Split top-level sections into subsections based on ## headings
+    sections = {}
+    for top_section, top_content in top_level_sections.items():
+        current_subsection = top_section  # Default to top-level section title
+        current_subcontent = []
+        for line in top_content.splitlines():
+            if line.startswith("## "):
+                if current_subsection and current_subcontent:
+                    sections[current_subsection] = "\n".join(current_subcontent).strip()
+                current_subsection = line[
+                    2:
+                ].strip()  # Changed from line[3:] to line[2:] to include the full heading text
+                current_subcontent = []
+            else:
+                current_subcontent.append(line)
+        if current_subsection and current_subcontent:
+            sections[current_subsection] = "\n".join(current_subcontent).strip()
+    return sections
+
+
+def select_mock_response(sections, prompt_type):
+    """Pick the mock response for a prompt type out of the parsed sections."""
+    # Step 3: Map prompt_type to the appropriate section
+    prompt_type_lower = prompt_type.lower()
+    if "combined extraction" in prompt_type_lower:
+        # Same sections as the four single-task mocks, as the JSON object the combined prompt asks for
+        return json.dumps(
+            {
+                "dates": select_mock_response(sections, "Dates"),
+                "requirements": select_mock_response(sections, "Requirements"),
+                "folder_structure": select_mock_response(sections, "Folder Structure"),
+                "client_info": select_mock_response(sections, "Client Info"),
+            }
+        )
+    elif "client info" in prompt_type_lower:
+        return sections.get("👤 Client Information", "No client information found.")
+    elif "summary" in prompt_type_lower:
+        return sections.get("📝 Tender Summary", "No summary found.")
+    elif "dates" in prompt_type_lower or "timeline" in prompt_type_lower:
+        return sections.get("📅 All Important Dates and Milestones", "No dates found.")
+    elif "requirements" in prompt_type_lower:
+        # Map to "Combined Requirements from Tender Documents" instead of "🔧 All Technical Requirements"
+        return sections.get(
+            "Combined Requirements from Tender Documents", "No requirements found."
+        )
+    elif "folder structure" in prompt_type_lower:
+        return sections.get(
+            "Unified Folder Structure",  # Adjusted to match the ## heading
+            "No folder structure found.",
+        )
+    elif "additional key details" in prompt_type_lower:
+        tender_summary = sections.get("📝 Tender Summary", "")
+        if not tender_summary:
+            return "No additional details found."
+        # Extract "Additional Key Details" from "📝 Tender Summary"
+        lines = tender_summary.splitlines()
+        additional_details = []
+        in_additional_details = False
+        for line in lines:
+            if line.startswith("#### Additional Key Details"):
+                in_additional_details = True
+            elif line.startswith("#### ") and in_additional_details:
+                in_additional_details = False
+            elif in_additional_details and line.strip():
+                additional_details.append(line)
+        return (
+            "\n".join(additional_details).strip()
+            if additional_details
+            else "No additional details found."
+        )
+    else:
+        return "No response generated for prompt type: " + prompt_type
+
+
+class MockResponseIndex:
+    """Mock responses by prompt type, parsed once and re-read when the file changes.
+
+    Simulation runs ask for a mock on every task, so the markdown is only
+    re-parsed when its modification time changes, and each prompt type's
+    response is looked up once per parse.
+    """
+
+    def __init__(self, path=MOCK_RESPONSE_PATH):
+        self.path = path
+        self.parses = 0
+        self._mtime = None
+        self._sections = None
+        self._responses = {}
+        self._lock = threading.Lock()
 
+    def get(self, prompt_type):
+        # Raises FileNotFoundError when the file is missing
+        stat = os.stat(self.path)
+        # The size catches rewrites within the file system's timestamp resolution
+        mtime = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._sections = parse_mock_sections(f.read())
+                self._responses = {}
+                self._mtime = mtime
+                self.parses += 1
+            response = self._responses.get(prompt_type)
+            if response is None:
+                response = select_mock_response(self._sections, prompt_type)
+                self._responses[prompt_type] = response
+            return response
+
+
+mock_responses = MockResponseIndex()
+
+
+def load_mock_response(prompt_type):
+    try:
+        return mock_responses.get(prompt_type)
     except FileNotFoundError:
         print("Mock response file 'resources/mock_response.md' not found.")
         return "No response generated."
 
 
+TEMP_FILENAME = r"tmp\w+\.(?:pdf|docx)"
+WORD_CHARACTER = re.compile(r"\w")
+
+
+def is_word(character):
+    return bool(character) and WORD_CHARACTER.match(character) is not None
+
+
+class CitationRewriter:
+    """Rewrites assistant citations and file references for one file mapping.
+
+    Citations 【...】 become the name of the file whose ID they contain (or of
+    the only file), temporary upload names become the first file's name and
+    single-word emphasis is unwrapped. With `intended_file_name`, other
+    files' names are replaced by it. Everything happens in a single pass of
+    one precompiled pattern per intended name, so the cost grows with the
+    text rather than with text times files.
+    """
+
+    def __init__(self, file_id_to_name):
+        self.file_id_to_name = dict(file_id_to_name)
+        self.names = list(self.file_id_to_name.values())
+        self._order = {file_id: i for i, file_id in enumerate(self.file_id_to_name)}
+        self._ids = self._alternation(re.escape(file_id) for file_id in self._order)
+        self._patterns = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _alternation(alternatives):
+        # Longest first, so a name is never cut short by one of its prefixes
+        alternatives = sorted(set(alternatives), key=len, reverse=True)
+        return re.compile("|".join(alternatives)) if alternatives else None
+
+    def _pattern(self, intended_file_name):
+        """Combined pattern and the names to retarget for one intended file name."""
+        with self._lock:
+            compiled = self._patterns.get(intended_file_name)
+            if compiled is None:
+                others = set()
+                if intended_file_name:
+                    others = {name for name in self.names if name != intended_file_name}
+                alternatives = [
+                    r"(?P<citation>【.*?】)",
+                    rf"(?P<temp>{TEMP_FILENAME})",
+                    r"\*(?P<emphasis>\w+)\*",
+                ]
+                names = self._alternation(rf"\b{re.escape(name)}\b" for name in others)
+                if names is not None:
+                    alternatives.append(rf"(?P<name>{names.pattern})")
+                compiled = (re.compile("|".join(alternatives)), others)
+                self._patterns[intended_file_name] = compiled
+            return compiled
+
+    def cited_name(self, citation):
+        """Name of the file a citation refers to, or None if it cannot be told."""
+        # Citations spliced from message annotations hold just the file ID
+        name = self.file_id_to_name.get(citation[1:-1])
+        if name is not None:
+            return name
+        if self._ids is not None:
+            file_ids = [match.group(0) for match in self._ids.finditer(citation)]
+            if file_ids:
+                return self.file_id_to_name[min(file_ids, key=self._order.get)]
+        if len(self.names) == 1:
+            return self.names[0]
+        return None
+
+    def rewrite(self, text, intended_file_name=None):
+        if not self.names:
+            return text
+        pattern, others = self._pattern(intended_file_name)
+
+        def retarget(value, before, after):
+            # Rewritten values are matched against other names like the text is
+            if (
+                value in others
+                and is_word(before) != is_word(value[0])
+                and is_word(value[-1]) != is_word(after)
+            ):
+                return intended_file_name
+            return value
+
+        def replace(match):
+            kind = match.lastgroup
+            before = match.string[match.start() - 1 : match.start()]
+            after = match.string[match.end() : match.end() + 1]
+            if kind == "citation":
+                name = self.cited_name(match.group(0))
+                if name is None:
+                    # Unresolved citations still get their inner references fixed
+                    return "【" + pattern.sub(replace, match.group(0)[1:-1]) + "】"
+                return f"【{retarget(name, '【', '】')}】"
+            if kind == "temp":
+                return retarget(self.names[0], before, after)
+            if kind == "emphasis":
+                return retarget(match.group("emphasis"), before, after)
+            return intended_file_name
+
+        return pattern.sub(replace, text)
+
+
+@functools.lru_cache(maxsize=32)
+def _citation_rewriter(items):
+    return CitationRewriter(items)
+
+
+def citation_rewriter(file_id_to_name):
+    """The CitationRewriter for a mapping, built once per distinct mapping."""
+    return _citation_rewriter(tuple(file_id_to_name.items()))
+
+
 def replace_citations(text, file_id_to_name, intended_file_name=None):
     if not file_id_to_name:
         return text  # Avoid processing if file_id_to_name is empty
-
-    def replace_citation(match):
-        citation = match.group(0)
-        for file_id, original_name in file_id_to_name.items():
-            if file_id in citation:
-                return f"【{original_name}】"
-        if len(file_id_to_name) == 1:
-            return f"【{list(file_id_to_name.values())[0]}】"
-        return citation
-
-    # Replace citations in the format 【...】
-    text = re.sub(r"【.*?】", replace_citation, text)
-
-    # Replace temporary filenames with more specificity
-    for file_id, original_name in file_id_to_name.items():
-        temp_filename_pattern = rf"tmp\w+\.(?:pdf|docx)"
-        if re.search(temp_filename_pattern, text):
-            text = re.sub(temp_filename_pattern, original_name, text)
-
-    # Optionally preserve asterisks or use a safer pattern
-    text = re.sub(r"\*(\w+)\*", r"\1", text)
-
-    # Correct file name references with word boundaries
-    if intended_file_name:
-        for file_id, file_name in file_id_to_name.items():
-            if file_name != intended_file_name:
-                pattern = rf"\b{re.escape(file_name)}\b"
-                text = re.sub(pattern, intended_file_name, text)
-
-    return text
+    return citation_rewriter(file_id_to_name).rewrite(text, intended_file_name)
@@ -0,0 +1,70 @@
+# tests/test_combined_extraction.py
+import pytest
+
+from src.tender_analyzer import (
+    compare_extractions,
+    resolve_file_results,
+    split_combined_response,
+)
+from src.utils import load_mock_response
+
+
+def test_split_combined_response_reads_fenced_json():
+    response = '```json\n{"dates": "- 21.04.2021, Deadline", "requirements": "NO_INFO_FOUND", "folder_structure": "", "client_info": ["- Name: A", "- Role: B"]}\n```'
+    assert split_combined_response(response) == {
+        "dates": "- 21.04.2021, Deadline",
+        "requirements": "NO_INFO_FOUND",
+        "folder_structure": "NO_INFO_FOUND",
+        "client_info": "- Name: A\n- Role: B",
+    }
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        "NO_INFO_FOUND",
+        '{"dates": "x", "requirements": "y", "folder_structure": "z"}',
+        '{"dates": "x", "requirements": ',
+    ],
+    ids=["no JSON", "missing section", "truncated JSON"],
+)
+def test_split_combined_response_rejects_malformed_output(response):
+    with pytest.raises(ValueError):
+        split_combined_response(response)
+
+
+def test_combined_mock_matches_four_prompt_path():
+    """Parity check: the combined response splits back into the single-task outputs."""
+    combined = split_combined_response(
+        load_mock_response("Combined Extraction for test.pdf")
+    )
+    separate = {
+        "dates": load_mock_response("Dates for test.pdf"),
+        "requirements": load_mock_response("Requirements for test.pdf"),
+        "folder_structure": load_mock_response("Folder Structure for test.pdf"),
+        "client_info": load_mock_response("Client Info for test.pdf"),
+    }
+    assert combined == separate
+    assert all(
+        similarity == 1.0 and same_outcome
+        for similarity, same_outcome in compare_extractions(combined, separate).values()
+    )
+
+
+def test_compare_extractions_flags_no_info_mismatch():
+    comparison = compare_extractions(
+        {"dates": "NO_INFO_FOUND", "requirements": "a"},
+        {"dates": "- 01.01.2021, Start", "requirements": "a"},
+    )
+    assert comparison["dates"][1] is False
+    assert comparison["requirements"] == (1.0, True)
+
+
+def test_resolve_file_results_spreads_combined_error_to_every_section():
+    results = resolve_file_results({"combined": "Error: boom"}, "test.pdf", None)
+    assert results == {
+        "dates": "Error: boom",
+        "requirements": "Error: boom",
+        "folder_structure": "Error: boom",
+        "client_info": "Error: boom",
+    }
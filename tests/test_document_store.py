@@ -0,0 +1,114 @@
+# tests/test_document_store.py
+import io
+import threading
+
+from docx import Document
+
+from src import document_store
+from src.document_store import DocumentStore
+from src.extraction import ExtractionService
+from tests.test_extraction import make_pdf
+
+
+class UploadedFile(io.BytesIO):
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def docx_file(name, paragraphs):
+    doc = Document()
+    for paragraph in paragraphs:
+        doc.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return UploadedFile(name, buffer.getvalue())
+
+
+def test_docx_text_matches_paragraphs():
+    store = DocumentStore([docx_file("a.docx", ["Deadline 21.04.2021", "Scope"])])
+    assert store.text("a.docx") == "Deadline 21.04.2021\nScope"
+    assert store.text("missing.pdf") is None
+
+
+class UncopiedFile(UploadedFile):
+    def getvalue(self):
+        raise AssertionError("the upload was copied")
+
+
+def test_documents_are_extracted_without_copying_the_upload():
+    pdf = UncopiedFile("a.pdf", make_pdf(["Deadline 21.04.2021", "Scope"]))
+    docx = UncopiedFile("b.docx", docx_file("b.docx", ["Deadline"]).getvalue())
+    assert DocumentStore([pdf, docx]).pages("a.pdf") == ["Deadline 21.04.2021", "Scope"]
+    service = ExtractionService(processes=2)
+    try:
+        store = DocumentStore([pdf, docx], extractor=service)
+        assert store.pages("a.pdf") == ["Deadline 21.04.2021", "Scope"]
+        assert store.text("b.docx") == "Deadline"
+    finally:
+        service.shutdown()
+
+
+def test_each_document_is_parsed_once(monkeypatch):
+    calls = []
+
+    def fake_extract(file_name, data):
+        calls.append(file_name)
+        return [bytes(data).decode()]
+
+    monkeypatch.setattr(document_store, "iter_pages", fake_extract)
+    store = DocumentStore(
+        [UploadedFile("a.pdf", b"page text"), UploadedFile("copy.pdf", b"page text")]
+    )
+
+    threads = [threading.Thread(target=store.text, args=("a.pdf",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Same content under another name shares the extraction
+    assert store.pages("copy.pdf") == ["page text"]
+    assert calls == ["a.pdf"]
+    assert store.estimate_tokens("a.pdf") == 2
+
+
+def test_least_recently_used_documents_spill_to_disk(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_extract(file_name, data):
+        calls.append(file_name)
+        return [bytes(data).decode()] * 2
+
+    monkeypatch.setattr(document_store, "iter_pages", fake_extract)
+    store = DocumentStore(
+        [UploadedFile(f"{n}.pdf", n.encode() * 10) for n in "abc"],
+        max_memory_bytes=45,
+        spill_dir=str(tmp_path),
+    )
+    for name in ["a.pdf", "b.pdf", "c.pdf", "a.pdf"]:
+        store.pages(name)
+
+    assert calls == ["a.pdf", "b.pdf", "c.pdf"]
+    assert store.pages("a.pdf") == ["a" * 10, "a" * 10]
+    assert store.snapshot() == (3, 1, 1)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_documents_over_budget_stream_through_to_disk(monkeypatch, tmp_path):
+    def fake_extract(file_name, data):
+        for i in range(100):
+            yield f"page {i} " * 10
+
+    monkeypatch.setattr(document_store, "iter_pages", fake_extract)
+    store = DocumentStore(
+        [UploadedFile("huge.pdf", b"x")], max_memory_bytes=500, spill_dir=str(tmp_path)
+    )
+
+    first = list(store.iter_pages("huge.pdf"))
+    assert len(first) == 100
+    assert store._memory_bytes == 0
+    # Read back from the spill file without parsing again
+    assert list(store.iter_pages("huge.pdf")) == first
+    assert store.snapshot() == (1, 0, 1)
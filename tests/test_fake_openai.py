@@ -0,0 +1,81 @@
+# tests/test_fake_openai.py
+import io
+import time
+
+import openai
+import pytest
+
+from src.fake_openai import prompt_type, start_server
+from src.prompts import DATES_PROMPT, SYNTHESIZE_DATES_PROMPT, format_prompt
+from src.simulation import SimulationProfile
+from src.tender_analyzer import extract_assistant_text
+
+
+@pytest.fixture
+def fake_api():
+    servers = []
+
+    def start(**profile):
+        server, base_url = start_server(profile=SimulationProfile(**profile))
+        servers.append(server)
+        return openai.OpenAI(api_key="sk-fake", base_url=base_url, max_retries=0)
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_prompts_are_matched_to_their_task_kind():
+    assert prompt_type(format_prompt(DATES_PROMPT, file_name="a.pdf")) == "Dates"
+    assert prompt_type(format_prompt(SYNTHESIZE_DATES_PROMPT, dates_data="x")) == (
+        "Dates"
+    )
+    assert prompt_type("Hello") == "Unknown"
+
+
+def test_upload_thread_run_poll_and_messages(fake_api):
+    client = fake_api(latency={"default": 0.2}, requests_per_minute=1000)
+    uploaded = client.files.create(
+        file=("a.pdf", io.BytesIO(b"%PDF-1.4")), purpose="assistants"
+    )
+    assert client.files.retrieve(uploaded.id).filename == "a.pdf"
+
+    thread = client.beta.threads.create()
+    client.beta.threads.messages.create(
+        thread_id=thread.id,
+        role="user",
+        content=format_prompt(DATES_PROMPT, file_name="a.pdf"),
+        attachments=[{"file_id": uploaded.id, "tools": [{"type": "file_search"}]}],
+    )
+    run = client.beta.threads.runs.create(thread_id=thread.id, assistant_id="asst_x")
+    assert run.status == "in_progress"
+    time.sleep(0.25)
+    raw = client.beta.threads.runs.with_raw_response.retrieve(
+        thread_id=thread.id, run_id=run.id
+    )
+    assert raw.parse().status == "completed"
+    assert raw.parse().usage.total_tokens > 0
+    assert raw.headers["x-ratelimit-limit-requests"] == "1000"
+
+    text = extract_assistant_text(
+        client.beta.threads.messages.list(thread_id=thread.id)
+    )
+    assert text.endswith(f"【{uploaded.id}】")
+    assert client.files.delete(uploaded.id).deleted
+    with pytest.raises(openai.NotFoundError):
+        client.files.retrieve(uploaded.id)
+
+
+def test_streamed_runs_and_rate_limits(fake_api):
+    client = fake_api(requests_per_minute=8)
+    thread = client.beta.threads.create()
+    client.beta.threads.messages.create(thread_id=thread.id, role="user", content="Hi")
+    with client.beta.threads.runs.stream(
+        thread_id=thread.id, assistant_id="asst_x"
+    ) as stream:
+        stream.until_done()
+        assert stream.current_run.status == "completed"
+    client.beta.threads.runs.create(thread_id=thread.id, assistant_id="asst_x")
+    with pytest.raises(openai.RateLimitError) as error:
+        client.beta.threads.runs.create(thread_id=thread.id, assistant_id="asst_x")
+    assert float(error.value.response.headers["retry-after-ms"]) > 0
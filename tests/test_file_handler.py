@@ -0,0 +1,100 @@
+# tests/test_file_handler.py
+import io
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src import file_handler
+from src.file_registry import FileRegistry
+
+
+class FakeUploadedFile(io.BytesIO):
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+@pytest.fixture
+def fake_openai(tmp_path, monkeypatch):
+    lock = threading.Lock()
+    state = SimpleNamespace(created=[], in_flight=0, peak=0)
+
+    def create(file, purpose):
+        name, stream = file
+        with lock:
+            state.in_flight += 1
+            state.peak = max(state.peak, state.in_flight)
+        time.sleep(0.05)
+        with lock:
+            state.in_flight -= 1
+            state.created.append((name, stream.read()))
+        return SimpleNamespace(id=f"file-{name}")
+
+    monkeypatch.setattr(
+        file_handler.openai, "files", SimpleNamespace(create=create), raising=False
+    )
+    monkeypatch.setattr(
+        file_handler,
+        "file_registry",
+        FileRegistry(str(tmp_path / "files.sqlite"), retention_seconds=3600),
+    )
+    return state
+
+
+def test_iter_uploads_streams_buffers_concurrently(fake_openai):
+    files = [FakeUploadedFile(f"{i}.pdf", f"content {i}".encode()) for i in range(6)]
+
+    results = list(file_handler.iter_uploads(files, False, concurrency=3))
+
+    assert sorted(result.file_id for result in results) == sorted(
+        f"file-{i}.pdf" for i in range(6)
+    )
+    assert sorted(fake_openai.created) == sorted(
+        (f"{i}.pdf", f"content {i}".encode()) for i in range(6)
+    )
+    assert fake_openai.peak == 3
+
+
+def test_iter_uploads_skips_duplicates_and_reuses_known_content(fake_openai):
+    first = [FakeUploadedFile("a.pdf", b"same"), FakeUploadedFile("b.pdf", b"same")]
+    results = {
+        result.file.name: result for result in file_handler.iter_uploads(first, False)
+    }
+    assert results["a.pdf"].file_id == "file-a.pdf"
+    assert results["b.pdf"].duplicate_of == "a.pdf"
+
+    (again,) = file_handler.iter_uploads([FakeUploadedFile("c.pdf", b"same")], False)
+    assert (again.file_id, again.reused) == ("file-a.pdf", True)
+    assert len(fake_openai.created) == 1
+
+    # Already in the tender under its first name: not added a second time
+    (later,) = file_handler.iter_uploads(
+        [FakeUploadedFile("d.pdf", b"same")],
+        False,
+        known_files={"file-a.pdf": "a.pdf"},
+    )
+    assert (later.file_id, later.duplicate_of) == (None, "a.pdf")
+
+
+def test_iter_uploads_keeps_registered_file_when_it_cannot_be_verified(
+    fake_openai, monkeypatch
+):
+    list(file_handler.iter_uploads([FakeUploadedFile("a.pdf", b"same")], False))
+
+    def retrieve(file_id):
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(file_handler.openai.files, "retrieve", retrieve, raising=False)
+    monkeypatch.setattr(file_handler, "FILE_VERIFY_INTERVAL_SECONDS", -1)
+    (again,) = file_handler.iter_uploads([FakeUploadedFile("b.pdf", b"same")], False)
+    assert (again.file_id, again.reused) == ("file-a.pdf", True)
+    assert len(fake_openai.created) == 1
+
+
+def test_iter_uploads_rejects_unsupported_types(fake_openai):
+    (result,) = file_handler.iter_uploads([FakeUploadedFile("notes.txt", b"x")], False)
+    assert result.file_id is None
+    assert result.error == "Unsupported file type: .txt"
@@ -0,0 +1,44 @@
+# tests/test_file_registry.py
+from src import file_registry as file_registry_module
+from src.file_registry import FileRegistry
+
+
+def make_registry(tmp_path, retention_seconds=3600):
+    return FileRegistry(str(tmp_path / "files.sqlite"), retention_seconds)
+
+
+def test_registered_content_is_reused_across_instances(tmp_path):
+    make_registry(tmp_path).register("hash-a", "file-1", "annex.pdf", 1024)
+    file_id, _ = make_registry(tmp_path).lookup("hash-a")
+    assert file_id == "file-1"
+    assert make_registry(tmp_path).lookup("hash-b") is None
+
+
+def test_forget_drops_the_mapping(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.register("hash-a", "file-1", "annex.pdf", 1024)
+    registry.forget("hash-a")
+    assert registry.lookup("hash-a") is None
+
+
+def test_expired_returns_files_unused_past_retention(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(file_registry_module.time, "time", lambda: now[0])
+    registry = make_registry(tmp_path, retention_seconds=100)
+    registry.register("hash-a", "file-1", "a.pdf", 1)
+    registry.register("hash-b", "file-2", "b.pdf", 1)
+    now[0] += 90
+    registry.lookup("hash-b")
+    now[0] += 20
+    assert registry.expired() == [("hash-a", "file-1")]
+
+
+def test_cleanup_due_at_most_once_per_interval(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(file_registry_module.time, "time", lambda: now[0])
+    registry = make_registry(tmp_path)
+    assert registry.cleanup_due(60) is True
+    now[0] += 30
+    assert make_registry(tmp_path).cleanup_due(60) is False
+    now[0] += 31
+    assert registry.cleanup_due(60) is True
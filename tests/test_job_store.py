@@ -0,0 +1,141 @@
+# tests/test_job_store.py
+import sqlite3
+
+from src import job_store as job_store_module
+from src import tender_analyzer
+from src.document_store import DocumentStore
+from src.job_store import JobStore
+
+
+def make_store(tmp_path, retention_seconds=3600):
+    return JobStore(str(tmp_path / "cache" / "jobs.sqlite"), retention_seconds)
+
+
+def test_job_keeps_state_files_and_results(tmp_path):
+    store = make_store(tmp_path)
+    job_id = store.create({"previous_results": {"file_ids": ["file_0"]}})
+    assert store.job(job_id) == ({"previous_results": {"file_ids": ["file_0"]}}, False)
+    store.add_file(job_id, "file_b", "b.pdf")
+    store.add_file(job_id, "file_a", "a.pdf")
+    store.add_file(job_id, "file_b", "b.pdf")
+    store.save_task(job_id, "file_a", "dates", "- 21.04.2021")
+    store.save_task(job_id, "file_a", "combined", {"dates": "x", "requirements": "y"})
+
+    reopened = make_store(tmp_path)
+    assert reopened.files(job_id) == [("file_b", "b.pdf"), ("file_a", "a.pdf")]
+    assert reopened.task_results(job_id) == {
+        ("file_a", "dates"): "- 21.04.2021",
+        ("file_a", "combined"): {"dates": "x", "requirements": "y"},
+    }
+    reopened.finish(job_id)
+    assert reopened.job(job_id)[1] is True
+    assert reopened.job("unknown") is None
+
+
+def test_stage_results_only_match_the_same_inputs(tmp_path):
+    store = make_store(tmp_path)
+    job_id = store.create({})
+    store.save_stage(job_id, "synthesize_dates", [["- 21.04.2021"]], "SYNTHESIS")
+    assert store.stage_result(job_id, "synthesize_dates", [["- 21.04.2021"]]) == (
+        "SYNTHESIS"
+    )
+    assert store.stage_result(job_id, "synthesize_dates", [["- 22.04.2021"]]) is None
+    assert store.stage_result(job_id, "summary", [["- 21.04.2021"]]) is None
+
+
+def test_stale_jobs_are_pruned_when_a_job_is_created(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(job_store_module.time, "time", lambda: now[0])
+    store = make_store(tmp_path, retention_seconds=60)
+    stale = store.create({})
+    store.save_task(stale, "file_a", "dates", "x")
+    now[0] += 30
+    active = store.create({})
+    now[0] += 45
+    store.create({})
+    assert store.job(stale) is None
+    assert store.task_results(stale) == {}
+    assert store.job(active) is not None
+
+
+def test_resumed_analysis_only_redoes_unfinished_work(tmp_path, monkeypatch, quiet):
+    store = make_store(tmp_path)
+    monkeypatch.setattr(tender_analyzer, "job_store", store)
+    calls = []
+    failing = {"Requirements for b.pdf"}
+
+    def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
+        calls.append(task_name)
+        if task_name in failing:
+            return f"{task_name} failed with status: failed", {}
+        return f"<{task_name}>", {}
+
+    monkeypatch.setattr(tender_analyzer, "run_prompt", run_prompt)
+    file_ids = ["file_a", "file_b"]
+    file_id_to_name = {"file_a": "a.pdf", "file_b": "b.pdf"}
+
+    def analyze(job_id, resume):
+        return tender_analyzer.analyze_tender(
+            file_ids,
+            file_id_to_name,
+            quiet,
+            quiet,
+            quiet,
+            DocumentStore([]),
+            len(file_ids),
+            False,
+            synthesize=True,
+            job_id=job_id,
+            resume=resume,
+        )
+
+    job_id = store.create({})
+    analyze(job_id, resume=False)
+    assert store.files(job_id) == [("file_a", "a.pdf"), ("file_b", "b.pdf")]
+    assert len(calls) == 4 * 2 + 1 + 4
+
+    # The failed task was not saved, so resuming retries it along with the
+    # synthesis built on it; everything else comes from the job store
+    failing.clear()
+    calls.clear()
+    output = analyze(job_id, resume=True)
+    assert calls == ["Requirements for b.pdf", "Synthesize Requirements"]
+    assert output[1] == ["<Requirements for a.pdf>", "<Requirements for b.pdf>"]
+    assert output[5] == "<Tender Summary>"
+    assert output[7]["synthesized_dates"] == "<Synthesize Dates>"
+
+
+class LockedJobStore(JobStore):
+    """A job store whose database stays locked after the job is created."""
+
+    def locked(self, *args):
+        raise sqlite3.OperationalError("database is locked")
+
+    add_file = save_task = save_stage = stage_result = task_results = locked
+
+
+def test_job_store_failures_do_not_stop_the_analysis(tmp_path, monkeypatch, quiet):
+    store = LockedJobStore(str(tmp_path / "cache" / "jobs.sqlite"), 3600)
+    monkeypatch.setattr(tender_analyzer, "job_store", store)
+
+    def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
+        return f"<{task_name}>", {}
+
+    monkeypatch.setattr(tender_analyzer, "run_prompt", run_prompt)
+    job_id = store.create({})
+    for resume in (False, True):
+        output = tender_analyzer.analyze_tender(
+            ["file_a"],
+            {"file_a": "a.pdf"},
+            quiet,
+            quiet,
+            quiet,
+            DocumentStore([]),
+            1,
+            False,
+            synthesize=True,
+            job_id=job_id,
+            resume=resume,
+        )
+        assert output[1] == ["<Requirements for a.pdf>"]
+        assert output[7]["synthesized_dates"] == "<Synthesize Dates>"
@@ -0,0 +1,193 @@
+# tests/test_local_dates.py
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from src import tender_analyzer
+from src.document_store import DocumentStore
+from src.scheduler import WorkUnit
+from src.tender_analyzer import (
+    LocalDatesWait,
+    SpanIndex,
+    extract_dates_fallback,
+    extract_dates_from_pages,
+    extract_local_dates,
+    finalize_file_results,
+    merge_local_dates,
+)
+
+
+class StubDocuments:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def supports(self, file_name):
+        return file_name in self.pages
+
+    def iter_pages(self, file_name):
+        for page in self.pages[file_name]:
+            if isinstance(page, Exception):
+                raise page
+            yield page
+
+
+def test_extract_local_dates_streams_the_document_store():
+    documents = StubDocuments(
+        {
+            "a.pdf": ["Cover page", "The deadline is 21.04.2021 for submission."],
+            "broken.pdf": ["Page one", ValueError("bad xref")],
+        }
+    )
+    logger = logging.getLogger()
+    assert (
+        extract_local_dates(documents, "a.pdf", logger)
+        == "- 21.04.2021, The deadline is for submission, Source: a.pdf"
+    )
+    assert extract_local_dates(documents, "b.pdf", logger) is None
+    # Unparseable documents are logged and skipped
+    assert extract_local_dates(documents, "broken.pdf", logger) is None
+
+
+def test_date_windows_keep_dates_wrapped_across_pages():
+    pages = [
+        "Intro.\nSubmissions close on 1 March",
+        "2022 at the latest.\n" + "Filler line.\n" * 50,
+        "Award on 21.04.2022.",
+    ]
+    text = "\n".join(pages)
+    expected = extract_dates_fallback(text, "a.pdf")
+    assert "- 1 March\n2022, Submissions close on" in expected
+    assert extract_dates_from_pages(iter(pages), "a.pdf", window_chars=40) == expected
+
+
+def test_merge_local_dates_appends_new_pattern_matches():
+    local = "- 21.04.2021, Deadline, Source: a.pdf"
+    merged = merge_local_dates(
+        ["- 21.04.2021: Deadline", "NO_INFO_FOUND", local + " [fallback]", "x"],
+        [local, local, local, "NO_INFO_FOUND"],
+    )
+    assert merged == [
+        "- 21.04.2021: Deadline\nPattern-matched dates (local scan):\n" + local,
+        "Pattern-matched dates (local scan):\n" + local,
+        local + " [fallback]",
+        "x",
+    ]
+
+
+def test_finalize_uses_precomputed_local_dates_as_fallback():
+    results = {
+        "dates": "NO_INFO_FOUND",
+        "requirements": "r",
+        "folder_structure": "f",
+        "client_info": "c",
+    }
+    dates, *_ = finalize_file_results(
+        "file_a",
+        results,
+        {"file_a": "a.pdf"},
+        "- 21.04.2021, Deadline, Source: a.pdf",
+        logging.getLogger(),
+    )
+    assert dates == "- 21.04.2021, Deadline, Source: a.pdf [fallback]"
+
+
+def test_span_index_merges_overlapping_and_nested_spans():
+    spans = SpanIndex()
+    spans.add(10, 20)
+    spans.add(30, 40)
+    spans.add(15, 35)
+    spans.add(50, 55)
+    assert (spans.starts, spans.ends) == ([10, 50], [40, 55])
+    assert spans.covers(10) and spans.covers(39) and not spans.covers(40)
+    assert not spans.covers(9) and not spans.covers(55)
+
+
+def test_date_dense_documents_keep_one_entry_per_date():
+    content = "".join(
+        f"Lot {i} opens on {i % 28 + 1:02d}.03.2021 at 9h.\n" for i in range(2000)
+    )
+    lines = extract_dates_fallback(content, "annex.pdf").split("\n")
+    assert len(lines) == 2000
+    assert lines[1] == "- 02.03.2021 at 9h, Lot 1 opens on, Source: annex.pdf"
+
+
+@pytest.mark.parametrize(
+    "analyze", [tender_analyzer.analyze_tender, tender_analyzer.analyze_tender_async]
+)
+def test_slow_local_scan_does_not_hold_up_other_files(monkeypatch, quiet, analyze):
+    released = threading.Event()
+    scans = []
+
+    def extract_local_dates(documents, file_name, logger):
+        if file_name == "a.pdf":
+            # Only let go once b.pdf has been reported as analyzed
+            scans.append(released.wait(5))
+        return "- 21.04.2021, Deadline, Source: a.pdf"
+
+    def latency(task_name):
+        # a.pdf's dates come in first, while its scan is still running
+        if task_name == "Dates for a.pdf":
+            return 0
+        return 0.3 if task_name.endswith("c.pdf") else 0.05
+
+    def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
+        time.sleep(latency(task_name))
+        return "NO_INFO_FOUND", {}
+
+    async def run_prompt_async(file_ids, prompt, task_name, logger, simulation_mode):
+        await asyncio.sleep(latency(task_name))
+        return "NO_INFO_FOUND", {}
+
+    class FilesText:
+        def markdown(self, text):
+            if "(last: b.pdf)" in text:
+                released.set()
+
+    monkeypatch.setattr(tender_analyzer, "extract_local_dates", extract_local_dates)
+    monkeypatch.setattr(tender_analyzer, "run_prompt", run_prompt)
+    monkeypatch.setattr(tender_analyzer, "run_prompt_async", run_prompt_async)
+    output = analyze(
+        ["file_a", "file_b", "file_c"],
+        {"file_a": "a.pdf", "file_b": "b.pdf", "file_c": "c.pdf"},
+        quiet,
+        quiet,
+        FilesText(),
+        DocumentStore([]),
+        3,
+        False,
+        concurrency=8,
+    )
+    if asyncio.iscoroutine(output):
+        output = asyncio.run(output)
+    assert scans == [True]
+    # a.pdf still gets its local dates once the scan is in
+    assert output[0][0] == "- 21.04.2021, Deadline, Source: a.pdf [fallback]"
+
+
+def test_units_that_finish_before_their_scan_is_registered_do_not_block():
+    finalized = []
+
+    class Analysis:
+        def task_done(self, unit, response, error, results, local_dates):
+            finalized.append((unit.key, local_dates))
+
+    wait = LocalDatesWait(Analysis())
+    scan = Future()
+    unit = WorkUnit("file_a", "a.pdf", "dates", "prompt", "Dates for a.pdf")
+    adding = threading.Thread(
+        target=wait.add, args=(unit, "NO_INFO_FOUND", None, None, scan)
+    )
+    adding.start()
+    adding.join(2)
+    try:
+        assert not adding.is_alive()
+        assert finalized == []
+        # A late registration of the same scan leaves the held unit in place
+        wait.scan_started("file_a", scan)
+    finally:
+        scan.set_result("- 21.04.2021")
+    assert finalized == [("dates", "- 21.04.2021")]
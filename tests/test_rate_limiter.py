@@ -0,0 +1,84 @@
+# tests/test_rate_limiter.py
+from types import SimpleNamespace
+
+import openai
+import httpx
+
+from src import rate_limiter
+from src.rate_limiter import (
+    AdmissionController,
+    parse_duration,
+    retry_after_from_message,
+    retry_after_seconds,
+)
+
+
+def headers(
+    remaining_requests, remaining_tokens, limit_requests=100, limit_tokens=1000
+):
+    return {
+        "remaining_requests": str(remaining_requests),
+        "limit_requests": str(limit_requests),
+        "reset_requests": "1m0s",
+        "remaining_tokens": str(remaining_tokens),
+        "limit_tokens": str(limit_tokens),
+        "reset_tokens": "500ms",
+    }
+
+
+def test_parse_duration_reads_openai_reset_values():
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("120ms") == 0.12
+    assert parse_duration("1h2m3.5s") == 3723.5
+    assert parse_duration("N/A") is None
+
+
+def test_retry_after_from_headers_and_messages():
+    request = httpx.Request("POST", "https://api.openai.com/v1/threads")
+    response = httpx.Response(429, headers={"retry-after": "7"}, request=request)
+    error = openai.RateLimitError("Rate limit", response=response, body=None)
+    assert retry_after_seconds(error) == 7.0
+    assert (
+        retry_after_from_message("Rate limit reached. Please try again in 250ms.")
+        == 0.25
+    )
+    assert retry_after_from_message("Something else") is None
+
+
+def test_admits_freely_until_headers_arrive():
+    controller = AdmissionController()
+    assert controller._try_admit("Dates for a.pdf") == 0
+
+
+def test_waits_for_token_budget_learned_from_runs():
+    controller = AdmissionController(headroom=0.0)
+    run = SimpleNamespace(usage=SimpleNamespace(total_tokens=400), last_error=None)
+    controller.observe_run("Dates for a.pdf", run)
+    controller.update(headers(remaining_requests=50, remaining_tokens=500))
+
+    assert controller._try_admit("Dates for b.pdf") == 0
+    # 100 tokens left, 400 expected: 300 missing, refilling at 1000 tokens/s
+    wait = controller._try_admit("Dates for c.pdf")
+    assert 0.25 < wait <= 0.3
+    # Other task kinds have no usage history yet
+    assert controller._try_admit("Requirements for c.pdf") == 0
+
+
+def test_rate_limited_run_holds_off_every_admission(monkeypatch):
+    sleeps = []
+    controller = AdmissionController()
+    clock = iter(range(0, 1000))
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: next(clock) * 0.5)
+    monkeypatch.setattr(rate_limiter.time, "sleep", sleeps.append)
+    run = SimpleNamespace(
+        usage=None,
+        last_error=SimpleNamespace(
+            code="rate_limit_exceeded", message="Please try again in 2s."
+        ),
+    )
+
+    controller.observe_run("Dates for a.pdf", run)
+    controller.acquire("Dates for b.pdf")
+
+    assert sleeps and sum(sleeps) >= 1.0
+    assert controller.report().startswith("Rate-limit admission: 1 runs delayed")
@@ -0,0 +1,111 @@
+# tests/test_response_cache.py
+import logging
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+from src import response_cache as response_cache_module
+from src import tender_analyzer
+from src.response_cache import ResponseCache
+
+
+def make_cache(tmp_path, max_bytes=1024, ttl_seconds=3600):
+    return ResponseCache(
+        str(tmp_path / "cache" / "responses.sqlite"), max_bytes, ttl_seconds
+    )
+
+
+def test_key_covers_files_prompt_task_and_assistant_settings():
+    base = ("abc",), "prompt", "Dates for a.pdf", "gpt-4o", 0.2
+    key = ResponseCache.make_key(*base)
+    assert key == ResponseCache.make_key(*base)
+    for index, changed in enumerate([("abd",), "prompt!", "Dates", "gpt-4.1", 0.3]):
+        variant = list(base)
+        variant[index] = changed
+        assert ResponseCache.make_key(*variant) != key
+
+
+def test_get_counts_hits_and_misses(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get("k") is None
+    cache.put("k", "response", {"remaining_requests": "10"})
+    assert cache.get("k") == ("response", {"remaining_requests": "10"})
+    assert cache.snapshot() == (1, 1)
+    assert cache.report() == "Response cache: 1 hits, 1 misses (50% hit rate)"
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, "time", lambda: now[0])
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.put("k", "response", {})
+    now[0] += 59
+    assert cache.get("k") is not None
+    now[0] += 2
+    assert cache.get("k") is None
+
+
+def test_least_recently_used_entries_are_evicted_over_size(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, "time", lambda: now[0])
+    cache = make_cache(tmp_path, max_bytes=25)
+    for key in ["a", "b"]:
+        now[0] += 1
+        cache.put(key, "x" * 10, {})
+    now[0] += 1
+    cache.get("a")
+    now[0] += 1
+    cache.put("c", "x" * 10, {})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_cache_persists_across_instances(tmp_path):
+    make_cache(tmp_path).put("k", "response", {})
+    assert make_cache(tmp_path).get("k") == ("response", {})
+
+
+class LockedCache:
+    def get(self, key):
+        raise sqlite3.OperationalError("database is locked")
+
+    def put(self, key, response, rate_limit_headers):
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_a_failing_cache_degrades_to_a_miss(monkeypatch):
+    monkeypatch.setattr(tender_analyzer, "response_cache", LockedCache())
+    logger = logging.getLogger()
+    assert tender_analyzer.cached_response("k", "Dates", logger) is None
+    tender_analyzer.cache_response("k", "response", {}, "Dates", logger)
+
+
+def test_hits_report_no_stale_rate_limit_headers(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path)
+    cache.put("k", "response", {"remaining_requests": "10"})
+    monkeypatch.setattr(tender_analyzer, "response_cache", cache)
+    cached = tender_analyzer.cached_response("k", "Dates", logging.getLogger())
+    assert cached == ("response", {})
+
+
+def test_assistant_settings_are_fetched_once(monkeypatch):
+    calls = []
+
+    def retrieve(assistant_id):
+        calls.append(assistant_id)
+        time.sleep(0.05)
+        return SimpleNamespace(model="gpt-4o", temperature=0.2, top_p=1.0)
+
+    monkeypatch.setattr(tender_analyzer, "_assistant_fingerprint", None)
+    monkeypatch.setattr(tender_analyzer.openai.beta.assistants, "retrieve", retrieve)
+    threads = [
+        threading.Thread(target=tender_analyzer.assistant_fingerprint) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert tender_analyzer.assistant_fingerprint() == ("gpt-4o", 0.2, 1.0)
@@ -0,0 +1,82 @@
+# tests/test_run_polling.py
+import itertools
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from src import run_polling
+from src.run_polling import AdaptivePollSchedule, RunCompletionStats, task_kind
+
+
+def test_task_kind_groups_by_prompt_type():
+    assert task_kind("Dates for tender.pdf") == "Dates"
+    assert task_kind("Synthesize Dates") == "Synthesize Dates"
+
+
+def test_schedule_without_history_backs_off_to_max():
+    schedule = AdaptivePollSchedule(min_interval=0.1, max_interval=1.0, backoff=2.0)
+    intervals = list(itertools.islice(schedule.intervals("Dates"), 6))
+    assert intervals == [0.1, 0.2, 0.4, 0.8, 1.0, 1.0]
+
+
+def test_schedule_waits_until_expected_duration():
+    schedule = AdaptivePollSchedule(min_interval=0.1, max_interval=2.0)
+    schedule.observe("Dates", 10.0)
+    first, second = itertools.islice(schedule.intervals("Dates"), 2)
+    assert first == 8.0
+    assert second == 0.5
+
+
+def test_schedule_smooths_observed_durations():
+    schedule = AdaptivePollSchedule(smoothing=0.5)
+    schedule.observe("Dates", 10.0)
+    schedule.observe("Dates", 20.0)
+    assert schedule.expected("Dates") == 15.0
+    assert schedule.expected("Requirements") is None
+
+
+def test_stats_report_since_snapshot():
+    stats = RunCompletionStats()
+    stats.record(3, 2.0)
+    start = stats.snapshot()
+    stats.record(4, 1.0)
+    stats.record(2, 1.0)
+    assert stats.report(since=start) == (
+        "Run completion: 2 runs, 6 status calls (3.0 per run), 2.0s waiting on runs"
+    )
+
+
+class FakeRuns:
+    def __init__(self, statuses):
+        self.statuses = iter(statuses)
+        self.retrieve_calls = 0
+
+    def create(self, **kwargs):
+        return SimpleNamespace(id="run_1", status=next(self.statuses))
+
+    def retrieve(self, thread_id, run_id):
+        self.retrieve_calls += 1
+        return SimpleNamespace(id=run_id, status=next(self.statuses))
+
+
+def test_execute_run_polls_until_terminal_status(monkeypatch):
+    monkeypatch.setattr(run_polling.time, "sleep", lambda seconds: None)
+    runs = FakeRuns(["queued", "in_progress", "in_progress", "completed"])
+    client = SimpleNamespace(beta=SimpleNamespace(threads=SimpleNamespace(runs=runs)))
+
+    run = run_polling.execute_run(
+        client, "thread_1", "asst_1", "Dates for a.pdf", logging.getLogger(), "adaptive"
+    )
+
+    assert run.status == "completed"
+    assert runs.retrieve_calls == 3
+
+
+def test_unknown_strategies_are_rejected():
+    for strategy in ("adaptive", "stream", "fixed"):
+        run_polling.check_strategy(strategy)
+    with pytest.raises(ValueError, match="adaptive, stream, fixed"):
+        run_polling.execute_run(
+            None, "thread_1", "asst_1", "Dates for a.pdf", logging.getLogger(), "steam"
+        )
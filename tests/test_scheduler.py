@@ -0,0 +1,119 @@
+# tests/test_scheduler.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.scheduler import TaskScheduler, WorkUnit, iterate_in_thread
+
+
+def make_units(count):
+    return [
+        WorkUnit(f"file_{i}", f"f{i}.pdf", "dates", "prompt", "Dates")
+        for i in range(count)
+    ]
+
+
+def test_stream_yields_every_unit_within_concurrency():
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def worker(unit):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return unit.file_id.upper()
+
+    results = list(TaskScheduler(3).stream(make_units(10), worker))
+
+    assert sorted(result for _, result, _ in results) == sorted(
+        f"FILE_{i}" for i in range(10)
+    )
+    assert peak == 3
+
+
+def test_stream_returns_fast_units_before_slow_ones():
+    def worker(unit):
+        time.sleep(0.2 if unit.file_id == "file_0" else 0.0)
+        return unit.file_id
+
+    order = [
+        unit.file_id for unit, _, _ in TaskScheduler(2).stream(make_units(4), worker)
+    ]
+    assert order[-1] == "file_0"
+
+
+def test_stream_reports_worker_errors_per_unit():
+    def worker(unit):
+        if unit.file_id == "file_1":
+            raise RuntimeError("boom")
+        return "ok"
+
+    outcomes = {
+        unit.file_id: (result, error)
+        for unit, result, error in TaskScheduler(2).stream(make_units(3), worker)
+    }
+    assert outcomes["file_0"] == ("ok", None)
+    assert outcomes["file_1"][0] is None
+    assert str(outcomes["file_1"][1]) == "boom"
+
+
+def test_stream_consumes_lazy_sources_and_reraises_their_errors():
+    def units():
+        yield from make_units(2)
+        raise ValueError("upload failed")
+
+    seen = []
+    with pytest.raises(ValueError):
+        for unit, _, _ in TaskScheduler(2).stream(units(), lambda unit: unit.file_id):
+            seen.append(unit.file_id)
+    assert sorted(seen) == ["file_0", "file_1"]
+
+
+def test_stream_async_runs_coroutines_within_concurrency():
+    running = 0
+    peak = 0
+
+    async def worker(unit):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if unit.file_id == "file_2":
+            raise RuntimeError("boom")
+        return unit.file_id
+
+    async def collect():
+        return [
+            outcome
+            async for outcome in TaskScheduler(4).stream_async(make_units(10), worker)
+        ]
+
+    outcomes = asyncio.run(collect())
+    assert len(outcomes) == 10
+    assert peak == 4
+    assert [str(error) for _, _, error in outcomes if error] == ["boom"]
+
+
+def test_iterate_in_thread_feeds_blocking_sources_to_the_loop():
+    def uploads():
+        for unit in make_units(3):
+            time.sleep(0.01)
+            yield unit
+        raise ValueError("upload failed")
+
+    async def collect():
+        seen = []
+        with pytest.raises(ValueError):
+            async for unit in iterate_in_thread(uploads()):
+                seen.append(unit.file_id)
+        return seen
+
+    assert asyncio.run(collect()) == ["file_0", "file_1", "file_2"]
@@ -0,0 +1,132 @@
+# tests/test_simulation.py
+import asyncio
+import logging
+
+import openai
+import pytest
+from tenacity import stop_after_attempt, wait_none
+
+from src import tender_analyzer
+from src.rate_limiter import AdmissionController, parse_duration
+from src.simulation import (
+    SimulationProfile,
+    format_reset,
+    parse_latency,
+    rate_limit_error,
+)
+
+
+def test_latency_specs_cover_the_supported_distributions():
+    profile = SimulationProfile(seed=1)
+    rng = profile._rng
+    assert parse_latency(None)(rng) == 0.0
+    assert parse_latency(1.5)(rng) == 1.5
+    assert 2.0 <= parse_latency({"distribution": "uniform", "low": 2, "high": 3})(rng)
+    assert parse_latency({"distribution": "lognormal", "median": 4})(rng) > 0
+    assert parse_duration(format_reset(62.5)) == 62.5
+    assert parse_duration(format_reset(0.25)) == 0.25
+
+
+def test_plan_injects_errors_and_unfinished_runs_at_their_rates():
+    profile = SimulationProfile(
+        latency={"default": 0.5, "Dates": 2.0},
+        timeout_error_rate=0.2,
+        failed_run_rate=0.2,
+        cancelled_run_rate=0.1,
+        seed=3,
+    )
+    outcomes = [profile.plan("Dates for a.pdf") for _ in range(2000)]
+    timeouts = sum(
+        isinstance(error, openai.APITimeoutError) for _, error, _, _ in outcomes
+    )
+    statuses = [run.status for _, error, run, _ in outcomes if error is None]
+    assert 300 < timeouts < 500
+    assert 300 < statuses.count("failed") < 500
+    assert 120 < statuses.count("cancelled") < 280
+    assert {latency for latency, _, _, _ in outcomes} == {2.0}
+    runs, errors, unfinished, _ = profile.snapshot()
+    assert (runs, errors) == (2000, timeouts)
+    assert unfinished == statuses.count("failed") + statuses.count("cancelled")
+    assert profile.plan("Requirements for a.pdf")[0] == 0.5
+
+
+def test_synthetic_budgets_report_headers_and_answer_429_when_exhausted():
+    profile = SimulationProfile(
+        requests_per_minute=8, tokens_per_minute=10000, tokens_per_run={"default": 3000}
+    )
+    _, error, run, headers = profile.plan("Dates for a.pdf")
+    assert error is None and run.usage.total_tokens == 3000
+    assert headers["x-ratelimit-limit-requests"] == "8"
+    assert headers["x-ratelimit-remaining-requests"] == "4"
+    assert headers["x-ratelimit-remaining-tokens"] == "7000"
+    profile.plan("Dates for a.pdf")
+    _, error, run, _ = profile.plan("Dates for a.pdf")
+    assert isinstance(error, openai.RateLimitError) and run is None
+    assert error.response.headers["retry-after-ms"]
+
+
+def test_simulated_prompts_go_through_admission_and_error_handling(monkeypatch):
+    monkeypatch.setattr(tender_analyzer, "admission", AdmissionController())
+    logger = logging.getLogger()
+
+    monkeypatch.setattr(
+        tender_analyzer,
+        "simulation_profile",
+        SimulationProfile(requests_per_minute=600, latency={"default": 0.01}),
+    )
+    response, headers = tender_analyzer.run_prompt(
+        ["file_a"], "prompt", "Dates for a.pdf", logger, simulation_mode=True
+    )
+    assert response == tender_analyzer.load_mock_response("Dates")
+    assert headers["limit_requests"] == "600"
+    assert tender_analyzer.admission.requests.limit == 600
+
+    monkeypatch.setattr(
+        tender_analyzer, "simulation_profile", SimulationProfile(failed_run_rate=1.0)
+    )
+    response, _ = asyncio.run(
+        tender_analyzer.run_prompt_async(
+            ["file_a"], "prompt", "Dates for a.pdf", logger, simulation_mode=True
+        )
+    )
+    assert response == "Dates for a.pdf failed with status: failed"
+
+    # A 429 on every attempt ends as an error once the retries run out
+    monkeypatch.setattr(tender_analyzer.run_prompt.retry, "wait", wait_none())
+    monkeypatch.setattr(tender_analyzer.run_prompt.retry, "stop", stop_after_attempt(2))
+    monkeypatch.setattr(
+        tender_analyzer,
+        "simulation_profile",
+        SimulationProfile(rate_limit_error_rate=1.0),
+    )
+    response, _ = tender_analyzer.run_prompt(
+        ["file_a"], "prompt", "Dates for a.pdf", logger, simulation_mode=True
+    )
+    assert response.startswith("OpenAI API request exceeded rate limit in Dates")
+    assert tender_analyzer.admission.blocked_until > 0
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_injected_rate_limit_errors_are_retried(monkeypatch, use_async):
+    monkeypatch.setattr(tender_analyzer, "admission", AdmissionController())
+    for prompt in (tender_analyzer.run_prompt, tender_analyzer.run_prompt_async):
+        monkeypatch.setattr(prompt.retry, "wait", wait_none())
+    profile = SimulationProfile()
+    plan = profile.plan
+    attempts = []
+
+    def plan_429_first(task_name):
+        attempts.append(task_name)
+        if len(attempts) == 1:
+            return 0.0, rate_limit_error(task_name, 0.01), None, {}
+        return plan(task_name)
+
+    monkeypatch.setattr(profile, "plan", plan_429_first)
+    monkeypatch.setattr(tender_analyzer, "simulation_profile", profile)
+    arguments = (["file_a"], "prompt", "Dates for a.pdf", logging.getLogger(), True)
+    if use_async:
+        response, _ = asyncio.run(tender_analyzer.run_prompt_async(*arguments))
+    else:
+        response, _ = tender_analyzer.run_prompt(*arguments)
+    assert response == tender_analyzer.load_mock_response("Dates")
+    assert len(attempts) == 2
@@ -0,0 +1,104 @@
+# tests/test_summary_tree.py
+import asyncio
+import logging
+import threading
+import time
+
+from src import tender_analyzer
+from src.tender_analyzer import (
+    generate_summary_in_batches,
+    generate_summary_in_batches_async,
+    summary_reduce_groups,
+)
+
+
+def test_reduce_groups_respect_the_budget_and_always_shrink():
+    summaries = ["a" * 400] * 5
+    assert [len(group) for group in summary_reduce_groups(summaries, 250)] == [2, 2, 1]
+    assert [len(group) for group in summary_reduce_groups(summaries, 10000)] == [5]
+    # Oversized summaries are still paired up
+    assert [len(group) for group in summary_reduce_groups(["a" * 4000] * 3, 10)] == [
+        2,
+        1,
+    ]
+
+
+class FakePrompts:
+    """Records prompt runs; each takes `delay` seconds."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _enter(self, task_name):
+        with self._lock:
+            self.calls.append(task_name)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def _exit(self):
+        with self._lock:
+            self.active -= 1
+
+    def answer(self, task_name, prompt):
+        if task_name.startswith("Tender Summary Merge"):
+            return "merged " + "m" * 100
+        if task_name == "Final Tender Summary":
+            return prompt
+        return task_name + " " + "s" * 100
+
+    def run_prompt(self, file_ids, prompt, task_name, logger, simulation_mode):
+        self._enter(task_name)
+        time.sleep(self.delay)
+        self._exit()
+        return self.answer(task_name, prompt), {}
+
+    async def run_prompt_async(
+        self, file_ids, prompt, task_name, logger, simulation_mode
+    ):
+        self._enter(task_name)
+        await asyncio.sleep(self.delay)
+        self._exit()
+        return self.answer(task_name, prompt), {}
+
+
+def summarize(monkeypatch, engine):
+    fake = FakePrompts()
+    monkeypatch.setattr(tender_analyzer, "run_prompt", fake.run_prompt)
+    monkeypatch.setattr(tender_analyzer, "run_prompt_async", fake.run_prompt_async)
+    # Two partial summaries fit a merge, but not the final prompt
+    monkeypatch.setattr(tender_analyzer, "SUMMARY_REDUCE_TOKENS", 50)
+    file_ids = [f"file_{i}" for i in range(16)]
+    args = (
+        file_ids,
+        {file_id: f"{file_id}.pdf" for file_id in file_ids},
+        logging.getLogger(),
+        ["- 21.04.2021"] * 16,
+        ["- ISO 9001"] * 16,
+        4,
+        True,
+    )
+    if engine == "asyncio":
+        final = asyncio.run(generate_summary_in_batches_async(*args))
+    else:
+        final = generate_summary_in_batches(*args)
+    return fake, final
+
+
+def test_summary_map_reduce_runs_batches_and_syntheses_together(monkeypatch):
+    for engine in ("threads", "asyncio"):
+        fake, final = summarize(monkeypatch, engine)
+        assert fake.calls[-1] == "Final Tender Summary"
+        assert fake.calls.count("Tender Summary Batch") == 4
+        # Four batch summaries -> two merges -> one merge
+        merges = [call for call in fake.calls if "Merge" in call]
+        assert merges == [
+            "Tender Summary Merge 1.1",
+            "Tender Summary Merge 1.2",
+            "Tender Summary Merge 2.1",
+        ]
+        assert fake.peak >= 5
+        assert "merged" in final and "Synthesize Dates for Summary" in final
@@ -0,0 +1,208 @@
+# tests/test_synthesis.py
+import logging
+import threading
+import time
+
+from src import tender_analyzer
+from src.document_store import DocumentStore
+from src.tender_analyzer import synthesize_results
+
+
+def test_syntheses_run_as_a_dependency_graph(monkeypatch):
+    started = {}
+    finished = {}
+    prompts = {}
+    lock = threading.Lock()
+
+    def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
+        with lock:
+            started[task_name] = time.monotonic()
+            prompts[task_name] = prompt
+        time.sleep(0.1)
+        with lock:
+            finished[task_name] = time.monotonic()
+        return f"<{task_name}>", {}
+
+    monkeypatch.setattr(tender_analyzer, "run_prompt", run_prompt)
+    results = synthesize_results(
+        ["- 21.04.2021"],
+        ["- ISO 9001"],
+        ["NO_INFO_FOUND"],
+        ["- City of Bern"],
+        ["file_a"],
+        {"file_a": "a.pdf"},
+        logging.getLogger(),
+        simulation_mode=False,
+    )
+    assert results == {
+        "synthesized_dates": "<Synthesize Dates>",
+        "synthesized_requirements": "<Synthesize Requirements>",
+        "synthesized_folder_structure": "<Synthesize Folder Structure>",
+        "synthesized_client_info": "<Synthesize Client Info>",
+    }
+    first_wave = [
+        started[name]
+        for name in (
+            "Synthesize Dates",
+            "Synthesize Requirements",
+            "Synthesize Client Info",
+        )
+    ]
+    assert max(first_wave) - min(first_wave) < 0.05
+    # Folder structure waits for, and builds on, the synthesized requirements
+    assert started["Synthesize Folder Structure"] >= finished["Synthesize Requirements"]
+    assert "<Synthesize Requirements>" in prompts["Synthesize Folder Structure"]
+
+
+def test_empty_sections_are_not_synthesized(monkeypatch):
+    calls = []
+
+    def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
+        calls.append(task_name)
+        return "x", {}
+
+    monkeypatch.setattr(tender_analyzer, "run_prompt", run_prompt)
+    results = synthesize_results(
+        ["NO_INFO_FOUND"],
+        [""],
+        [""],
+        [""],
+        ["file_a"],
+        {"file_a": "a.pdf"},
+        logging.getLogger(),
+        simulation_mode=False,
+    )
+    assert calls == []
+    assert set(results.values()) == {"NO_INFO_FOUND"}
+
+
+def test_analysis_starts_syntheses_before_all_file_tasks_finish(monkeypatch, quiet):
+    finished = {}
+    started = {}
+    prompts = {}
+    lock = threading.Lock()
+
+    def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
+        with lock:
+            started[task_name] = time.monotonic()
+            prompts[task_name] = prompt
+        time.sleep(0.3 if task_name.startswith("Requirements") else 0.02)
+        with lock:
+            finished[task_name] = time.monotonic()
+        return f"<{task_name}>", {}
+
+    monkeypatch.setattr(tender_analyzer, "run_prompt", run_prompt)
+    file_ids = ["file_a", "file_b"]
+    file_id_to_name = {"file_a": "a.pdf", "file_b": "b.pdf"}
+    previous_results = {
+        "file_ids": ["file_0"],
+        "file_id_to_name": {"file_0": "0.pdf"},
+        "all_dates": ["NO_INFO_FOUND"],
+        "all_local_dates": ["NO_INFO_FOUND"],
+        "all_requirements": ["- earlier requirement"],
+        "all_folder_structures": ["NO_INFO_FOUND"],
+        "all_client_infos": ["NO_INFO_FOUND"],
+    }
+    output = tender_analyzer.analyze_tender(
+        file_ids,
+        file_id_to_name,
+        quiet,
+        quiet,
+        quiet,
+        DocumentStore([]),
+        len(file_ids),
+        False,
+        concurrency=8,
+        synthesize=True,
+        previous_results=previous_results,
+    )
+    *_, summary, _, synthesized = output
+    assert summary == "<Tender Summary>"
+    assert synthesized["synthesized_client_info"] == "<Synthesize Client Info>"
+    last_requirements = max(
+        finished[f"Requirements for {name}"] for name in ("a.pdf", "b.pdf")
+    )
+    # Client info and the summary do not wait for the slow requirements tasks
+    assert started["Synthesize Client Info"] < last_requirements
+    assert started["Tender Summary"] < last_requirements
+    assert started["Synthesize Requirements"] >= last_requirements
+    # Earlier runs' files are synthesized along with the new ones
+    assert "- earlier requirement" in prompts["Synthesize Requirements"]
+    assert "<Requirements for b.pdf>" in prompts["Synthesize Requirements"]
+
+
+def test_syntheses_update_earlier_ones_with_only_the_new_files(monkeypatch):
+    prompts = {}
+
+    def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
+        prompts[task_name] = prompt
+        return f"<{task_name}>", {}
+
+    monkeypatch.setattr(tender_analyzer, "run_prompt", run_prompt)
+    previous_results = {
+        "file_ids": ["file_0"],
+        "file_id_to_name": {"file_0": "0.pdf"},
+        "all_dates": ["- 01.02.2021: Site visit"],
+        "all_local_dates": ["NO_INFO_FOUND"],
+        "all_requirements": ["- earlier requirement"],
+        "all_folder_structures": ["NO_INFO_FOUND"],
+        "all_client_infos": ["- Name: City of Bern"],
+        "synthesized_dates": "Synthesize Dates failed with status: failed",
+        "synthesized_requirements": "EARLIER REQUIREMENTS",
+        "synthesized_folder_structure": "EARLIER FOLDERS",
+        "synthesized_client_info": "EARLIER CLIENT",
+    }
+    results = synthesize_results(
+        ["- 21.04.2021: Deadline"],
+        ["- ISO 9001"],
+        ["NO_INFO_FOUND"],
+        ["NO_INFO_FOUND"],
+        ["file_a"],
+        {"file_a": "a.pdf"},
+        logging.getLogger(),
+        simulation_mode=False,
+        all_local_dates=["NO_INFO_FOUND"],
+        previous_results=previous_results,
+    )
+    # Nothing new for the client info: the earlier synthesis stands, without a run
+    assert results["synthesized_client_info"] == "EARLIER CLIENT"
+    assert "Synthesize Client Info" not in prompts
+
+    requirements = prompts["Synthesize Requirements"]
+    assert "File: a.pdf\n- ISO 9001" in requirements
+    assert "EARLIER REQUIREMENTS" in requirements
+    assert "earlier requirement" not in requirements
+
+    # The folder structure builds on the updated requirements
+    folders = prompts["Synthesize Folder Structure"]
+    assert "<Synthesize Requirements>" in folders and "EARLIER FOLDERS" in folders
+
+    # A failed earlier synthesis is redone from all files
+    dates = prompts["Synthesize Dates"]
+    assert "File: 0.pdf\n- 01.02.2021: Site visit" in dates
+    assert "File: a.pdf\n- 21.04.2021: Deadline" in dates
+    assert "Earlier synthesis:" not in dates
+
+
+def test_analysis_updates_the_earlier_summary(monkeypatch, quiet):
+    prompts = {}
+
+    def run_prompt(file_ids, prompt, task_name, logger, simulation_mode):
+        prompts[task_name] = prompt
+        return f"<{task_name}>", {}
+
+    monkeypatch.setattr(tender_analyzer, "run_prompt", run_prompt)
+    output = tender_analyzer.analyze_tender(
+        ["file_a"],
+        {"file_a": "a.pdf"},
+        quiet,
+        quiet,
+        quiet,
+        DocumentStore([]),
+        1,
+        False,
+        previous_results={"summary_response": "EARLIER SUMMARY [0.pdf]"},
+    )
+    assert output[5] == "<Tender Summary Update>"
+    update = prompts["Tender Summary Update"]
+    assert "EARLIER SUMMARY [0.pdf]" in update and "<Tender Summary>" in update
@@ -0,0 +1,92 @@
+# tests/test_task_graph.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.task_graph import TaskGraph
+
+
+def test_stages_start_once_their_dependencies_finish():
+    order = []
+    lock = threading.Lock()
+
+    def stage(name, seconds=0.0):
+        def run(*inputs):
+            time.sleep(seconds)
+            with lock:
+                order.append(name)
+            return f"{name}({', '.join(inputs)})"
+
+        return run
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        graph = TaskGraph(executor)
+        graph.add("extract")
+        graph.add("slow", stage("slow", 0.1), after=("extract",))
+        graph.add("fast", stage("fast"), after=("extract",))
+        graph.add("merge", stage("merge"), after=("slow", "fast"))
+        assert not graph.done("fast")
+        graph.finish("extract", "x")
+        assert graph.result("merge") == "merge(slow(x), fast(x))"
+    assert order == ["fast", "slow", "merge"]
+
+
+def test_stage_added_after_its_dependencies_starts_right_away():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        graph = TaskGraph(executor)
+        graph.add("a")
+        graph.finish("a", 1)
+        graph.add("b", lambda a: a + 1, after=("a",))
+        assert graph.result("b") == 2
+        with pytest.raises(ValueError):
+            graph.add("c", lambda: None, after=("missing",))
+        with pytest.raises(ValueError):
+            graph.finish("a", 2)
+
+
+def test_checkpoint_failures_do_not_fail_stages():
+    class BrokenCheckpoint:
+        def get(self, name, arguments):
+            raise OSError("disk I/O error")
+
+        put = get
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        graph = TaskGraph(executor, checkpoint=BrokenCheckpoint())
+        graph.add("a", lambda: 1)
+        graph.add("b", lambda a: a + 1, after=("a",))
+        assert graph.result("b") == 2
+
+
+def test_failures_propagate_to_dependents():
+    def fail():
+        raise RuntimeError("no response")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        graph = TaskGraph(executor)
+        graph.add("a", fail)
+        graph.add("b", lambda a: a, after=("a",))
+        with pytest.raises(RuntimeError, match="no response"):
+            graph.result("b")
+
+
+def test_critical_path_follows_the_last_finished_dependency():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        graph = TaskGraph(executor)
+        graph.add("uploads")
+        graph.add("dates", after=("uploads",))
+        graph.add("requirements", after=("uploads",))
+        graph.add("summary", lambda *_: time.sleep(0.05), ("dates", "requirements"))
+        graph.finish("uploads")
+        graph.finish("requirements")
+        time.sleep(0.05)
+        graph.finish("dates")
+        graph.result("summary")
+
+    path = graph.critical_path()
+    assert [name for name, _ in path] == ["uploads", "dates", "summary"]
+    assert path[1][1] >= 0.05 and path[2][1] >= 0.05
+    assert "summary <- dates, requirements" in graph.describe()
+    assert graph.report().startswith("Critical path: ")
@@ -1,6 +1,14 @@
 # tests/test_tender_analyzer.py
+import logging
+from types import SimpleNamespace
+
 import pytest
-from src.tender_analyzer import extract_dates_fallback
+from src.tender_analyzer import (
+    extract_assistant_text,
+    extract_dates_fallback,
+    finalize_task_result,
+)
+from src.utils import replace_citations
 
 
 # Test cases for different date formats
@@ -212,3 +220,50 @@ def test_extract_dates_fallback(file_content, file_name, expected_output):
     """Test the extract_dates_fallback function with various date formats."""
     result = extract_dates_fallback(file_content, file_name)
     assert result == expected_output, f"Expected:\n{expected_output}\nGot:\n{result}"
+
+
+def test_file_citation_annotations_resolve_to_the_cited_file():
+    value = "Deadline 21.04.2021【4:0†source】, kick-off 【4:1†source】."
+    first = value.index("【")
+    second = value.index("【", first + 1)
+    annotations = [
+        SimpleNamespace(
+            type="file_citation",
+            start_index=second,
+            end_index=second + len("【4:1†source】"),
+            file_citation=SimpleNamespace(file_id="file-b"),
+        ),
+        SimpleNamespace(
+            type="file_citation",
+            start_index=first,
+            end_index=first + len("【4:0†source】"),
+            file_citation=SimpleNamespace(file_id="file-a"),
+        ),
+    ]
+    message = SimpleNamespace(
+        role="assistant",
+        content=[
+            SimpleNamespace(
+                type="text",
+                text=SimpleNamespace(value=value, annotations=annotations),
+            )
+        ],
+    )
+    text = extract_assistant_text(SimpleNamespace(data=[message]))
+    assert text == "Deadline 21.04.2021【file-a】, kick-off 【file-b】."
+    assert replace_citations(text, {"file-a": "a.pdf", "file-b": "b.pdf"}) == (
+        "Deadline 21.04.2021【a.pdf】, kick-off 【b.pdf】."
+    )
+
+
+def test_per_file_results_keep_the_cited_file():
+    result = finalize_task_result(
+        "requirements",
+        "- ISO 9001 per b.pdf 【file-b】",
+        "a.pdf",
+        {"file-a": "a.pdf", "file-b": "b.pdf"},
+        None,
+        logging.getLogger(),
+    )
+    # Syntheses and the job store see what the assistant cited
+    assert result == "- ISO 9001 per b.pdf 【b.pdf】"
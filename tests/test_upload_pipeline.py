@@ -0,0 +1,36 @@
+# tests/test_upload_pipeline.py
+import logging
+from types import SimpleNamespace
+
+from src.file_handler import UploadResult
+from src.tender_analyzer import upload_work_units
+
+
+def test_upload_work_units_queue_files_as_uploads_finish():
+    a, b, c, d = (SimpleNamespace(name=f"{n}.pdf") for n in "abcd")
+    # Completion order, not input order
+    results = [
+        UploadResult(2, c, "file_c", False, None, None),
+        UploadResult(1, b, None, False, "timeout", None),
+        UploadResult(0, a, "file_a", True, None, None),
+        UploadResult(3, d, None, False, None, "a.pdf"),
+    ]
+    file_ids, file_id_to_name, failed = [], {}, []
+
+    units = upload_work_units(
+        iter(results),
+        file_ids,
+        file_id_to_name,
+        failed,
+        "separate",
+        logging.getLogger(),
+    )
+    first = next(units)
+    assert first.file_id == "file_c"
+    assert file_id_to_name == {"file_c": "c.pdf"}
+
+    rest = list(units)
+    assert [unit.file_id for unit in rest].count("file_a") == 4
+    assert file_ids == ["file_a", "file_c"]
+    assert file_id_to_name == {"file_c": "c.pdf", "file_a": "a.pdf"}
+    assert failed == ["b.pdf"]
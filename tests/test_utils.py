@@ -0,0 +1,47 @@
+# tests/test_utils.py
+import json
+import os
+
+from src.utils import MockResponseIndex, citation_rewriter, replace_citations
+
+FILES = {"file-abc123": "Tender.pdf", "file-XYZ9": "annex_2.docx"}
+
+
+def test_replace_citations_resolves_file_ids_and_temp_names():
+    text = "Deadline 【4:0†file-XYZ9】 in tmpa1b2.pdf, see *Annex* 【4:1†source】"
+    assert replace_citations(text, FILES) == (
+        "Deadline 【annex_2.docx】 in Tender.pdf, see Annex 【4:1†source】"
+    )
+    assert replace_citations("【4:1†source】", {"file-abc123": "Tender.pdf"}) == (
+        "【Tender.pdf】"
+    )
+    assert replace_citations(text, {}) == text
+
+
+def test_replace_citations_retargets_other_file_names():
+    text = "From Tender.pdf 【4:0†file-abc123】 and Tender.pdfx, not *annex_2*"
+    assert replace_citations(text, FILES, intended_file_name="annex_2.docx") == (
+        "From annex_2.docx 【annex_2.docx】 and Tender.pdfx, not annex_2"
+    )
+
+
+def test_citation_rewriters_are_shared_per_mapping():
+    rewriter = citation_rewriter(FILES)
+    assert citation_rewriter(dict(FILES)) is rewriter
+    assert citation_rewriter({"file-abc123": "Other.pdf"}) is not rewriter
+
+
+def test_mock_response_index_parses_once_until_the_file_changes(tmp_path):
+    path = tmp_path / "mock_response.md"
+    path.write_text("# 📅 All Important Dates and Milestones\n- 21.04.2021\n")
+    index = MockResponseIndex(str(path))
+    assert index.get("Dates") == "- 21.04.2021"
+    assert index.get("Client Info") == "No client information found."
+    combined = json.loads(index.get("Combined Extraction"))
+    assert combined["dates"] == "- 21.04.2021"
+    assert index.parses == 1
+
+    path.write_text("# 📅 All Important Dates and Milestones\n- 01.05.2021\n")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+    assert index.get("Dates") == "- 01.05.2021"
+    assert index.parses == 2